@@ -0,0 +1,204 @@
+"""Microbenchmarks for the products storage functions at 10k-1M records.
+
+Each case pre-fills the store with N synthetic records (written directly, not
+through the code under test), then times a sample of calls on top of it. The
+per-record time at growing N shows whether a call is O(1) or rewrites the
+whole store (the quadratic pattern of append_to_json and friends).
+
+    python -m benchmarks.bench_persistence --scales 10000 100000 --sample 50
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_scrapers import SCRIPTS, load_script
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+
+
+def synthetic_product(i):
+    """A product record with field sizes similar to the scraped catalog."""
+    return {
+        "name": f"SYNTHETIC PRODUCT {i:07d}",
+        "brand": f"Brand {i % 997}",
+        "manufacturer": f"Manufacturer {i % 331} GmbH",
+        "certification_level": "Organic cosmetics" if i % 2 else "Natural cosmetics",
+        "certification_description": "At least 95% of natural and/or derived natural ingredients stem from organic agriculture.",
+        "ingredients": ", ".join(f"Ingredient {(i + k) % 500}" for k in range(25)),
+        "product_description": "Synthetic description used for storage benchmarks. " * 6,
+        "usage": "Apply daily.",
+        "image_url": f"https://extranet.natrue.org/storage/{i}/thumb.jpg",
+        "page_number": i // 20 + 1,
+    }
+
+
+def written_bytes():
+    """Bytes this process has passed to write() so far (Linux), or None elsewhere."""
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+# --- cases: prepare(module, size) fills the store, run(module, records) is timed ---
+
+def _prefill_json(module, size):
+    with open(module.JSON_FILE, "w", encoding="utf-8") as f:
+        json.dump({"products": [synthetic_product(i) for i in range(size)]}, f, ensure_ascii=False)
+
+
+def _prefill_excel(module, size):
+    import pandas as pd
+    pd.DataFrame([synthetic_product(i) for i in range(size)]).to_excel(
+        module.EXCEL_FILE, sheet_name="Product Details", index=False)
+
+
+def _prefill_processed(module, size):
+    with open(module.PROCESSED_FILE, "w", encoding="utf-8") as f:
+        json.dump({"processed_products": [synthetic_product(i)["name"] for i in range(size)]}, f)
+
+
+def _append_each(function):
+    def run(module, records):
+        for record in records:
+            getattr(module, function)(record)
+    return run
+
+
+def _processed_each(module, records):
+    for record in records:
+        module.add_to_processed_products(record["name"])
+
+
+def _prepare_merge(module, size):
+    _prefill_excel(module, size)
+
+
+def _run_merge(module, records):
+    # Temp files are written untimed by the harness (see CASES), only the merge is timed
+    module.merge_temp_files_to_excel()
+
+
+def _write_temp_files(module, records):
+    import pandas as pd
+    os.makedirs(module.TEMP_DIR, exist_ok=True)
+    for i, record in enumerate(records):
+        pd.DataFrame([record]).to_csv(os.path.join(module.TEMP_DIR, f"temp_bench_{i}.csv"), index=False)
+
+
+# name -> (prepare(module, size), run(module, records), untimed setup(module, records) or None)
+CASES = {
+    "append_to_json": (_prefill_json, _append_each("append_to_json"), None),
+    "append_to_excel": (_prefill_excel, _append_each("append_to_excel"), None),
+    "merge_temp_files_to_excel": (_prepare_merge, _run_merge, _write_temp_files),
+    "add_to_processed_products": (_prefill_processed, _processed_each, None),
+}
+
+
+def register_backend(name, prepare, run, setup=None):
+    """Add a replacement storage backend so it is measured side by side with the originals."""
+    CASES[name] = (prepare, run, setup)
+
+
+# --- the compressed JSON Lines catalog (common/catalog.py) ---
+
+def _prefill_catalog(module, size):
+    from common.catalog import write_catalog
+    write_catalog((synthetic_product(i) for i in range(size)), module.CATALOG_FILE)
+
+
+def _append_to_catalog(module, records):
+    for record in records:
+        module.append_to_catalog(record)
+    module.ENGINE.close_catalog()
+
+
+def _load_json(module, records):
+    # What every consumer of the JSON store does today: load it whole, then pick fields
+    with open(module.JSON_FILE, "r", encoding="utf-8") as f:
+        products = json.load(f)["products"]
+    return [(p["name"], p["brand"]) for p in products if p["brand"] == "Brand 7"]
+
+
+def _read_catalog(module, records):
+    from common.catalog import read_catalog
+    return list(read_catalog(module.CATALOG_FILE, fields=("name", "brand"), where={"brand": "Brand 7"}))
+
+
+CASES["load_json"] = (_prefill_json, _load_json, None)
+register_backend("append_to_catalog", _prefill_catalog, _append_to_catalog)
+register_backend("read_catalog", _prefill_catalog, _read_catalog)
+
+
+def run_case(name, size, sample, workdir=None):
+    """Time `sample` calls of one case on top of a store pre-filled with `size` records."""
+    prepare, run, setup = CASES[name]
+    workdir = workdir or tempfile.mkdtemp(prefix="bench_persistence_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        module = load_script(SCRIPTS["products"][0], "bench_persistence_products")
+        module.initialize_files()
+        prepare(module, size)
+        records = [synthetic_product(size + i) for i in range(sample)]
+        if setup:
+            setup(module, records)
+
+        bytes_before = written_bytes()
+        tracemalloc.start()
+        start = time.perf_counter()
+        run(module, records)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        bytes_after = written_bytes()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "case": name,
+        "existing_records": size,
+        "sample": sample,
+        "seconds": round(elapsed, 4),
+        "ms_per_record": round(elapsed * 1000 / sample, 3) if sample else None,
+        "bytes_written": None if bytes_before is None else bytes_after - bytes_before,
+        "peak_python_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Storage microbenchmarks for the products pipeline")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES),
+                        help="records already in the store before timing")
+    parser.add_argument("--sample", type=int, default=20, help="timed calls per case and scale")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<28}{'existing':>10}{'ms/record':>12}{'bytes written':>16}{'peak MB':>10}")
+    for name in args.cases:
+        for size in args.scales:
+            result = run_case(name, size, args.sample)
+            results.append(result)
+            print(f"{name:<28}{size:>10}{result['ms_per_record']:>12}"
+                  f"{str(result['bytes_written']):>16}{result['peak_python_mb']:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    main()
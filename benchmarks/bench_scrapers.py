@@ -0,0 +1,129 @@
+"""End-to-end scraper benchmark against the local replay server.
+
+Runs the real extract_all_products / extract_all_brands code in a scratch
+directory with the page URL pointed at the replay server, then reports
+items/sec, p50/p95 per-item latency and peak RSS.
+
+    python -m benchmarks.bench_scrapers --pipeline products --pages 3 --workers 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.replay_server import ReplayCatalog, ReplayServer
+from common.scripts import SCRIPT_PATHS, load_script
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPTS = {
+    "products": (SCRIPT_PATHS["products"], "extract_all_products", "product"),
+    "brands": (SCRIPT_PATHS["brands"], "extract_all_brands", "brand"),
+}
+
+
+def use_local_chromedriver(module, driver_path):
+    """Make the script use a local chromedriver (no cache or network lookup)."""
+    module.resolve_chromedriver = lambda: driver_path
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its finished children (browsers), in MB."""
+    if resource is None:
+        return None, None
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes on macOS, KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def run_pipeline(pipeline, server, pages=None, workers=None, driver_path=None, workdir=None):
+    """Run one pipeline end to end against the replay server and return its measurements."""
+    path, entry_point, item_stage = SCRIPTS[pipeline]
+    workdir = workdir or tempfile.mkdtemp(prefix=f"bench_{pipeline}_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        module = load_script(path, f"bench_{pipeline}")
+        if driver_path:
+            use_local_chromedriver(module, driver_path)
+
+        module.PAGE_URL_TEMPLATE = server.url_template(item_stage)
+        module.BASE_URL = module.PAGE_URL_TEMPLATE.format(1)
+        total_pages = pages or server.catalog.total_pages(item_stage)
+        if hasattr(module, "TOTAL_PAGES"):
+            module.TOTAL_PAGES = total_pages
+        if hasattr(module, "ESTIMATED_TOTAL_PAGES"):
+            module.ESTIMATED_TOTAL_PAGES = total_pages
+        if workers and hasattr(module, "MAX_WORKERS"):
+            module.MAX_WORKERS = workers
+
+        start = time.perf_counter()
+        getattr(module, entry_point)()
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(previous_cwd)
+
+    stats = module.TIMER.report()["stages"].get(item_stage, {})
+    items = stats.get("count", 0)
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "pipeline": pipeline,
+        "pages": total_pages,
+        "items": items,
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(items / elapsed, 3) if elapsed else None,
+        "p50_item_seconds": stats.get("p50_seconds"),
+        "p95_item_seconds": stats.get("p95_seconds"),
+        "peak_rss_mb": own_rss,
+        "peak_children_rss_mb": children_rss,
+        "stages": module.TIMER.report()["stages"],
+        "workdir": workdir,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end scraper benchmark")
+    parser.add_argument("--pipeline", choices=[*SCRIPTS, "all"], default="all")
+    parser.add_argument("--pages", type=int, help="pages to scrape (default: every replayed page)")
+    parser.add_argument("--per-page", type=int, default=20, help="items per replayed list page")
+    parser.add_argument("--limit", type=int, help="only replay the first N scraped records")
+    parser.add_argument("--workers", type=int, help="parallel browsers, where the pipeline supports it")
+    parser.add_argument("--latency-ms", type=float, default=0, help="extra server latency per page load")
+    parser.add_argument("--dialog-delay-ms", type=float, default=0, help="delay before a dialog renders")
+    parser.add_argument("--chromedriver", help="local chromedriver binary to use instead of a download")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    catalog = ReplayCatalog.from_scraped_files(
+        limit=args.limit,
+        per_page=args.per_page,
+        latency=args.latency_ms / 1000,
+        dialog_delay=args.dialog_delay_ms / 1000,
+    )
+    pipelines = list(SCRIPTS) if args.pipeline == "all" else [args.pipeline]
+
+    results = []
+    with ReplayServer(catalog) as server:
+        for pipeline in pipelines:
+            result = run_pipeline(pipeline, server, args.pages, args.workers, args.chromedriver)
+            results.append(result)
+            print(f"{pipeline}: {result['items']} items in {result['seconds']}s "
+                  f"({result['items_per_second']} items/s), p50 {result['p50_item_seconds'] or 0:.3f}s, "
+                  f"p95 {result['p95_item_seconds'] or 0:.3f}s, peak RSS {result['peak_rss_mb']} MB "
+                  f"(browsers {result['peak_children_rss_mb']} MB)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Local HTTP server that replays NATRUE-like product and brand list pages with dialogs.
+
+Pages are generated from the scraped JSON files, so the real Selenium code paths
+(list wait, click, dialog wait, page_source parse, close) run unchanged against
+them without touching natrue.org.
+"""
+
+import html
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCTS_JSON = os.path.join(REPO_ROOT, "task1", "products", "natrue_product_details.json")
+BRANDS_JSON = os.path.join(REPO_ROOT, "task1", "brands", "natrue_brand_details.json")
+
+_PAGE_SCRIPT = """
+var items = JSON.parse(document.getElementById('dialogs').textContent);
+var host = document.getElementById('dialog-host');
+function closeDialog() { host.innerHTML = ''; }
+document.querySelectorAll('.%(list)s__item__name').forEach(function (link) {
+  link.addEventListener('click', function (event) {
+    event.preventDefault();
+    setTimeout(function () { host.innerHTML = items[link.dataset.item]; }, %(dialog_delay_ms)d);
+  });
+});
+document.addEventListener('click', function (event) {
+  if (event.target.classList.contains('el-dialog__close')) { closeDialog(); }
+});
+document.addEventListener('keydown', function (event) {
+  if (event.key === 'Escape') { closeDialog(); }
+});
+"""
+
+
+def load_records(path, key):
+    """Load the record list from a scraped JSON file, ignoring trailing garbage from torn writes."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    data, _ = json.JSONDecoder().raw_decode(text.lstrip())
+    return data.get(key, [])
+
+
+def _text(value):
+    return html.escape("" if value is None else str(value))
+
+
+def render_product_dialog(product):
+    """Render a product dialog with the classes extract_product_details looks for."""
+    description = []
+    if product.get("ingredients"):
+        description.append(f"Ingredients\n{product['ingredients']}")
+    if product.get("product_description"):
+        description.append(f"Description\n{product['product_description']}")
+    if product.get("usage"):
+        description.append(f"Usage\n{product['usage']}")
+    image = product.get("image_url") or ""
+    return (
+        '<div class="el-dialog dialog-product">'
+        '<button class="el-dialog__close" type="button">x</button>'
+        '<div class="dialog-product__certification">'
+        f'<div class="dialog-product__certification__level">{_text(product.get("certification_level"))}</div>'
+        f'<div class="dialog-product__certification__description">{_text(product.get("certification_description"))}</div>'
+        "</div>"
+        '<div class="dialog-product__info">'
+        f'<div class="dialog-product__info__content">{_text(product.get("brand"))}</div>'
+        f'<div class="dialog-product__info__content">{_text(product.get("manufacturer"))}</div>'
+        "</div>"
+        f'<div class="dialog-product__description">{_text(chr(10).join(description))}</div>'
+        f'<img class="image-magnifier__img" src="{_text(image)}">'
+        "</div>"
+    )
+
+
+def render_brand_dialog(brand):
+    """Render a brand dialog with the classes extract_brand_details looks for."""
+    lines = [brand.get("company") or "", brand.get("address") or "", brand.get("country") or ""]
+    info = "<br>".join(_text(line) for line in lines if line)
+    website = brand.get("website") or ""
+    link = f'<a href="{_text(website)}">{_text(website)}</a>' if website else ""
+    return (
+        '<div class="el-dialog dialog-brand">'
+        '<button class="el-dialog__close" type="button">x</button>'
+        f'<div class="dialog-brand__info">{info}<br>{link}</div>'
+        f'<div class="dialog-brand__description">{_text(brand.get("additional_info"))}</div>'
+        "</div>"
+    )
+
+
+class ReplayCatalog:
+    """Synthetic catalog split into fixed-size pages."""
+
+    def __init__(self, products, brands, per_page=20, latency=0.0, dialog_delay=0.0):
+        self.products = products
+        self.brands = brands
+        self.per_page = per_page
+        self.latency = latency
+        self.dialog_delay = dialog_delay
+
+    @classmethod
+    def from_scraped_files(cls, products_path=PRODUCTS_JSON, brands_path=BRANDS_JSON, limit=None, **kwargs):
+        """Seed the catalog from the scraped JSON files (optionally only the first `limit` records)."""
+        products = load_records(products_path, "products")[:limit]
+        brands = load_records(brands_path, "brands")[:limit]
+        return cls(products, brands, **kwargs)
+
+    def total_pages(self, kind):
+        return max(1, math.ceil(len(self._records(kind)) / self.per_page))
+
+    def page_items(self, kind, page_number):
+        start = (page_number - 1) * self.per_page
+        return self._records(kind)[start:start + self.per_page]
+
+    def _records(self, kind):
+        return self.products if kind == "product" else self.brands
+
+    def render_page(self, kind, page_number):
+        """Render one list page with its dialogs embedded as JSON for the click handler."""
+        items = self.page_items(kind, page_number)
+        render = render_product_dialog if kind == "product" else render_brand_dialog
+        links = "".join(
+            f'<li class="{kind}-list__item"><a href="#" class="{kind}-list__item__name" data-item="{i}">'
+            f'{_text(item.get("name"))}</a></li>'
+            for i, item in enumerate(items)
+        )
+        dialogs = json.dumps([render(item) for item in items]).replace("</", "<\\/")
+        total = self.total_pages(kind)
+        pager = "".join(f"<li>{n}</li>" for n in range(1, total + 1))
+        script = _PAGE_SCRIPT % {"list": f"{kind}-list", "dialog_delay_ms": int(self.dialog_delay * 1000)}
+        return (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>NATRUE replay</title></head><body>"
+            f'<ul class="{kind}-list">{links}</ul>'
+            f'<div class="el-pagination"><span>{total} pages</span><ul class="el-pager">{pager}</ul></div>'
+            '<div id="dialog-host"></div>'
+            f'<script type="application/json" id="dialogs">{dialogs}</script>'
+            f"<script>{script}</script>"
+            "</body></html>"
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    catalog = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        kind = {"/products": "product", "/brands": "brand"}.get(parsed.path)
+        if kind is None:
+            self.send_error(404)
+            return
+        try:
+            page_number = int(parse_qs(parsed.query).get("page", ["1"])[0])
+        except ValueError:
+            page_number = 1
+
+        if self.catalog.latency:
+            time.sleep(self.catalog.latency)
+        body = self.catalog.render_page(kind, page_number).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Runs the replay catalog on a local port in a background thread."""
+
+    def __init__(self, catalog, host="127.0.0.1", port=0):
+        handler = type("ReplayHandler", (_Handler,), {"catalog": catalog})
+        self.catalog = catalog
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_template(self, kind):
+        """Page URL template in the same `{}` format as PAGE_URL_TEMPLATE in the scrapers."""
+        return f"{self.base_url}/{kind}s?page={{}}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
@@ -0,0 +1,43 @@
+import json
+import pytest
+from benchmarks.bench_persistence import CASES, run_case, register_backend, synthetic_product, main
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_run_case_small(case):
+    """Every storage case runs at a tiny scale and reports its measurements."""
+    result = run_case(case, size=30, sample=3)
+    assert result["case"] == case
+    assert result["existing_records"] == 30
+    assert result["seconds"] >= 0
+    assert result["ms_per_record"] >= 0
+    assert result["peak_python_mb"] >= 0
+
+def test_synthetic_products_are_unique():
+    """Synthetic records never collide on the product key fields."""
+    names = {synthetic_product(i)["name"] for i in range(1000)}
+    assert len(names) == 1000
+
+def test_register_backend():
+    """Replacement backends are measured through the same harness."""
+    calls = []
+
+    def prepare(module, size):
+        calls.append(("prepare", size))
+
+    def run(module, records):
+        calls.append(("run", len(records)))
+
+    register_backend("noop_backend", prepare, run)
+    try:
+        result = run_case("noop_backend", size=10, sample=4)
+    finally:
+        del CASES["noop_backend"]
+    assert calls == [("prepare", 10), ("run", 4)]
+    assert result["case"] == "noop_backend"
+
+def test_main_writes_report(tmp_path):
+    """The command line writes a JSON report."""
+    output = tmp_path / "bench.json"
+    main(["--cases", "add_to_processed_products", "--scales", "10", "20", "--sample", "2", "--output", str(output)])
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert [r["existing_records"] for r in results] == [10, 20]
@@ -0,0 +1,93 @@
+import json
+import re
+import urllib.request
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.replay_server import ReplayCatalog, ReplayServer, load_records
+from benchmarks.bench_scrapers import SCRIPTS, load_script, peak_rss_mb
+
+PRODUCTS = [
+    {
+        "name": f"PRODUCT {i}",
+        "brand": f"Brand {i}",
+        "manufacturer": f"Maker {i} GmbH",
+        "certification_level": "Organic cosmetics",
+        "certification_description": "At least 95% organic",
+        "ingredients": "Aqua, Glycerin",
+        "product_description": "A cream </script> with a tricky description",
+        "usage": "Apply daily",
+        "image_url": f"https://example.org/{i}.jpg",
+        "page_number": 1,
+    }
+    for i in range(5)
+]
+BRANDS = [
+    {
+        "name": f"BRAND {i}",
+        "company": f"Company {i} AG",
+        "address": "Hauptstrasse 1 1010 Wien",
+        "country": "Austria",
+        "website": f"www.brand{i}.at",
+        "additional_info": "Family business",
+        "page_number": 1,
+    }
+    for i in range(3)
+]
+
+@pytest.fixture
+def server():
+    catalog = ReplayCatalog(PRODUCTS, BRANDS, per_page=2)
+    with ReplayServer(catalog) as running:
+        yield running
+
+def fetch(url):
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode("utf-8")
+
+def page_dialogs(page_html):
+    soup = BeautifulSoup(page_html, "html.parser")
+    return soup, json.loads(soup.find("script", id="dialogs").string)
+
+def test_load_records_ignores_torn_tail(tmp_path):
+    """A JSON file with trailing garbage from a torn write still loads."""
+    path = tmp_path / "products.json"
+    path.write_text(json.dumps({"products": PRODUCTS[:2]}) + "tail garbage}", encoding="utf-8")
+    assert len(load_records(str(path), "products")) == 2
+
+def test_pages_and_pagination(server):
+    """Items are split into pages and the pager reports the page count."""
+    soup, dialogs = page_dialogs(fetch(server.url_template("product").format(3)))
+    names = [a.get_text() for a in soup.find_all(class_="product-list__item__name")]
+    assert names == ["PRODUCT 4"]
+    assert len(dialogs) == 1
+    assert re.search(r"(\d+)\s*pages", soup.find(class_="el-pagination").get_text()).group(1) == "3"
+
+def test_product_dialog_round_trips_through_extractor(server, tmp_path, monkeypatch):
+    """The real extract_product_details reads back the seeded record."""
+    monkeypatch.chdir(tmp_path)
+    products = load_script(SCRIPTS["products"][0], "replay_products")
+    _, dialogs = page_dialogs(fetch(server.url_template("product").format(1)))
+    info = products.extract_product_details(BeautifulSoup(dialogs[1], "html.parser"), "PRODUCT 1", 1)
+    for field in ("brand", "manufacturer", "certification_level", "ingredients", "product_description", "usage", "image_url"):
+        assert info[field] == PRODUCTS[1][field]
+
+def test_brand_dialog_round_trips_through_extractor(server, tmp_path, monkeypatch):
+    """The real extract_brand_details reads back the seeded record."""
+    monkeypatch.chdir(tmp_path)
+    brands = load_script(SCRIPTS["brands"][0], "replay_brands")
+    _, dialogs = page_dialogs(fetch(server.url_template("brand").format(1)))
+    info = brands.extract_brand_details(BeautifulSoup(dialogs[0], "html.parser"), "BRAND 0", 1)
+    assert info["company"] == "Company 0 AG"
+    assert info["country"] == "Austria"
+    assert info["website"] == "www.brand0.at"
+    assert info["address"] == "Hauptstrasse 1 1010 Wien"
+
+def test_unknown_path_is_404(server):
+    """Only the list pages are served."""
+    with pytest.raises(urllib.error.HTTPError):
+        fetch(server.base_url + "/nothing")
+
+def test_peak_rss_reports_numbers():
+    """Peak RSS is measured where the platform supports it."""
+    own, children = peak_rss_mb()
+    assert own is None or own > 0
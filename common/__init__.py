@@ -0,0 +1 @@
+"""Helpers shared by the NATRUE and New Directions scrapers."""
@@ -0,0 +1,274 @@
+"""Compressed JSON Lines storage for the scraped catalogs, with a streaming reader.
+
+The indented JSON stores must be loaded whole by every reader and rewritten
+whole by every append. A catalog file holds one compact JSON record per
+line, compressed with zstd (.zst, when the zstandard package is installed)
+or gzip (.gz). Appends only add to the end. Readers stream the records one
+at a time:
+
+    for product in read_catalog("natrue_product_details.jsonl.gz",
+                                fields=["name", "brand"], where={"brand": "Lavera"}):
+        ...
+
+`where` is a dict of field values or a predicate. Lines that cannot match a
+dict filter are skipped before they are parsed. `fields` keeps only the named
+fields of each record. A torn write at the end, left by a crash, ends the
+stream instead of failing it. Before appending, a writer closes off a gzip
+member left unfinished by a crash, keeping the records that were flushed into
+it, so that later appends stay readable.
+
+    python -m common.catalog convert natrue_product_details.json natrue_product_details.jsonl.gz
+    python -m common.catalog read natrue_product_details.jsonl.gz --fields name brand --where brand=Lavera
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import threading
+import zlib
+
+from common.lazy import lazy_import
+
+zstandard = lazy_import("zstandard")
+
+
+def codec(path):
+    """The compression of a catalog path, from its extension: "zstd", "gzip" or None."""
+    if path.endswith(".zst"):
+        return "zstd"
+    if path.endswith(".gz"):
+        return "gzip"
+    return None
+
+
+def open_catalog(path, mode="rt", level=None):
+    """Open a catalog file for reading ("rt") or appending ("at") text, through its codec."""
+    kind = codec(path)
+    if kind == "gzip":
+        return gzip.open(path, mode, compresslevel=level or 6, encoding="utf-8")
+    if kind == "zstd":
+        try:
+            zstandard.ZstdCompressor
+        except ImportError:
+            raise RuntimeError(f"{path} needs the zstandard package (pip install zstandard); use .gz instead")
+        binary = open(path, "rb" if "r" in mode else "ab")
+        if "r" in mode:
+            stream = zstandard.ZstdDecompressor().stream_reader(binary, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=level or 3).stream_writer(binary, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _matcher(where):
+    """(cheap line test, record test) for a where argument."""
+    if where is None:
+        return None, None
+    if callable(where):
+        return None, where
+    # A record whose field equals a string value has that string, JSON-escaped, somewhere in its line
+    needles = [json.dumps(value, ensure_ascii=False)[1:-1] for value in where.values() if isinstance(value, str)]
+
+    def line_test(line):
+        return all(needle in line for needle in needles)
+
+    def record_test(record):
+        return all(record.get(field) == value for field, value in where.items())
+
+    return line_test, record_test
+
+
+def read_catalog(path, fields=None, where=None):
+    """Yield the records of a catalog one at a time, filtered by `where` and projected to `fields`."""
+    line_test, record_test = _matcher(where)
+    torn = (EOFError, zstandard.ZstdError) if codec(path) == "zstd" else (EOFError, zlib.error, gzip.BadGzipFile)
+    with open_catalog(path, "rt") as f:
+        while True:
+            try:
+                line = f.readline()
+            except torn:
+                return  # Torn write at the end of the file
+            if not line:
+                return
+            if not line.strip() or (line_test and not line_test(line)):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return  # Torn last line
+            if record_test and not record_test(record):
+                continue
+            yield record if fields is None else {field: record.get(field) for field in fields}
+
+
+def count_records(path, where=None):
+    return sum(1 for _ in read_catalog(path, fields=(), where=where))
+
+
+def _unfinished_member(path, chunk_size=1 << 20):
+    """Offset of a gzip member the file ends in the middle of (or that is corrupt), or None."""
+    start = fed = 0  # Start of the current member; bytes of it fed to the decompressor
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return start if fed else None
+            while chunk:
+                try:
+                    decompressor.decompress(chunk)
+                except zlib.error:
+                    return start
+                if not decompressor.eof:
+                    fed += len(chunk)
+                    break
+                start += fed + len(chunk) - len(decompressor.unused_data)
+                chunk, fed = decompressor.unused_data, 0
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+
+def repair_tail(path, chunk_size=1 << 20):
+    """Close off a gzip catalog a crashed writer left open; returns how many of its last records were kept.
+
+    The complete lines of the unfinished member are rewritten as a finished
+    member; only a partly written last line is lost.
+    """
+    if codec(path) != "gzip" or not os.path.exists(path):
+        return 0
+    start = _unfinished_member(path, chunk_size)
+    if start is None:
+        return 0
+    temp_path = f"{path}.repair"
+    kept = 0
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    with open(path, "rb") as source, gzip.open(temp_path, "wb") as target:
+        source.seek(start)
+        text = b""
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            try:
+                text += decompressor.decompress(chunk)
+            except zlib.error:
+                break
+            complete, _, text = text.rpartition(b"\n")
+            if complete:
+                target.write(complete + b"\n")
+                kept += complete.count(b"\n") + 1
+    with open(path, "r+b") as f:
+        f.truncate(start)
+        f.seek(start)
+        with open(temp_path, "rb") as repaired:
+            while True:
+                chunk = repaired.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+    os.remove(temp_path)
+    return kept
+
+
+class CatalogWriter:
+    """Appends records to a catalog file; thread-safe, keeps the compressor open between appends.
+
+    With sync=True every record is flushed as it is appended, so a crash loses
+    at most a partly written line (at some cost in compression).
+    """
+
+    def __init__(self, path, level=None, sync=False):
+        self.path = path
+        self.level = level
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                repair_tail(self.path)
+                self._file = open_catalog(self.path, "at", self.level)
+            self._file.write(line)
+            if self.sync:
+                self._file.flush()
+
+    def flush(self):
+        """Make everything appended so far readable (ends the current compressed block)."""
+        with self._lock:
+            if self._file:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def write_catalog(records, path, level=None):
+    """Write records to a new catalog file, replacing it atomically; returns how many were written."""
+    temp_path = f"{path}.tmp{os.path.splitext(path)[1]}"
+    writer = CatalogWriter(temp_path, level)
+    count = 0
+    try:
+        for record in records:
+            writer.append(record)
+            count += 1
+    finally:
+        writer.close()
+    os.replace(temp_path, path)
+    return count
+
+
+def read_records(path, key):
+    """Records of a JSON store (ignoring torn trailing writes), JSON Lines file, compressed catalog or packed archive."""
+    if path.endswith((".gz", ".zst")):
+        if os.path.exists(f"{path}.idx"):
+            from common.packed import PackedArchive
+            return list(PackedArchive(path).records())
+        return list(read_catalog(path))
+    with open(path, "r", encoding="utf-8") as f:
+        if key is None:
+            return [json.loads(line) for line in f if line.strip()]
+        data, _ = json.JSONDecoder().raw_decode(f.read().lstrip())
+    return data.get(key, [])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert JSON stores to compressed catalogs and read them")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="write a JSON store as a compressed catalog")
+    convert.add_argument("source", help="JSON store, e.g. natrue_product_details.json")
+    convert.add_argument("output", help="catalog file (.jsonl.gz or .jsonl.zst)")
+    convert.add_argument("--key", help="top-level key of the JSON store (default: its only key)")
+    read = commands.add_parser("read", help="print records of a catalog as JSON Lines")
+    read.add_argument("catalog")
+    read.add_argument("--fields", nargs="+", help="fields to keep")
+    read.add_argument("--where", nargs="+", default=[], metavar="FIELD=VALUE", help="keep records with these values")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        key = args.key
+        if key is None:
+            with open(args.source, "r", encoding="utf-8") as f:
+                data, _ = json.JSONDecoder().raw_decode(f.read().lstrip())
+            key = next(iter(data))
+        count = write_catalog(read_records(args.source, key), args.output)
+        print(f"Wrote {count} records to {args.output} ({os.path.getsize(args.output)} bytes, "
+              f"from {os.path.getsize(args.source)})")
+        return count
+
+    where = dict(condition.split("=", 1) for condition in args.where) or None
+    count = 0
+    for record in read_catalog(args.catalog, fields=args.fields, where=where):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""One command line over all scrapers, exports and benchmarks.
+
+    python -m common.cli products --pages 1-20 --workers 4 --progress
+    python -m common.cli brands --pages 3-5 --sinks json
+    python -m common.cli products --backend replay --pages 1-2
+    python -m common.cli raw-materials --headless
+    python -m common.cli newdirections --workers 3 --no-headless
+    python -m common.cli export products --format csv -o products.csv
+    python -m common.cli bench scrapers --pipeline products --pages 3
+
+The scraping options (--workers, --pages, --backend, --sinks, --data-dir and
+the per-scraper flags) can also come from a JSON file given with --config,
+e.g. {"workers": 4, "pages": "1-50", "sinks": ["json"]}; command-line values win.
+"""
+
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from common.catalog import read_records
+from common.scripts import SCRIPT_PATHS, load_script
+
+SCRIPT_MODULES = {"products": "Products", "brands": "brand", "raw-materials": "raw_materials", "newdirections": "INCI1"}
+
+# pipeline -> (constant holding the last page, item kind served by the replay backend)
+NATRUE_PIPELINES = {
+    "products": ("TOTAL_PAGES", "product"),
+    "brands": ("LAST_PAGE", "brand"),
+}
+
+# export source -> (file in the data directory, top-level key of the JSON file or None for JSON Lines)
+EXPORT_SOURCES = {
+    "products": ("natrue_product_details.json", "products"),
+    "brands": ("natrue_brand_details.json", "brands"),
+    "raw-materials": ("raw_materials.jsonl", None),
+    "products-catalog": ("natrue_product_details.jsonl.gz", None),
+    "brands-catalog": ("natrue_brand_details.jsonl.gz", None),
+    "newdirections": ("newdirections_products.jsonl.gz", None),
+}
+
+
+_scripts = {}
+
+
+def script(command):
+    """The loaded scraper module for a subcommand (each script is loaded once)."""
+    if command not in _scripts:
+        _scripts[command] = load_script(SCRIPT_PATHS[command], SCRIPT_MODULES[command])
+    return _scripts[command]
+
+
+def page_range(text):
+    """Parse "5", "3-10" or "3-" into (first, last); last is None for open ranges."""
+    first, _, last = text.partition("-")
+    try:
+        first = int(first)
+        last = int(last) if last else (None if _ else first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid page range {text!r} (expected N, N-M or N-)")
+    if first < 1 or (last is not None and last < first):
+        raise argparse.ArgumentTypeError(f"invalid page range {text!r}")
+    return first, last
+
+
+@contextmanager
+def data_dir(path):
+    """Run inside the directory the scrapers read their state from and write their output to."""
+    if not path:
+        yield
+        return
+    os.makedirs(path, exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextmanager
+def replay_backend(kind):
+    """Serve the already scraped records locally and yield the list-page URL template."""
+    from benchmarks.replay_server import ReplayCatalog, ReplayServer
+    with ReplayServer(ReplayCatalog.from_scraped_files()) as server:
+        yield server.url_template(kind)
+
+
+def run_natrue(args):
+    """products / brands: apply the shared options to the script's constants, then run it."""
+    last_page_constant, kind = NATRUE_PIPELINES[args.command]
+    module = script(args.command)
+    if args.pages:
+        first, last = args.pages
+        module.FIRST_PAGE = first
+        if last:
+            setattr(module, last_page_constant, last)
+    if args.workers:
+        module.MAX_WORKERS = args.workers
+    if args.sinks:
+        module.SINKS = tuple(args.sinks)
+
+    with data_dir(args.data_dir):
+        if args.backend == "replay":
+            with replay_backend(kind) as url_template:
+                module.PAGE_URL_TEMPLATE = url_template
+                module.BASE_URL = url_template.format(1)
+                module.configure_run(args)
+                module.run()
+        else:
+            module.configure_run(args)
+            module.run()
+
+
+def run_raw_materials(args):
+    module = script("raw-materials")
+    with data_dir(args.data_dir):
+        module.run(args)
+
+
+def run_newdirections(args):
+    module = script("newdirections")
+    config = {}
+    if args.headless is not None:
+        config["headless"] = args.headless
+    if args.workers:
+        config["max_workers"] = args.workers
+    if args.output_format:
+        config["output_format"] = args.output_format
+    if args.export_txt:
+        config["export_txt"] = True
+    with data_dir(args.data_dir):
+        module.run(args, **config)
+
+
+def run_export(args):
+    filename, key = EXPORT_SOURCES[args.source]
+    output = os.path.abspath(args.output or f"{os.path.splitext(filename)[0]}.{args.format}")
+    with data_dir(args.data_dir):
+        records = read_records(filename, key)
+
+    if args.format == "jsonl":
+        with open(output, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        import pandas as pd
+        df = pd.DataFrame(records)
+        if args.format == "csv":
+            df.to_csv(output, index=False)
+        else:
+            df.to_excel(output, index=False)
+    print(f"Exported {len(records)} {args.source} records to {output}")
+    return output
+
+
+def run_bench(args):
+    if args.suite == "scrapers":
+        from benchmarks.bench_scrapers import main as bench_main
+    else:
+        from benchmarks.bench_persistence import main as bench_main
+    return bench_main(args.bench_args)
+
+
+def build_parser():
+    """The top-level parser and its subcommand parsers (by name)."""
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument("--config", help="JSON file with defaults for these options")
+    shared.add_argument("--data-dir", help="directory the scraper reads its state from and writes to "
+                                           "(default: the current directory)")
+
+    scraping = argparse.ArgumentParser(add_help=False, parents=[shared])
+    scraping.add_argument("--workers", type=int, help="parallel browsers")
+    scraping.add_argument("--pages", type=page_range, help="page range to scrape: N, N-M or N-")
+    scraping.add_argument("--backend", choices=["live", "replay"], default="live",
+                          help="live site, or a local replay of the already scraped records")
+    scraping.add_argument("--sinks", nargs="+", choices=["json", "excel", "catalog"],
+                          help="where scraped records are saved")
+
+    parser = argparse.ArgumentParser(prog="python -m common.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    subparsers = {}
+
+    for name in NATRUE_PIPELINES:
+        sub = commands.add_parser(name, parents=[scraping], help=f"scrape NATRUE certified {name}")
+        script(name).add_run_arguments(sub)
+        sub.set_defaults(handler=run_natrue)
+        subparsers[name] = sub
+
+    sub = commands.add_parser("raw-materials", parents=[shared], help="export the NATRUE raw materials list")
+    script("raw-materials").add_run_arguments(sub)
+    sub.set_defaults(handler=run_raw_materials)
+    subparsers["raw-materials"] = sub
+
+    # The New Directions category pages are followed to the end, so there is no page range or backend
+    sub = commands.add_parser("newdirections", parents=[shared], help="scrape New Directions Aromatics raw materials")
+    sub.add_argument("--workers", type=int, help="parallel browsers")
+    sub.add_argument("--headless", action=argparse.BooleanOptionalAction,
+                     help="run the browsers without windows (default; --no-headless shows them)")
+    sub.add_argument("--output-format", choices=["packed", "txt"],
+                     help="one indexed archive (default) or one text file per product")
+    sub.add_argument("--export-txt", action="store_true", help="also write the .txt view of the archive")
+    script("newdirections").add_run_arguments(sub)
+    sub.set_defaults(handler=run_newdirections)
+    subparsers["newdirections"] = sub
+
+    sub = commands.add_parser("export", parents=[shared], help="export a scraped store as CSV, Excel or JSON Lines")
+    sub.add_argument("source", choices=sorted(EXPORT_SOURCES))
+    sub.add_argument("--format", choices=["csv", "xlsx", "jsonl"], default="csv")
+    sub.add_argument("-o", "--output", help="file to write (default: named after the store)")
+    sub.set_defaults(handler=run_export)
+    subparsers["export"] = sub
+
+    sub = commands.add_parser("bench", help="run a benchmark suite (options are passed through)")
+    sub.add_argument("suite", choices=["scrapers", "persistence"])
+    sub.add_argument("bench_args", nargs=argparse.REMAINDER, help="options of the benchmark itself")
+    sub.set_defaults(handler=run_bench)
+    subparsers["bench"] = sub
+
+    return parser, subparsers
+
+
+def apply_config_file(subparsers, argv):
+    """Use the values of a --config JSON file as defaults of the chosen subcommand."""
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("command", nargs="?")
+    pre.add_argument("--config")
+    known, _ = pre.parse_known_args(argv)
+    if not known.config or known.command not in subparsers:
+        return
+    with open(known.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if isinstance(config.get("pages"), str):
+        config["pages"] = page_range(config["pages"])
+    elif isinstance(config.get("pages"), list):
+        config["pages"] = tuple(config["pages"])
+    subparsers[known.command].set_defaults(**{key.replace("-", "_"): value for key, value in config.items()})
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser, subparsers = build_parser()
+    apply_config_file(subparsers, argv)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Composite-key deduplication and MinHash near-duplicate detection for scraped records."""
+
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+
+from common.lazy import lazy_import
+
+np = lazy_import("numpy")  # Only MinHash needs it; key-based dedupe stays import-light
+
+PRODUCT_KEY_FIELDS = ("name", "brand", "manufacturer")
+NEAR_DUPLICATE_FIELDS = ("name", "ingredients")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_text(value):
+    """Case-fold and collapse whitespace so cosmetic differences do not split keys."""
+    if value is None or value != value:  # None or NaN from pandas
+        return ""
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return " ".join(text.split())
+
+
+def record_key(record, fields=PRODUCT_KEY_FIELDS):
+    """Return a stable hash of the normalized key fields of a record."""
+    joined = "\x1f".join(normalize_text(record.get(field)) for field in fields)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def frame_keys(df, fields=PRODUCT_KEY_FIELDS):
+    """Return the composite key of every row of a DataFrame, in row order."""
+    columns = [field for field in fields if field in df.columns]
+    return [record_key(row, fields) for row in df[columns].to_dict("records")]
+
+
+def dedupe_records(records, fields=PRODUCT_KEY_FIELDS, seen=None):
+    """Yield records whose composite key has not been seen yet (first one wins)."""
+    seen = set() if seen is None else seen
+    for record in records:
+        key = record_key(record, fields)
+        if key not in seen:
+            seen.add(key)
+            yield record
+
+
+def shingles(text, size=3):
+    """Return the set of word n-grams (or the words for short texts) of a text."""
+    words = _WORD_RE.findall(normalize_text(text))
+    if len(words) <= size:
+        return set(words)
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed set of random permutations."""
+
+    def __init__(self, num_perm=64, seed=1):
+        self.num_perm = num_perm
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens):
+        """Return the MinHash signature of a set of string tokens."""
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=4).digest(), "little") for t in tokens),
+            dtype=np.uint64,
+            count=len(tokens),
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % np.uint64(_MERSENNE_PRIME) & np.uint64(_MAX_HASH)
+        return permuted.min(axis=1)
+
+
+def record_tokens(record, fields=NEAR_DUPLICATE_FIELDS):
+    """Return the shingles of the given fields, tagged by field name."""
+    tokens = set()
+    for field in fields:
+        tokens.update(f"{field}:{shingle}" for shingle in shingles(record.get(field)))
+    return tokens
+
+
+def find_near_duplicates(records, threshold=0.8, bands=16, rows=4, fields=NEAR_DUPLICATE_FIELDS, seed=1):
+    """Return (i, j, similarity) for record pairs whose estimated Jaccard is >= threshold.
+
+    Signatures are split into bands and only records sharing a band bucket are
+    compared, so the cost grows with the number of records, not their pairs.
+    """
+    hasher = MinHasher(num_perm=bands * rows, seed=seed)
+    signatures = [hasher.signature(record_tokens(record, fields)) for record in records]
+    empty = [not any(record.get(field) for field in fields) for record in records]
+
+    candidates = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if not empty[index]:
+                buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(index)
+        for members in buckets.values():
+            for offset, i in enumerate(members):
+                for j in members[offset + 1:]:
+                    candidates.add((i, j))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        similarity = float(np.mean(signatures[i] == signatures[j]))
+        if similarity >= threshold:
+            pairs.append((i, j, similarity))
+    return pairs
+
+
+def main(argv=None):
+    """Report exact and near duplicates in a products JSON file."""
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else "natrue_product_details.json"
+    with open(path, "r", encoding="utf-8") as f:
+        products = json.load(f).get("products", [])
+
+    unique = list(dedupe_records(products))
+    print(f"{len(products)} records, {len(products) - len(unique)} exact duplicates by name+brand+manufacturer")
+
+    for i, j, similarity in find_near_duplicates(unique):
+        print(f"{similarity:.2f}\t{unique[i].get('name')} ({unique[i].get('brand')})"
+              f"\t{unique[j].get('name')} ({unique[j].get('brand')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Resolve the chromedriver binary once and share it between threads and processes.
+
+ChromeDriverManager().install() looks up the matching driver version online on
+every call. Here the resolved path is kept in a small JSON cache file, guarded
+by a file lock so that parallel scrapers do the lookup only once, and reused
+until it expires or the binary disappears. In offline mode no lookup is made.
+
+Environment:
+    CHROMEDRIVER            use this driver binary, skip everything else
+    SCRAPER_DRIVER_OFFLINE  1/true/yes: never go online, use the cache or PATH
+    SCRAPER_DRIVER_CACHE    cache file location
+
+    python -m common.driver_cache [--refresh]   # resolve (and cache) now
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "natrue-scrapers", "chromedriver.json")
+MAX_AGE = 7 * 24 * 3600  # Re-check for a newer driver once a week
+
+_resolved = {}  # cache file -> driver path, so threads of one process skip even the file read
+_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` across processes (blocks until it is free)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_cache(cache_file):
+    """The cached entry ({"path", "resolved_at"}) or None."""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        return entry if isinstance(entry, dict) and entry.get("path") else None
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache(cache_file, path):
+    os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+    temp_path = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "resolved_at": time.time()}, f, indent=4)
+    os.replace(temp_path, cache_file)
+
+
+def _usable(entry, max_age):
+    if not entry or not os.path.isfile(entry["path"]):
+        return False
+    return max_age is None or time.time() - entry.get("resolved_at", 0) < max_age
+
+
+def _install():
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+def offline_mode():
+    return os.environ.get("SCRAPER_DRIVER_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def resolve_chromedriver(offline=None, cache_file=None, max_age=MAX_AGE, refresh=False, install=None):
+    """Return the chromedriver path, going online only if no fresh cached driver exists."""
+    explicit = os.environ.get("CHROMEDRIVER")
+    if explicit:
+        return explicit
+    cache_file = cache_file or os.environ.get("SCRAPER_DRIVER_CACHE") or DEFAULT_CACHE_FILE
+    with _lock:
+        path = _resolved.get(cache_file)
+        if path and not refresh and os.path.isfile(path):
+            return path
+        path = _resolve(offline_mode() if offline is None else offline, cache_file, max_age, refresh, install or _install)
+        _resolved[cache_file] = path
+        return path
+
+
+def _resolve(offline, cache_file, max_age, refresh, install):
+    entry = read_cache(cache_file)
+    # Offline, an expired entry is still better than nothing
+    if not refresh and _usable(entry, None if offline else max_age):
+        return entry["path"]
+    if offline:
+        path = shutil.which("chromedriver")
+        if not path:
+            raise RuntimeError("Offline mode: no cached chromedriver and none on PATH "
+                               "(run once online or set CHROMEDRIVER)")
+        return path
+
+    with file_lock(f"{cache_file}.lock"):
+        # Another process may have resolved the driver while we waited for the lock
+        entry = read_cache(cache_file)
+        if not refresh and _usable(entry, max_age):
+            return entry["path"]
+        try:
+            path = install()
+        except Exception:
+            # Lookup failed (e.g. no network): fall back to the stale cached driver or one on PATH
+            fallback = entry["path"] if _usable(entry, None) else shutil.which("chromedriver")
+            if fallback:
+                return fallback
+            raise
+        write_cache(cache_file, path)
+        return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve and cache the chromedriver binary")
+    parser.add_argument("--refresh", action="store_true", help="look up the driver again even if cached")
+    parser.add_argument("--offline", action="store_true", help="never go online")
+    args = parser.parse_args(argv)
+    path = resolve_chromedriver(offline=args.offline or None, refresh=args.refresh)
+    print(path)
+    return path
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1025 @@
+"""One scraping engine for the NATRUE list-and-dialog pages.
+
+Products and brands are both a paginated list of names where clicking a name
+opens a dialog with the details; they differ only in what an EntitySpec says
+(which elements to wait for, how a dialog becomes a record, how records are
+keyed and which columns are stored). ListDialogScraper holds everything else:
+the click/parse/close loop, JSON and temp-file Excel persistence, the merge,
+the fetch/parse/write pipeline (common/pipeline.py) and the timing, progress,
+profile and memory hooks, so a speed-up made here applies to every scraper.
+Specs without a dialog (the raw materials table) are read straight from the
+list page in one parse.
+
+Settings are looked up on every use in a mapping, normally the script's
+globals(), so options applied to the module by the command line or a
+benchmark (PAGE_URL_TEMPLATE, SINKS, MAX_WORKERS, ...) take effect:
+
+    JSON_FILE, EXCEL_FILE, TEMP_DIR, PROCESSED_FILE    stores
+    CSV_FILE                                           optional CSV mirror of the Excel file
+    CATALOG_FILE                                       compressed JSON Lines store of the "catalog" sink
+                                                       (see common/catalog.py)
+    PAGE_URL_TEMPLATE, SINKS, MAX_WORKERS, PAGE_PAUSE  run options
+    PARSE_WORKERS, PARSE_POOL, QUEUE_SIZE              parse stage and queue sizes (see run_pipeline)
+    MERGE_BATCH_SIZE                                   temp files merged at once (None = all)
+    MANIFEST_FILE, RESUME, RESUME_SAMPLE               page resume manifest (see common/manifest.py)
+    RETRY_FILE, RETRY_ATTEMPTS, RETRY_BASE_DELAY       failed-entry retry queue (see common/retry_queue.py)
+    TIMER, PROFILER, PROGRESS, MEMORY                  instrumentation (disabled ones if missing)
+    LOG_FILE, TIMING_REPORT_FILE, PROMETHEUS_FILE,
+    MEMORY_REPORT_FILE                                 run outputs
+"""
+
+import concurrent.futures
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import threading
+import time
+
+from common.catalog import CatalogWriter, read_catalog
+from common.dedupe import frame_keys, record_key
+from common.lazy import lazy_import
+from common.logging_config import configure_logging, item_extra
+from common.manifest import PageManifest
+from common.pipeline import Pipeline
+from common.retry_queue import RetryQueue
+from common.memory import MemoryBudget, add_memory_arguments
+from common.profiling import ScopeProfiler, add_profile_arguments
+from common.progress import ProgressTracker, add_progress_arguments, configure_from_args
+from common.timing import StageTimer
+
+webdriver = lazy_import("selenium.webdriver")
+Options = lazy_import("selenium.webdriver.chrome.options", "Options")
+By = lazy_import("selenium.webdriver.common.by", "By")
+WebDriverWait = lazy_import("selenium.webdriver.support.ui", "WebDriverWait")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+Keys = lazy_import("selenium.webdriver.common.keys", "Keys")
+BeautifulSoup = lazy_import("bs4", "BeautifulSoup")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+CLOSE_BUTTON = ".el-dialog__close"
+ITEM_RETRIES = 1  # In-place retries of a failed entry before moving on
+RELOAD_AFTER_FAILURES = 3  # Consecutive failures on a page before it is reloaded
+MEMORY_MERGE_BATCH_SIZE = 50  # Temp files merged at once under --memory-budget
+
+
+def parse_dialog(extract, html, name, page_number):
+    """Parse one dialog's HTML into a record with a spec's extractor."""
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        return extract(soup, name, page_number)
+    finally:
+        # Release the parse tree now instead of when the next entry replaces it
+        soup.decompose()
+
+
+def _disabled(element):
+    """Whether a pager button is disabled (attribute, aria or class, as UI kits differ)."""
+    return bool(element.get_attribute("disabled")) or element.get_attribute("aria-disabled") == "true" \
+        or "disabled" in (element.get_attribute("class") or "").split()
+
+
+_parse_extract = None  # The extractor of a forked parse worker
+
+
+def _init_parse_worker(extract, log_queue):
+    global _parse_extract
+    _parse_extract = extract
+    # Log records go back to the parent, whose handlers write them
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+class _ForwardToLogger(logging.Handler):
+    """Hands a parse worker's log record to the parent's logger of the same name."""
+
+    def handle(self, record):
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+def _parse_in_worker(html, name, page_number):
+    return parse_dialog(_parse_extract, html, name, page_number)
+
+
+class EntitySpec:
+    """What the engine needs to know about one kind of NATRUE entry.
+
+    For dialog specs, extract(soup, name, page_number) turns the dialog into one
+    record. Without a dialog_selector, extract(soup, page_number) returns all
+    records of a list page; a next_selector names the pager button that shows
+    the table's next page when the page is not in the URL.
+    """
+
+    def __init__(self, name, item, list_selector, extract, dialog_selector=None,
+                 key_fields=("name",), columns=(), sheet_name=None, next_selector=None):
+        self.name = name  # Plural; also the top-level key of the JSON store
+        self.item = item  # Singular; used in log messages and as the per-item timing stage
+        self.list_selector = list_selector
+        self.dialog_selector = dialog_selector
+        self.extract = extract
+        self.next_selector = next_selector
+        self.key_fields = tuple(key_fields)
+        self.columns = list(columns)
+        self.sheet_name = sheet_name or f"{item.title()} Details"
+
+    @property
+    def processed_key(self):
+        return f"processed_{self.name}"
+
+
+def chrome_options():
+    """Headless Chrome without images or extensions, returning as soon as the DOM is ready."""
+    options = Options()
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-notifications")
+    options.add_argument("--blink-settings=imagesEnabled=false")  # Disable images
+    options.add_argument("--headless")  # Run in headless mode for speed
+    options.page_load_strategy = 'eager'  # Load DOM without waiting for resources
+    return options
+
+
+def add_run_arguments(parser):
+    """Add the run options shared by the engine-based scrapers (and the unified CLI)."""
+    add_profile_arguments(parser)
+    add_progress_arguments(parser)
+    add_memory_arguments(parser)
+    parser.add_argument("--no-resume", action="store_true",
+                        help="load every page, even those the resume manifest records as complete")
+    parser.add_argument("--verify-sample", type=float, metavar="FRACTION",
+                        help="share of completed pages re-scraped on resume to catch new entries")
+    parser.add_argument("--parse-workers", type=int, metavar="N",
+                        help="processes parsing dialogs while the browsers fetch more")
+
+
+class ListDialogScraper:
+    """Scrapes and stores the entries described by an EntitySpec."""
+
+    def __init__(self, spec, settings, new_driver):
+        self.spec = spec
+        self.settings = settings
+        self.new_driver = new_driver
+        # Stand-ins for instrumentation a script does not set up itself
+        self._defaults = {
+            "TIMER": StageTimer(spec.name),
+            "PROFILER": ScopeProfiler(spec.name),
+            "PROGRESS": ProgressTracker(spec.name),
+            "MEMORY": MemoryBudget(),
+            "SINKS": ("json", "excel"),
+            "MAX_WORKERS": 1,
+            "PARSE_WORKERS": 1,
+            "PARSE_POOL": "process",
+            "QUEUE_SIZE": None,
+            "RESUME": True,
+            "RESUME_SAMPLE": 0.0,
+            "RETRY_ATTEMPTS": 4,
+            "RETRY_BASE_DELAY": 5.0,
+        }
+        self._manifest = None
+        self._retry_queue = None
+        self._catalog = None
+        self._catalog_keys = set()
+        self._catalog_lock = threading.Lock()
+        self._parse_pool = None
+        self._parse_log_listener = None
+
+    def setting(self, name):
+        if name in self.settings:
+            return self.settings[name]
+        return self._defaults.get(name)
+
+    def page_manifest(self):
+        """The resume manifest at MANIFEST_FILE (kept in memory only if that is not set)."""
+        path = self.setting("MANIFEST_FILE")
+        if self._manifest is None or self._manifest.path != path:
+            self._manifest = PageManifest(path)
+        return self._manifest
+
+    def retry_queue(self):
+        """The queue of failed entries at RETRY_FILE (kept in memory only if that is not set)."""
+        path = self.setting("RETRY_FILE")
+        if self._retry_queue is None or self._retry_queue.path != path:
+            self._retry_queue = RetryQueue(path, max_attempts=self.setting("RETRY_ATTEMPTS"),
+                                           base_delay=self.setting("RETRY_BASE_DELAY"))
+        return self._retry_queue
+
+    # Stores
+
+    def initialize_files(self):
+        """Create the JSON store, Excel (and CSV) file, temp directory and processed list if missing."""
+        spec = self.spec
+        json_file, excel_file, csv_file = self.setting("JSON_FILE"), self.setting("EXCEL_FILE"), self.setting("CSV_FILE")
+        if not os.path.exists(json_file):
+            with open(json_file, "w", encoding="utf-8") as f:
+                json.dump({spec.name: []}, f, indent=4)
+
+        if not os.path.exists(excel_file):
+            pd.DataFrame(columns=spec.columns).to_excel(excel_file, sheet_name=spec.sheet_name, index=False)
+
+        if csv_file and not os.path.exists(csv_file):
+            pd.DataFrame(columns=spec.columns).to_csv(csv_file, index=False)
+
+        os.makedirs(self.setting("TEMP_DIR"), exist_ok=True)
+
+        if not os.path.exists(self.setting("PROCESSED_FILE")):
+            with open(self.setting("PROCESSED_FILE"), "w", encoding="utf-8") as f:
+                json.dump({spec.processed_key: []}, f, indent=4)
+
+        logger.info("Files initialized successfully.")
+
+    def _load_processed(self):
+        """The processed names (first listings) and the ranks of later same-name listings stored."""
+        path = self.setting("PROCESSED_FILE")
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                return data.get(self.spec.processed_key, []), data.get(f"{self.spec.processed_key}_repeats", {})
+            return [], {}
+        except Exception as e:
+            logger.error(f"Error loading processed {self.spec.name}: {e}")
+            return [], {}
+
+    def processed(self):
+        """Names of the entries already scraped in earlier runs (at their first listing)."""
+        return set(self._load_processed()[0])
+
+    def processed_listings(self):
+        """(name, rank) of every stored list entry; see PageManifest.ranks().
+
+        A name listed more than once (the same product name under different brands)
+        is only done once each of its listings is stored.
+        """
+        names, repeats = self._load_processed()
+        listings = {(name, 1) for name in names}
+        listings.update((name, rank) for name, ranks in repeats.items() for rank in ranks)
+        return listings
+
+    def new_entries(self, page_number, names, listings=None):
+        """Indexes of the entries of a list page that are not stored yet, and the rank of every entry."""
+        ranks = self.page_manifest().ranks(page_number, names)
+        if listings is None:
+            listings = self.processed_listings()
+        return [i for i, name in enumerate(names) if (name, ranks[i]) not in listings], ranks
+
+    def mark_processed(self, name, rank=1):
+        try:
+            names, repeats = self._load_processed()
+            if rank == 1:
+                # If already processed, just return
+                if name in names:
+                    return
+                names.append(name)
+            else:
+                if rank in repeats.get(name, []):
+                    return
+                repeats.setdefault(name, []).append(rank)
+
+            data = {self.spec.processed_key: names}
+            if repeats:
+                data[f"{self.spec.processed_key}_repeats"] = repeats
+            with open(self.setting("PROCESSED_FILE"), "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+
+            logger.info(f"Added '{name}' to processed {self.spec.name} list", extra=item_extra(item=name, stage="persist_processed"))
+        except Exception as e:
+            logger.error(f"Error updating processed {self.spec.name}: {e}")
+
+    def append_to_json(self, record):
+        """Add a record to the JSON store unless one with the same key fields is there."""
+        spec = self.spec
+        json_file = self.setting("JSON_FILE")
+        extra = item_extra(record.get("page_number"), record["name"], "persist_json")
+        try:
+            max_retries = 5
+            retries = 0
+
+            while retries < max_retries:
+                try:
+                    # Read existing data
+                    with open(json_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+
+                    key = record_key(record, spec.key_fields)
+                    if any(record_key(existing, spec.key_fields) == key for existing in data[spec.name]):
+                        logger.info(f"Skipped duplicate {spec.item} '{record['name']}' in JSON file", extra=extra)
+                    else:
+                        data[spec.name].append(record)
+                        with open(json_file, "w", encoding="utf-8") as f:
+                            json.dump(data, f, indent=4, ensure_ascii=False)
+                        logger.info(f"Appended {spec.item} '{record['name']}' to JSON file", extra=extra)
+                    break
+                except (json.JSONDecodeError, FileNotFoundError) as e:
+                    retries += 1
+                    logger.warning(f"JSON retry {retries}: {e}")
+                    time.sleep(0.5)  # Short wait before retrying
+
+        except Exception as e:
+            logger.error(f"Error appending to JSON: {e}")
+
+    def append_to_catalog(self, record):
+        """Append a record to the compressed catalog unless one with the same key fields is there."""
+        spec = self.spec
+        path = self.setting("CATALOG_FILE")
+        extra = item_extra(record.get("page_number"), record["name"], "persist_catalog")
+        try:
+            key = record_key(record, spec.key_fields)
+            with self._catalog_lock:
+                if self._catalog is None or self._catalog.path != path:
+                    # Only the key fields of the stored records are read, one record at a time
+                    self._catalog_keys = {
+                        record_key(existing, spec.key_fields)
+                        for existing in read_catalog(path, fields=spec.key_fields)
+                    } if os.path.exists(path) else set()
+                    # Flushed per record: a crash must not lose records already marked processed
+                    self._catalog = CatalogWriter(path, sync=True)
+                if key in self._catalog_keys:
+                    logger.info(f"Skipped duplicate {spec.item} '{record['name']}' in catalog", extra=extra)
+                    return
+                self._catalog_keys.add(key)
+                self._catalog.append(record)
+            logger.info(f"Appended {spec.item} '{record['name']}' to catalog", extra=extra)
+        except Exception as e:
+            logger.error(f"Error appending to catalog: {e}")
+
+    def close_catalog(self):
+        with self._catalog_lock:
+            if self._catalog:
+                self._catalog.close()
+                self._catalog = None
+
+    def exists_in_excel(self, record, fields=None):
+        """Whether the Excel file has a row with the record's key fields (or the given fields)."""
+        fields = fields or self.spec.key_fields
+        excel_file = self.setting("EXCEL_FILE")
+        try:
+            if os.path.exists(excel_file):
+                df = pd.read_excel(excel_file)
+                return record_key(record, fields) in set(frame_keys(df, fields))
+            return False
+        except Exception as e:
+            logger.error(f"Error checking Excel for {self.spec.item} '{record.get('name')}': {e}")
+            return False
+
+    def append_to_excel(self, record):
+        """Queue a record for the Excel file as a small temp CSV (merged later in one write)."""
+        spec = self.spec
+        extra = item_extra(record.get("page_number"), record["name"], "persist_excel")
+        try:
+            if self.exists_in_excel(record):
+                logger.info(f"Skipped duplicate {spec.item} '{record['name']}' - already in Excel", extra=extra)
+                return
+
+            # Safe, unique temp filename from the name, key and timestamp
+            safe_name = ''.join(c if c.isalnum() else '_' for c in record['name'])[:50]
+            key = record_key(record, spec.key_fields)[:8]
+            temp_filename = os.path.join(self.setting("TEMP_DIR"), f"temp_{safe_name}_{key}_{int(time.time())}.csv")
+
+            pd.DataFrame([record]).to_csv(temp_filename, index=False)
+            logger.info(f"Saved {spec.item} '{record['name']}' to temp file {temp_filename}", extra=extra)
+        except Exception as e:
+            logger.error(f"Error saving temp data: {e}")
+
+    def merge_temp_files(self, max_files=None):
+        """Merge temp files (at most max_files of them) into the Excel file; returns how many were merged."""
+        spec = self.spec
+        temp_dir, excel_file = self.setting("TEMP_DIR"), self.setting("EXCEL_FILE")
+        merged = 0
+        try:
+            if not os.path.exists(temp_dir):
+                logger.warning("Temp directory not found")
+                return 0
+
+            temp_files = [os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if f.startswith("temp_") and f.endswith(".csv")]
+            if max_files:
+                temp_files = sorted(temp_files, key=os.path.getmtime)[:max_files]
+
+            if not temp_files:
+                logger.warning("No temp files found to merge")
+                return 0
+
+            logger.info(f"Found {len(temp_files)} temp files to merge")
+            existing_df = self._read_existing(excel_file, pd.read_excel, "Excel")
+
+            # Load and concatenate all temp files
+            dfs = []
+            successful_files = []
+            for temp_file in temp_files:
+                try:
+                    df = pd.read_csv(temp_file)
+                    if not df.empty:
+                        dfs.append(df)
+                        successful_files.append(temp_file)
+                    else:
+                        logger.warning(f"Empty temp file: {temp_file}")
+                except Exception as e:
+                    logger.error(f"Error processing temp file {temp_file}: {e}")
+
+            if not dfs:
+                logger.warning("No new data to add to Excel")
+                return 0
+
+            new_df = pd.concat(dfs, ignore_index=True)
+            dfs.clear()
+            new_keys = pd.Series(frame_keys(new_df, spec.key_fields), index=new_df.index)
+            new_df = new_df[~new_keys.duplicated()]
+
+            saved = self._merge_into(existing_df, new_df, "Excel",
+                                     lambda df: df.to_excel(excel_file, sheet_name=spec.sheet_name, index=False))
+            if not saved:
+                # Keep the temp files for the next merge; try saving as CSV as fallback
+                try:
+                    csv_backup = excel_file.replace('.xlsx', '.csv')
+                    pd.concat([existing_df, new_df], ignore_index=True).to_csv(csv_backup, index=False)
+                    logger.info(f"Saved backup to CSV: {csv_backup}")
+                except Exception as csv_e:
+                    logger.error(f"Even CSV backup failed: {csv_e}")
+                return 0
+
+            csv_file = self.setting("CSV_FILE")
+            if csv_file:
+                existing_csv_df = self._read_existing(csv_file, pd.read_csv, "CSV")
+                self._merge_into(existing_csv_df, new_df, "CSV", lambda df: df.to_csv(csv_file, index=False))
+
+            # Remove merged temp files
+            for temp_file in successful_files:
+                try:
+                    os.remove(temp_file)
+                    merged += 1
+                except Exception as e:
+                    logger.error(f"Error removing temp file {temp_file}: {e}")
+        except Exception as e:
+            logger.error(f"Error in merge_temp_files: {e}")
+        return merged
+
+    def merge_all_temp_files(self):
+        """Merge every temp file, in batches of MERGE_BATCH_SIZE to bound memory."""
+        batch_size = self.setting("MERGE_BATCH_SIZE")
+        while self.merge_temp_files(batch_size) and batch_size:
+            pass
+
+    def _read_existing(self, path, reader, label):
+        if os.path.exists(path):
+            try:
+                df = reader(path)
+                logger.info(f"Loaded existing {label} file with {len(df)} records")
+                return df
+            except Exception as e:
+                logger.error(f"Error reading existing {label} file: {e}")
+        return pd.DataFrame(columns=self.spec.columns)
+
+    def _merge_into(self, existing_df, new_df, label, write):
+        """Append the rows of new_df whose key is not in existing_df and write; False if writing failed."""
+        fields = self.spec.key_fields
+        existing_keys = set(frame_keys(existing_df, fields)) if not existing_df.empty else set()
+        filtered_df = new_df[~pd.Series(frame_keys(new_df, fields), index=new_df.index).isin(existing_keys)]
+        if filtered_df.empty:
+            logger.info(f"No new unique {self.spec.name} to add to {label}")
+            return True
+
+        merged_df = pd.concat([existing_df, filtered_df], ignore_index=True)
+        try:
+            write(merged_df)
+            logger.info(f"Successfully saved {len(merged_df)} records to {label} file "
+                        f"(added {len(filtered_df)} new records)")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving to {label}: {e}")
+            return False
+
+    # Scraping
+
+    def load_list(self, driver, url):
+        """Open a list page and return its entry elements once they are present."""
+        driver.get(url)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, self.spec.list_selector))
+        )
+        return driver.find_elements(By.CSS_SELECTOR, self.spec.list_selector)
+
+    def locate(self, links, index, name, occurrence=1):
+        """The list element for `name`: the one at `index` if it still matches, else found by position.
+
+        When the list has shifted, the entry is the `occurrence`-th element listing
+        `name` (its place among same-name rows), so a page that lists one name
+        twice never opens the other row.
+        """
+        texts = []
+        for link in links:
+            try:
+                texts.append(link.text.strip())
+            except Exception:
+                texts.append(None)  # Stale reference
+        if index < len(texts) and texts[index] == name:
+            return links[index]
+        matches = [link for link, text in zip(links, texts) if text == name]
+        return matches[occurrence - 1] if occurrence <= len(matches) else None
+
+    def close_dialog(self, driver, timeout=2):
+        try:
+            close_button = WebDriverWait(driver, timeout).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, CLOSE_BUTTON))
+            )
+            driver.execute_script("arguments[0].click();", close_button)
+        except Exception:
+            # If close button not found, try pressing ESC key
+            webdriver.ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+
+    def recover(self, driver, url, reload=False):
+        """Fresh list references after a failed entry: in place, closing a stuck dialog, or by reloading."""
+        timer = self.setting("TIMER")
+        if reload:
+            with timer.span("page_reload"):
+                return self.load_list(driver, url)
+        with timer.span("recover"):
+            if driver.find_elements(By.CSS_SELECTOR, self.spec.dialog_selector):
+                try:
+                    self.close_dialog(driver, timeout=0.5)
+                except Exception:
+                    pass
+            return driver.find_elements(By.CSS_SELECTOR, self.spec.list_selector)
+
+    def read_list_page(self, page_number):
+        """Records of a spec without a dialog, parsed from one load of the list page."""
+        timer = self.setting("TIMER")
+        driver = None
+        try:
+            with timer.span("driver_startup"):
+                driver = self.new_driver()
+            url = self.setting("PAGE_URL_TEMPLATE").format(page_number)
+            logger.info(f"Reading {self.spec.name} list page {page_number}: {url}")
+            with timer.span("page_load"):
+                self.load_list(driver, url)
+            return self.parse_list(driver, page_number)
+        finally:
+            if driver:
+                driver.quit()
+
+    def parse_list(self, driver, page_number):
+        """Records of the list page the driver shows now."""
+        timer = self.setting("TIMER")
+        with timer.span("page_source"):
+            page_source = driver.page_source
+        with timer.span("parse"):
+            soup = BeautifulSoup(page_source, "html.parser")
+            records = self.spec.extract(soup, page_number)
+            soup.decompose()
+        return records
+
+    def read_paged_list(self, max_pages=1000):
+        """Yield the records of every page of a list spec, turning its pager (spec.next_selector).
+
+        The list is loaded once; the next button is clicked until it is disabled
+        or gone, each time waiting for the first row to change. A page that does
+        not turn raises, so a caller writing a store never keeps a partial list.
+        """
+        timer = self.setting("TIMER")
+        driver = None
+        try:
+            with timer.span("driver_startup"):
+                driver = self.new_driver()
+            url = self.setting("PAGE_URL_TEMPLATE").format(1)
+            logger.info(f"Reading {self.spec.name} list: {url}")
+            with timer.span("page_load"):
+                self.load_list(driver, url)
+            for page_number in range(1, max_pages + 1):
+                yield from self.parse_list(driver, page_number)
+                buttons = driver.find_elements(By.CSS_SELECTOR, self.spec.next_selector) if self.spec.next_selector else []
+                if not buttons or _disabled(buttons[0]):
+                    return
+                first_row = self.first_row_text(driver)
+                with timer.span("page_turn"):
+                    driver.execute_script("arguments[0].click();", buttons[0])
+                    WebDriverWait(driver, 10).until(lambda d: self.first_row_text(d) not in (first_row, None))
+            logger.warning(f"Stopped reading {self.spec.name} after {max_pages} pages")
+        finally:
+            if driver:
+                driver.quit()
+
+    def first_row_text(self, driver):
+        rows = driver.find_elements(By.CSS_SELECTOR, self.spec.list_selector)
+        try:
+            return rows[0].text if rows else ""
+        except Exception:
+            return None  # Stale while the table is redrawn
+
+    def fetch_item(self, driver, link, page_number, name):
+        """Open one entry's dialog and return its HTML, closing the dialog again; raises on failure."""
+        spec = self.spec
+        timer, memory = self.setting("TIMER"), self.setting("MEMORY")
+        try:
+            logger.info(f"Processing new {spec.item}: {name} on page {page_number}", extra=item_extra(page_number, name, "dialog_open"))
+            self.setting("PROGRESS").worker_state(spec.item, page_number, name)
+
+            with timer.span("dialog_open"):
+                # Scroll to element before clicking
+                driver.execute_script("arguments[0].scrollIntoView();", link)
+                time.sleep(0.5)
+
+                # Click using JavaScript to bypass overlay issues
+                driver.execute_script("arguments[0].click();", link)
+
+                dialog = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, spec.dialog_selector))
+                )
+
+            with timer.span("page_source"):
+                # With a memory budget only the dialog's HTML is fetched and parsed
+                html = dialog.get_attribute("outerHTML") if memory.enabled else driver.page_source
+
+            with timer.span("dialog_close"):
+                self.close_dialog(driver)
+                time.sleep(0.5)
+            return html
+        except Exception as e:
+            logger.error(f"Error processing {spec.item} {name}: {e}")
+            # Try to close any open dialogs
+            try:
+                webdriver.ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+                time.sleep(0.5)
+            except Exception:
+                pass
+            raise
+
+    def store(self, record, page_number, name, started=None, rank=1):
+        """Save one extracted record to the configured sinks and mark its listing processed.
+
+        `started` is the perf_counter() value from when the entry's fetch began; it
+        gives the "Finished" log its duration_ms. `rank` tells the listings of one
+        name apart (see PageManifest.ranks()).
+        """
+        timer = self.setting("TIMER")
+        sinks = self.setting("SINKS")
+        if "json" in sinks:
+            with timer.span("persist_json"):
+                self.append_to_json(record)
+        if "excel" in sinks:
+            with timer.span("persist_excel"):
+                self.append_to_excel(record)
+        if "catalog" in sinks:
+            with timer.span("persist_catalog"):
+                self.append_to_catalog(record)
+        with timer.span("persist_processed"):
+            self.mark_processed(name, rank)
+        logger.info(f"Finished {self.spec.item}: {name}", extra=item_extra(page_number, name, self.spec.item, started))
+        self.setting("PROGRESS").item_finished("ok")
+
+    def fetch_page(self, page_number):
+        """Yield ("item", page, name, html, started, rank) for every new entry of a list page, then ("page", page, names, count).
+
+        The page's browser is started here and quit once the last dialog is read;
+        entries that fail after the in-place retries go to the retry queue.
+        """
+        spec = self.spec
+        timer, progress = self.setting("TIMER"), self.setting("PROGRESS")
+        driver = None
+        try:
+            listings = self.processed_listings()
+
+            progress.worker_state("driver_startup", page_number)
+            with timer.span("driver_startup"):
+                driver = self.new_driver()
+            url = self.setting("PAGE_URL_TEMPLATE").format(page_number)
+
+            logger.info(f"Processing page {page_number}: {url}")
+            progress.worker_state("page_load", page_number)
+            with timer.span("page_load"):
+                links = self.load_list(driver, url)
+
+            names = [link.text.strip() for link in links]
+            # A name already stored from another page (another brand's product) is still new here
+            new, ranks = self.new_entries(page_number, names, listings)
+            logger.info(f"Found {len(links)} {spec.name} on page {page_number}, {len(new)} are new")
+            progress.page_found(page_number, len(links))
+            self.page_manifest().page_found(page_number, names)
+
+            if not new:
+                logger.info(f"Skipping page {page_number} - all {spec.name} already processed")
+                yield ("page", page_number, names, 0)
+                return
+
+            fetched = 0
+            failures = 0
+            broken = None  # Set once the browser can no longer recover; the rest of the page is queued
+            new = set(new)
+            for i, name in enumerate(names):
+                if i not in new:
+                    logger.info(f"Skipping already processed {spec.item}: {name}", extra=item_extra(page_number, name, "skip"))
+                    progress.item_finished("skipped")
+                    continue
+                link = links[i] if i < len(links) else None
+                html = None
+                error = f"browser lost: {broken}" if broken else None
+                started = time.perf_counter()
+                occurrence = names[:i].count(name) + 1
+                for attempt in range(0 if broken else 1 + ITEM_RETRIES):
+                    if attempt:
+                        # Relocate the entry on the list that is already loaded; reload only
+                        # after repeated failures
+                        failures += 1
+                        try:
+                            links = self.recover(driver, url, reload=failures >= RELOAD_AFTER_FAILURES)
+                        except Exception as e:
+                            logger.error(f"Could not recover page {page_number}: {e}")
+                            broken = e
+                            error = f"browser lost: {e}"
+                            break
+                        if failures >= RELOAD_AFTER_FAILURES:
+                            failures = 0
+                        link = self.locate(links, i, name, occurrence)
+                    if link is None:
+                        error = f"{name} is no longer listed on page {page_number}"
+                        continue
+                    try:
+                        with timer.span(spec.item):
+                            html = self.fetch_item(driver, link, page_number, name)
+                        break
+                    except Exception as e:
+                        html, error = None, str(e)
+
+                if html is None:
+                    progress.item_finished("failed")
+                    # Retried with backoff after the main pass instead of holding up this page
+                    self.retry_queue().push(f"{page_number}/{name}/{ranks[i]}",
+                                            {"page": page_number, "name": name, "index": i, "rank": ranks[i],
+                                             "occurrence": occurrence}, error)
+                    continue
+                failures = 0
+                fetched += 1
+                # Parsing and storing happen in the later stages while this browser opens the next entry
+                yield ("item", page_number, name, html, started, ranks[i])
+                del html
+
+            yield ("page", page_number, names, fetched)
+        except Exception as e:
+            logger.error(f"Error processing page {page_number}: {e}")
+        finally:
+            if driver:
+                driver.quit()
+
+    def page_events(self, page_number):
+        """fetch_page() timed as a whole page, with the pause between pages.
+
+        The page is not profiled here: this generator stays suspended while its
+        consumer works, so a scope around it would take in the pipeline's time
+        and block the "parse page N" and "write page N" scopes (only one scope
+        runs at a time). Parsing and storing are profiled where they happen.
+        """
+        progress = self.setting("PROGRESS")
+        progress.page_started(page_number)
+        try:
+            # Wait here (before starting a browser) while the run is over its memory budget
+            with self.setting("MEMORY").admit(), self.setting("TIMER").span("page"):
+                yield from self.fetch_page(page_number)
+        finally:
+            progress.page_finished(page_number)
+            pause = self.setting("PAGE_PAUSE")
+            if pause:
+                # Short pause between pages to avoid being blocked
+                progress.worker_state("pause", page_number)
+                time.sleep(pause)
+            progress.worker_state("idle")
+
+    def finish_page(self, page_number, names):
+        """Merge the temp files of a finished page and record whether all its names are stored."""
+        progress = self.setting("PROGRESS")
+        progress.worker_state("merge", page_number)
+        with self.setting("TIMER").span("merge"):
+            self.merge_all_temp_files()
+            if self._catalog:
+                self._catalog.flush()
+        # The page is complete once every entry listed on it is stored
+        self.page_manifest().page_done(page_number, complete=not self.new_entries(page_number, names)[0])
+        progress.worker_state("idle")
+
+    def parse_pool(self, workers=None):
+        """Worker processes for parsing, or None to parse on the pipeline's threads.
+
+        Forked workers inherit the extractor, so only HTML strings and records cross
+        the process boundary; without fork (or with PARSE_POOL = "thread") parsing
+        stays in threads. The pool is started once, by configure() before logging
+        and again by run_pages() before progress and memory sampling, so the workers
+        are forked while this process has no threads of its own. Their log records
+        come back through a queue and are written by this process's handlers.
+        """
+        if self._parse_pool is not None:
+            return self._parse_pool
+        if self.setting("PARSE_POOL") != "process" or "fork" not in multiprocessing.get_all_start_methods():
+            return None
+        context = multiprocessing.get_context("fork")
+        log_queue = context.Queue()
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers or max(1, self.setting("PARSE_WORKERS")), mp_context=context,
+            initializer=_init_parse_worker, initargs=(self.spec.extract, log_queue),
+        )
+        # The first task forks every worker; only then start the log listener thread
+        pool.submit(int).result()
+        self._parse_log_listener = logging.handlers.QueueListener(log_queue, _ForwardToLogger())
+        self._parse_log_listener.start()
+        self._parse_pool = pool
+        return pool
+
+    def close_parse_pool(self):
+        """Stop the parse workers and write the last of their log records."""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        if self._parse_log_listener is not None:
+            self._parse_log_listener.stop()
+            self._parse_log_listener = None
+
+    def run_pipeline(self, pages):
+        """Scrape `pages` through the fetch, parse and write stages; returns how many entries were stored.
+
+        MAX_WORKERS browsers fetch dialogs, PARSE_WORKERS parse them and one writer
+        stores records and merges each page when its last record is in, so the
+        browsers keep opening dialogs while parsing and merges run. The stages are
+        joined by queues of QUEUE_SIZE items (twice the stage's workers if unset);
+        a full queue holds back the stage feeding it.
+        """
+        spec, timer, profiler = self.spec, self.setting("TIMER"), self.setting("PROFILER")
+        parse_workers = max(1, self.setting("PARSE_WORKERS"))
+        queue_size = self.setting("QUEUE_SIZE")
+        pool = self.parse_pool(parse_workers)  # Normally started already by configure() or run_pages()
+        stored, expected = {}, {}
+
+        def parse(event):
+            if event[0] != "item":
+                return [event]
+            _, page, name, html, started, rank = event
+            with timer.span("parse"), profiler.scope(f"parse page {page}") as profiled:
+                if pool and not profiled:
+                    record = pool.submit(_parse_in_worker, html, name, page).result()
+                else:
+                    # A profiled parse runs on this thread so its CPU time is in the profile
+                    record = parse_dialog(spec.extract, html, name, page)
+            return [("record", page, name, record, started, rank)]
+
+        def write(event):
+            page = event[1]
+            with profiler.scope(f"write page {page}"):
+                if event[0] == "record":
+                    self.store(event[3], page, event[2], event[4], event[5])
+                    stored[page] = stored.get(page, 0) + 1
+                else:
+                    expected[page] = event
+                # Records of a page can arrive after its marker when parsers finish out of order
+                if page in expected and stored.get(page, 0) >= expected[page][3]:
+                    self.finish_page(page, expected.pop(page)[2])
+                    logger.info(f"Page completed with {stored.get(page, 0)} new {spec.name}. "
+                                f"Running total: {sum(stored.values())}")
+
+        pipeline = Pipeline(spec.name)
+        pipeline.add_stage("fetch", self.page_events, workers=max(1, self.setting("MAX_WORKERS")), capacity=queue_size)
+        pipeline.add_stage("parse", parse, workers=parse_workers, capacity=queue_size)
+        pipeline.add_stage("write", write, workers=1, capacity=queue_size)
+        pipeline.run(pages)
+        # Pages whose records were lost to a failed stage still get merged and recorded
+        for page, event in expected.items():
+            self.finish_page(page, event[2])
+        logger.debug(f"Pipeline stages: {json.dumps(pipeline.stats())}")
+        return sum(stored.values())
+
+    def run_pages(self, first, last):
+        """Scrape pages first..last through the pipeline; returns how many entries were new."""
+        progress, memory = self.setting("PROGRESS"), self.setting("MEMORY")
+        pages = range(first, last + 1)
+        if self.setting("RESUME"):
+            # Completed pages are skipped without starting a browser
+            pages, skipped = self.page_manifest().pages_to_run(
+                pages, sample=self.setting("RESUME_SAMPLE"), stored=lambda page, names: not self.new_entries(page, names)[0])
+            if skipped:
+                logger.info(f"Resuming: {skipped} completed pages skipped, {len(pages)} pages to load")
+        progress.set_totals(pages=len(pages))
+        # Fork the parse workers before the progress and memory threads start
+        self.parse_pool()
+        progress.start()
+        memory.start()
+        try:
+            total = self.run_pipeline(pages)
+            total += self.drain_retries()
+        finally:
+            self.close_parse_pool()
+            self.close_catalog()
+            progress.stop()
+            memory.stop()
+        return total
+
+    def drain_retries(self):
+        """Retry the queued failed entries on one browser, after the main pass; returns how many succeeded."""
+        queue = self.retry_queue()
+        listings = self.processed_listings()
+        for key, payload in queue.payloads(exhausted=True).items():
+            if (payload["name"], payload.get("rank", 1)) in listings:
+                queue.discard(key)  # Stored since it failed, e.g. by this run's main pass
+        if not len(queue):
+            return 0
+
+        logger.info(f"Retrying {len(queue)} failed {self.spec.name}")
+        progress, timer = self.setting("PROGRESS"), self.setting("TIMER")
+        state = {"driver": None, "page": None}
+        pages = set()
+
+        def retry(payload):
+            page = payload["page"]
+            url = self.setting("PAGE_URL_TEMPLATE").format(page)
+            pages.add(page)
+            started = time.perf_counter()
+            progress.worker_state("retry", page, payload["name"])
+            try:
+                if state["driver"] is None:
+                    with timer.span("driver_startup"):
+                        state["driver"] = self.new_driver()
+                if state["page"] == page:
+                    links = self.recover(state["driver"], url)
+                else:
+                    with timer.span("page_load"):
+                        links = self.load_list(state["driver"], url)
+                    state["page"] = page
+            except Exception:
+                state["page"] = None
+                raise
+            link = self.locate(links, payload.get("index", 0), payload["name"], payload.get("occurrence", 1))
+            if link is None:
+                raise LookupError(f"{payload['name']} is no longer listed on page {page}")
+            with timer.span(self.spec.item):
+                html = self.fetch_item(state["driver"], link, page, payload["name"])
+            with timer.span("parse"), self.setting("PROFILER").scope(f"parse page {page}"):
+                record = parse_dialog(self.spec.extract, html, payload["name"], page)
+            with self.setting("PROFILER").scope(f"write page {page}"):
+                self.store(record, page, payload["name"], started, payload.get("rank", 1))
+            return True
+
+        try:
+            with timer.span("retries"):
+                succeeded = queue.drain(retry)
+        finally:
+            if state["driver"]:
+                state["driver"].quit()
+            progress.worker_state("idle")
+
+        with timer.span("merge"):
+            self.merge_all_temp_files()
+        manifest = self.page_manifest()
+        listings = self.processed_listings()
+        for page in pages:
+            manifest.page_done(page, complete=not self.new_entries(page, manifest.items(page), listings)[0])
+        if queue.last_exhausted:
+            logger.warning(f"{len(queue.last_exhausted)} {self.spec.name} failed {self.setting('RETRY_ATTEMPTS')} times "
+                           f"and were given up: {', '.join(sorted(queue.last_exhausted))}")
+        return succeeded
+
+    # Run setup and reports
+
+    def configure(self, args):
+        """Set up logging and the optional profiling, progress and memory-budget modes from parsed options."""
+        if getattr(args, "parse_workers", None):
+            self.settings["PARSE_WORKERS"] = args.parse_workers
+        # Parse workers are forked before the logging writer thread starts
+        self.parse_pool()
+        # Logging is queued to a background writer; SCRAPER_LOG_JSON / SCRAPER_LOG_SAMPLE tune it
+        configure_logging(self.setting("LOG_FILE"))
+        configure_from_args(self.setting("PROGRESS"), args)
+        if getattr(args, "memory_budget", None):
+            self.setting("MEMORY").configure(budget_mb=args.memory_budget)
+            self.settings["MERGE_BATCH_SIZE"] = MEMORY_MERGE_BATCH_SIZE
+        if getattr(args, "no_resume", False):
+            self.settings["RESUME"] = False
+        if getattr(args, "verify_sample", None) is not None:
+            self.settings["RESUME_SAMPLE"] = args.verify_sample
+        if getattr(args, "profile", False):
+            self.setting("PROFILER").configure(sample_rate=args.profile_rate, output_dir=args.profile_dir)
+
+    def write_reports(self):
+        """Write the timing report and Prometheus textfile, the profile and the memory report of this run."""
+        try:
+            timing_file, prom_file = self.setting("TIMING_REPORT_FILE"), self.setting("PROMETHEUS_FILE")
+            self.setting("TIMER").write_reports(timing_file, prom_file)
+            logger.info(f"Timing report written to {timing_file} and {prom_file}")
+        except Exception as e:
+            logger.error(f"Error writing timing report: {e}")
+
+        try:
+            paths = self.setting("PROFILER").dump()
+            if paths:
+                logger.info(f"Profile written to {', '.join(paths)}")
+        except Exception as e:
+            logger.error(f"Error writing profile: {e}")
+
+        memory = self.setting("MEMORY")
+        if memory.enabled:
+            try:
+                memory.write_report(self.setting("MEMORY_REPORT_FILE"))
+                logger.info(f"Memory report written to {self.setting('MEMORY_REPORT_FILE')}")
+            except Exception as e:
+                logger.error(f"Error writing memory report: {e}")
@@ -0,0 +1,200 @@
+"""Link New Directions raw materials to NATRUE products and raw materials by INCI name.
+
+Names are compared on normalized INCI keys: case, accents, punctuation,
+footnote markers, qualifiers such as "organic" or "refined" and a few common
+synonyms (Aqua = Water, Parfum = Fragrance) are removed, and a name with a parenthesised alternative
+("Simmondsia Chinensis (Jojoba) Seed Oil") is indexed with and without it.
+Keys are matched exactly first. Otherwise a character trigram index yields
+the candidates that share enough trigrams to reach the threshold, and only
+those are scored (Dice coefficient of the trigram sets). The cost therefore
+grows with the number of names rather than with pairs of materials and
+products.
+
+    python -m common.fuzzy_join --materials newdirections_sections.jsonl \\
+        --products natrue_product_details.json --raw-materials raw_materials.jsonl -o material_links.jsonl
+"""
+
+import argparse
+import json
+import math
+import re
+from collections import Counter, defaultdict
+
+from common.catalog import read_records
+from common.dedupe import normalize_text
+
+SYNONYMS = {
+    "aqua": "water",
+    "eau": "water",
+    "parfum": "fragrance",
+    "aroma": "flavor",
+    "tocopherol": "vitamin e",
+}
+QUALIFIERS_RE = re.compile(r"\b(raw material|organic|refined|unrefined|certified|cold pressed)\b")
+
+_PARENS_RE = re.compile(r"\(([^()]*)\)")
+_MARKERS_RE = re.compile(r"[*°†‡¹²³]+")
+_NON_WORD_RE = re.compile(r"[^\w]+")
+_SPLIT_RE = re.compile(r"[,;](?![^()]*\))")
+
+
+def inci_keys(text):
+    """Normalized keys of one INCI name: the whole name, without its parenthesised part, and that part alone."""
+    text = QUALIFIERS_RE.sub(" ", _MARKERS_RE.sub(" ", normalize_text(text)))
+    if not text:
+        return []
+    variants = [text, _PARENS_RE.sub(" ", text)]
+    variants += _PARENS_RE.findall(text)
+    keys = []
+    for variant in variants:
+        key = " ".join(_NON_WORD_RE.sub(" ", variant).split())
+        key = SYNONYMS.get(key, key)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def split_ingredients(text):
+    """The individual names of an ingredient list, splitting on commas and semicolons outside parentheses."""
+    if not text:
+        return []
+    text = re.sub(r"^\s*ingredients\s*:?", "", str(text), flags=re.IGNORECASE)
+    return [part.strip(" .\n\t") for part in _SPLIT_RE.split(text) if part.strip(" .\n\t")]
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NgramIndex:
+    """Keys with their references, found exactly or by trigram similarity."""
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.refs = defaultdict(list)  # key -> references added under it
+        self._grams = {}  # key -> its trigrams
+        self._postings = defaultdict(list)  # trigram -> keys containing it
+
+    def __len__(self):
+        return len(self.refs)
+
+    def add(self, text, ref):
+        for key in inci_keys(text):
+            if key not in self._grams:
+                grams = trigrams(key)
+                self._grams[key] = grams
+                for gram in grams:
+                    self._postings[gram].append(key)
+            self.refs[key].append(ref)
+
+    def match_key(self, key):
+        """(score, key) of the indexed keys similar to `key`, best first."""
+        if key in self._grams:
+            return [(1.0, key)]
+        grams = trigrams(key)
+        # Dice >= t needs at least t * |A| / (2 - t) shared trigrams, whatever the other key's size
+        needed = math.ceil(self.threshold * len(grams) / (2 - self.threshold))
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        matches = []
+        for candidate, count in shared.items():
+            if count >= needed:
+                score = 2 * count / (len(grams) + len(self._grams[candidate]))
+                if score >= self.threshold:
+                    matches.append((round(score, 3), candidate))
+        return sorted(matches, reverse=True)
+
+    def match(self, text):
+        """Best score per indexed key over all keys of `text`, best first."""
+        best = {}
+        for key in inci_keys(text):
+            for score, candidate in self.match_key(key):
+                best[candidate] = max(score, best.get(candidate, 0))
+        return sorted(((score, key) for key, score in best.items()), reverse=True)
+
+
+def material_names(material):
+    """The names a New Directions material is looked up by: its INCI name, then its product names."""
+    return [material[field] for field in ("inci_name", "name", "title") if material.get(field)]
+
+
+def link_materials(materials, products=(), raw_materials=(), threshold=0.8):
+    """One result per material with the products and raw materials its names match.
+
+    Products are matched on each name of their `ingredients` list, raw
+    materials on their `inci` and `name` columns.
+    """
+    ingredient_index, raw_index = NgramIndex(threshold), NgramIndex(threshold)
+    for i, product in enumerate(products):
+        for ingredient in split_ingredients(product.get("ingredients")):
+            ingredient_index.add(ingredient, (i, ingredient))
+    for i, row in enumerate(raw_materials):
+        for field in ("inci", "name"):
+            if row.get(field):
+                raw_index.add(row[field], i)
+
+    results = []
+    for material in materials:
+        names = material_names(material)
+        product_hits, raw_hits = {}, {}
+        for name in names:
+            for score, key in ingredient_index.match(name):
+                for i, ingredient in ingredient_index.refs[key]:
+                    if score > product_hits.get(i, (0,))[0]:
+                        product_hits[i] = (score, ingredient)
+            for score, key in raw_index.match(name):
+                for i in raw_index.refs[key]:
+                    raw_hits[i] = max(score, raw_hits.get(i, 0))
+
+        results.append({
+            "material": material.get("name") or material.get("title"),
+            "inci_name": material.get("inci_name"),
+            "products": [
+                {"name": products[i].get("name"), "brand": products[i].get("brand"), "ingredient": ingredient, "score": score}
+                for i, (score, ingredient) in sorted(product_hits.items(), key=lambda item: -item[1][0])
+            ],
+            "raw_materials": [
+                {"name": raw_materials[i].get("name"), "inci": raw_materials[i].get("inci"), "score": score}
+                for i, score in sorted(raw_hits.items(), key=lambda item: -item[1])
+            ],
+        })
+    return results
+
+
+def load_materials(path):
+    """Parsed New Directions materials from a sections JSON Lines file or straight from the packed archive."""
+    records = read_records(path, None)
+    if path.endswith(".jsonl.gz"):
+        from common.sections import parse_record
+        records = [parse_record(record) for record in records]
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Link New Directions raw materials to NATRUE data by INCI name")
+    parser.add_argument("--materials", default="newdirections_sections.jsonl",
+                        help="parsed materials (python -m common.sections) or the packed archive")
+    parser.add_argument("--products", default="natrue_product_details.json", help="NATRUE products JSON store")
+    parser.add_argument("--raw-materials", default="raw_materials.jsonl", help="NATRUE raw materials JSON Lines store")
+    parser.add_argument("--threshold", type=float, default=0.8, help="minimum trigram similarity (0-1)")
+    parser.add_argument("-o", "--output", default="material_links.jsonl")
+    args = parser.parse_args(argv)
+
+    results = link_materials(
+        load_materials(args.materials),
+        read_records(args.products, "products"),
+        read_records(args.raw_materials, None),
+        threshold=args.threshold,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    linked = sum(1 for result in results if result["products"] or result["raw_materials"])
+    print(f"Linked {linked} of {len(results)} materials; written to {args.output}")
+    return args.output
+
+
+if __name__ == "__main__":
+    main()
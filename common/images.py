@@ -0,0 +1,201 @@
+"""Download the images referenced by scraped records into a content-addressed store.
+
+    python -m common.images natrue_product_details.json --store product_images --workers 8
+    python -m common.images natrue_product_details.json --store product_images --refresh
+
+URLs are deduplicated before anything is fetched, and a URL already in the
+store's index is not requested again unless --refresh is given. Refreshes are
+conditional (If-None-Match / If-Modified-Since), so unchanged images cost a
+304 and no body. Downloads run on a bounded thread pool that shares one
+pooled HTTP session.
+
+Files are named by the SHA-256 of their content and sharded by its first two
+byte pairs (ab/cd/abcd....jpg). Different URLs serving the same image share
+one file. index.json maps every URL to its file, validators and fetch time.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from common.catalog import read_records
+from common.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+FETCHED, CACHED, NOT_MODIFIED, DUPLICATE, FAILED = "fetched", "cached", "not_modified", "duplicate", "failed"
+
+
+class ImageStore:
+    """Sharded content-addressed files plus a URL index saved as index.json."""
+
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}  # Files are still there; they are found again by hash
+
+    def relative_path(self, digest, extension):
+        return os.path.join(digest[:2], digest[2:4], f"{digest}{extension}")
+
+    def put(self, data, extension):
+        """Store content under its hash; returns (digest, relative path, whether it was new)."""
+        digest = hashlib.sha256(data).hexdigest()
+        relative = self.relative_path(digest, extension)
+        path = os.path.join(self.root, relative)
+        if os.path.exists(path):
+            return digest, relative, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            # Another worker may have stored the same content from a different URL meanwhile
+            if os.path.exists(path):
+                os.remove(temp_path)
+                return digest, relative, False
+            os.replace(temp_path, path)
+        return digest, relative, True
+
+    def get(self, url):
+        return self.index.get(url)
+
+    def record(self, url, entry):
+        with self._lock:
+            self.index[url] = entry
+
+    def path(self, url):
+        entry = self.index.get(url)
+        return os.path.join(self.root, entry["path"]) if entry else None
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=4, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+
+
+def image_extension(url, content_type=None):
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension in (".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".avif"):
+        return extension
+    guessed = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) if content_type else None
+    return guessed or ".img"
+
+
+def new_session(workers):
+    """One HTTP session whose connection pool fits all workers."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; natrue-scrapers image fetcher)"
+    return session
+
+
+class ImageFetcher:
+    """Fetches image URLs into an ImageStore on a bounded thread pool."""
+
+    def __init__(self, store, workers=8, timeout=20, session=None, rate_limiter=None):
+        self.store = store
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.session = session or new_session(self.workers)
+        self.rate_limiter = rate_limiter  # e.g. a common.rate_limit.TokenBucket
+
+    def fetch(self, url, refresh=False):
+        """Bring one URL into the store; returns its outcome (fetched, cached, not_modified, duplicate, failed)."""
+        known = self.store.get(url)
+        stored = bool(known) and os.path.exists(os.path.join(self.store.root, known["path"]))
+        if stored and not refresh:
+            return CACHED
+
+        headers = {}
+        if stored:
+            # Conditional only when there is a copy to keep; a deleted file is fetched again in full
+            if known.get("etag"):
+                headers["If-None-Match"] = known["etag"]
+            if known.get("last_modified"):
+                headers["If-Modified-Since"] = known["last_modified"]
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and stored:
+                self.store.record(url, {**known, "checked_at": round(time.time())})
+                return NOT_MODIFIED
+            response.raise_for_status()
+            digest, relative, new = self.store.put(
+                response.content, image_extension(url, response.headers.get("Content-Type")))
+        except Exception as e:
+            if known:
+                # Keep serving the stored copy, noting that the re-check failed
+                self.store.record(url, {**known, "error": str(e), "checked_at": round(time.time())})
+            return FAILED
+
+        self.store.record(url, {
+            "sha256": digest,
+            "path": relative,
+            "size": len(response.content),
+            "content_type": response.headers.get("Content-Type"),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": round(time.time()),
+        })
+        return FETCHED if new else DUPLICATE
+
+    def fetch_all(self, urls, refresh=False):
+        """Fetch every distinct URL once; returns a Counter of outcomes and saves the index."""
+        unique = list(dict.fromkeys(url for url in urls if url))
+        outcomes = Counter()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for outcome in executor.map(lambda url: self.fetch(url, refresh), unique):
+                    outcomes[outcome] += 1
+        finally:
+            self.store.save()
+        return outcomes
+
+
+def image_urls(records, field="image_url"):
+    return [record.get(field) for record in records if record.get(field)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the images referenced by scraped records")
+    parser.add_argument("source", nargs="?", default="natrue_product_details.json", help="products JSON store")
+    parser.add_argument("--key", default="products", help="top-level key of the JSON store")
+    parser.add_argument("--field", default="image_url", help="record field holding the image URL")
+    parser.add_argument("--store", default="product_images", help="image store directory")
+    parser.add_argument("--workers", type=int, default=8, help="parallel downloads")
+    parser.add_argument("--rate", type=float, help="maximum requests per second")
+    parser.add_argument("--refresh", action="store_true", help="re-check stored images with conditional requests")
+    args = parser.parse_args(argv)
+
+    rate_limiter = None
+    if args.rate:
+        from common.rate_limit import TokenBucket
+        rate_limiter = TokenBucket(args.rate, capacity=args.workers)
+    fetcher = ImageFetcher(ImageStore(args.store), workers=args.workers, rate_limiter=rate_limiter)
+    outcomes = fetcher.fetch_all(image_urls(read_records(args.source, args.key), args.field), refresh=args.refresh)
+    print(", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items())) or "No image URLs found")
+    return outcomes
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Deferred imports for the heavy scraper dependencies (selenium, pandas, bs4, openpyxl).
+
+    pd = lazy_import("pandas")
+    By = lazy_import("selenium.webdriver.common.by", "By")
+
+The name can be used exactly like the real module or object; the import runs
+on first use. Parse-only and export-only commands therefore never pay for
+selenium or pandas, and importing a scraper module for tests stays cheap.
+"""
+
+import importlib
+import threading
+
+_import_lock = threading.Lock()
+
+
+class LazyImport:
+    """Stands in for a module (or an attribute of one) until it is first used."""
+
+    __slots__ = ("_module_name", "_attribute", "_target")
+
+    def __init__(self, module_name, attribute=None):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attribute", attribute)
+        object.__setattr__(self, "_target", None)
+
+    def _load(self):
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            with _import_lock:
+                target = object.__getattribute__(self, "_target")
+                if target is None:
+                    target = importlib.import_module(object.__getattribute__(self, "_module_name"))
+                    attribute = object.__getattribute__(self, "_attribute")
+                    if attribute:
+                        target = getattr(target, attribute)
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def loaded(self):
+        return object.__getattribute__(self, "_target") is not None
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    # Setting/deleting attributes (e.g. unittest.mock.patch) acts on the real object
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        name = object.__getattribute__(self, "_module_name")
+        attribute = object.__getattribute__(self, "_attribute")
+        return f"<lazy import {name}{'.' + attribute if attribute else ''}>"
+
+
+def lazy_import(module_name, attribute=None):
+    """Return a proxy that imports `module_name` (and gets `attribute`) on first use."""
+    return LazyImport(module_name, attribute)
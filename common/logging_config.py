@@ -0,0 +1,119 @@
+"""Queue-based logging setup with optional JSON output and sampling of per-item messages.
+
+Worker threads only put records on an in-memory queue; a background listener
+thread does the formatting and the file/console I/O.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+ITEM_FIELDS = ("page", "item", "stage", "duration_ms")
+
+_listener = None
+_lock = threading.Lock()
+
+
+def item_extra(page=None, item=None, stage=None, started=None):
+    """Build the `extra` dict for a per-item log call; `started` is a perf_counter() value."""
+    extra = {"page": page, "item": item, "stage": stage}
+    if started is not None:
+        extra["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return extra
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for field in ITEM_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ItemSamplingFilter(logging.Filter):
+    """Keeps only a fraction of INFO/DEBUG records that carry an `item` field.
+
+    Warnings and errors, and messages that are not about a single item, always pass.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        if getattr(record, "item", None) is None:
+            return True
+        return random.random() < self.rate
+
+
+def configure_logging(log_file, level=logging.INFO, json_logs=None, sample_rate=None):
+    """Route the root logger through a queue to file and console handlers.
+
+    json_logs and sample_rate default to the SCRAPER_LOG_JSON and SCRAPER_LOG_SAMPLE
+    environment variables. Only the first call in a process configures anything,
+    like logging.basicConfig.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        if json_logs is None:
+            json_logs = os.environ.get("SCRAPER_LOG_JSON", "").lower() in ("1", "true", "yes")
+        if sample_rate is None:
+            sample_rate = float(os.environ.get("SCRAPER_LOG_SAMPLE", "1.0"))
+
+        formatter = JsonFormatter() if json_logs else logging.Formatter(TEXT_FORMAT)
+        handlers = [logging.FileHandler(log_file, encoding="utf-8"), logging.StreamHandler()]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ItemSamplingFilter(sample_rate))
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Flush the queue and stop the background writer (safe to call more than once)."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root.removeHandler(handler)
+        _listener = None
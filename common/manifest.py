@@ -0,0 +1,102 @@
+"""Page-level resume manifest for the list scrapers.
+
+For every list page the manifest records the names found on it and whether
+all of them were stored. The names also rank the listings of a name across
+pages (ranks()), which tells same-name entries of different brands apart. A resumed run schedules only pages that are not
+complete, so finished pages cost no browser start or page load. Completed
+pages are still verified: lazily, by checking that their names are all in
+the processed list (a lost or reset processed file re-opens them), and by
+re-scraping a random sample, which catches entries the site added since.
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+PARTIAL = "partial"
+COMPLETE = "complete"
+
+
+class PageManifest:
+    """Per-page item names and completion state, saved atomically after every change."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages = {}
+        self.load()
+
+    def load(self):
+        self._pages = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._pages = json.load(f).get("pages", {})
+            except (OSError, ValueError):
+                self._pages = {}  # An unreadable manifest only means nothing is skipped
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"pages": self._pages}, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def state(self, page):
+        entry = self._pages.get(str(page))
+        return entry["state"] if entry else None
+
+    def items(self, page):
+        entry = self._pages.get(str(page))
+        return list(entry["items"]) if entry else []
+
+    def ranks(self, page, names):
+        """The rank of each of a page's names among the listings of that name: 1 for its first listing
+        across the pages in page order, 2 for the second, ...
+        """
+        with self._lock:
+            seen = Counter()
+            for key, entry in self._pages.items():
+                if int(key) < int(page):
+                    seen.update(entry["items"])
+        ranks = []
+        for name in names:
+            seen[name] += 1
+            ranks.append(seen[name])
+        return ranks
+
+    def page_found(self, page, names):
+        """Record the names listed on a page; the page stays partial until page_done()."""
+        with self._lock:
+            self._pages[str(page)] = {"state": PARTIAL, "items": list(names), "updated": round(time.time())}
+            self.save()
+
+    def page_done(self, page, complete):
+        with self._lock:
+            entry = self._pages.setdefault(str(page), {"items": []})
+            entry["state"] = COMPLETE if complete else PARTIAL
+            entry["updated"] = round(time.time())
+            self.save()
+
+    def pages_to_run(self, pages, processed=(), sample=0.0, rng=random, stored=None):
+        """The pages a resumed run has to load: incomplete ones plus a sample of the completed ones.
+
+        stored(page, names), if given, says whether all of a page's entries are
+        stored; otherwise every name has to be in `processed`.
+        Returns (pages to run, number of completed pages skipped).
+        """
+        pages = list(pages)
+        processed = set(processed)
+        stored = stored or (lambda page, names: set(names) <= processed)
+        trusted = [
+            page for page in pages
+            if self.state(page) == COMPLETE and stored(page, self.items(page))
+        ]
+        checked = set(rng.sample(trusted, min(len(trusted), math.ceil(len(trusted) * sample)))) if sample else set()
+        skipped = set(trusted) - checked
+        return [page for page in pages if page not in skipped], len(skipped)
@@ -0,0 +1,200 @@
+"""Memory budget for scraping runs: RSS of this process and its browser children.
+
+RSS is read from /proc (Linux), so no extra dependency is needed; elsewhere the
+figures are None and the budget never throttles. A sampler thread records the
+peak RSS while each timing stage is active, and workers call admit() before
+starting new work so they wait while the run is over budget.
+"""
+
+import gc
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROC = "/proc"
+
+
+def rss_mb(pid="self"):
+    """Resident set size of one process in MB, or None if it cannot be read."""
+    try:
+        with open(os.path.join(PROC, str(pid), "status"), "r", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return 0.0  # Zombie processes have no VmRSS line
+
+
+def descendant_pids(pid=None):
+    """All child processes of `pid` (default: this process), recursively."""
+    pid = os.getpid() if pid is None else pid
+    children = {}
+    try:
+        entries = os.listdir(PROC)
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(PROC, entry, "stat"), "r", encoding="ascii", errors="replace") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces and parentheses; fields restart after the last ")"
+        parent = int(stat[stat.rfind(")") + 2:].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+
+    found, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def children_rss_mb(pid=None):
+    """Summed RSS of all descendants (chromedriver and Chrome processes) in MB."""
+    return sum(rss_mb(child) or 0.0 for child in descendant_pids(pid))
+
+
+class MemoryBudget:
+    """Samples RSS, keeps per-stage peaks and throttles new work while over budget."""
+
+    def __init__(self, budget_mb=None, interval=1.0, max_wait=300):
+        self.budget_mb = budget_mb
+        self.interval = interval
+        self.max_wait = max_wait
+        self._lock = threading.Condition()
+        self._active_stages = Counter()
+        self._stage_peaks = {}
+        self._peak = {"python_mb": 0.0, "children_mb": 0.0, "total_mb": 0.0}
+        self._last = None
+        self._active_work = 0
+        self._throttled = 0
+        self._throttled_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.budget_mb is not None
+
+    def configure(self, budget_mb=None, interval=None):
+        """Set the budget (typically from the --memory-budget command-line flag)."""
+        if budget_mb is not None:
+            self.budget_mb = budget_mb
+        if interval is not None:
+            self.interval = interval
+
+    def track(self, timer):
+        """Attribute peaks to the stages of a StageTimer while they are active."""
+        timer.add_listener(self)
+
+    def stage_started(self, stage):
+        with self._lock:
+            self._active_stages[stage] += 1
+
+    def stage_finished(self, stage):
+        with self._lock:
+            self._active_stages[stage] -= 1
+            if self._active_stages[stage] <= 0:
+                del self._active_stages[stage]
+
+    def sample(self):
+        """Measure RSS now and update the overall and per-stage peaks."""
+        python_mb = rss_mb()
+        if python_mb is None:
+            return None
+        children = children_rss_mb()
+        current = {"python_mb": python_mb, "children_mb": children, "total_mb": python_mb + children}
+        with self._lock:
+            self._last = current
+            for key, value in current.items():
+                self._peak[key] = max(self._peak[key], value)
+            for stage in self._active_stages:
+                self._stage_peaks[stage] = max(self._stage_peaks.get(stage, 0.0), current["total_mb"])
+            self._lock.notify_all()
+        return current
+
+    def over_budget(self):
+        if not self.enabled:
+            return False
+        current = self.sample()
+        return current is not None and current["total_mb"] > self.budget_mb
+
+    @contextmanager
+    def admit(self):
+        """Run a unit of work, first waiting while over budget (unless nothing else is running)."""
+        if self.enabled and self.over_budget():
+            gc.collect()
+            started = time.monotonic()
+            waited = False
+            while time.monotonic() - started < self.max_wait:
+                with self._lock:
+                    busy = self._active_work > 0
+                current = self.sample()
+                if not busy or current is None or current["total_mb"] <= self.budget_mb:
+                    break
+                waited = True
+                with self._lock:
+                    self._lock.wait(self.interval)  # Woken early when other work finishes
+            if waited:
+                with self._lock:
+                    self._throttled += 1
+                    self._throttled_seconds += time.monotonic() - started
+        with self._lock:
+            self._active_work += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active_work -= 1
+                self._lock.notify_all()
+
+    def start(self):
+        """Sample in the background while the run is going (only if a budget is set)."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="memory-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def report(self):
+        """Return budget, peaks (overall and per stage) and throttling as a dict."""
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb,
+                "peak": {key: round(value, 1) for key, value in self._peak.items()},
+                "stage_peak_total_mb": {stage: round(value, 1) for stage, value in sorted(self._stage_peaks.items())},
+                "throttled": self._throttled,
+                "throttled_seconds": round(self._throttled_seconds, 1),
+            }
+
+    def write_report(self, path):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        os.replace(temp_path, path)
+
+
+def add_memory_arguments(parser):
+    """Add the shared --memory-budget option to an argparse parser."""
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        help="keep this process and its browsers under MB of RSS: "
+                             "parse only the dialog, merge in small batches and throttle workers")
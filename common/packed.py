@@ -0,0 +1,225 @@
+"""Packed, indexed archive of scraped records.
+
+Records are appended to one gzip file as JSON Lines, each record in its own
+gzip member. The members together are an ordinary .jsonl.gz file that any
+gzip reader streams, while a side index (<archive>.idx) maps each record's
+key to the offset and length of its member, so one record is read with a
+single seek and decompress. Writing the same key again appends a new member
+and repoints the index; the old one stays in the file until compact().
+
+The index is saved by flush()/close() and every `flush_every` appends. It
+stores the archive size it covers, so after a crash the members written since
+are found by scanning only the tail of the archive.
+
+    python -m common.packed newdirections_products.jsonl.gz --export-txt product_details
+"""
+
+import argparse
+import gzip
+import json
+import os
+import threading
+import zlib
+
+
+def safe_filename(name):
+    """The file name the New Directions scraper has always used for a product."""
+    return "".join(c if c.isalnum() or c in " _-" else "_" for c in name)
+
+
+def _members(f, base=0, chunk_size=8192):
+    """(offset, length, record) of every complete gzip member read from `f`, which starts at `base`.
+
+    The file is fed to the decompressor in small chunks, so only the leftover
+    of one chunk is carried over at the end of each member and the scan stays
+    linear in the size of the tail.
+    """
+    offset, fed, payload = base, 0, []
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    pending = b""
+    while True:
+        data = pending or f.read(chunk_size)
+        pending = b""
+        if not data:
+            return  # Clean end, or a torn write at the end
+        try:
+            payload.append(decompressor.decompress(data))
+        except zlib.error:
+            return  # Torn write at the end
+        if not decompressor.eof:
+            fed += len(data)
+            continue
+        pending = decompressor.unused_data
+        length = fed + len(data) - len(pending)
+        yield offset, length, json.loads(b"".join(payload))
+        offset, fed, payload = offset + length, 0, []
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+
+class PackedArchive:
+    """Append-only gzip JSON Lines archive with random access by key and by name."""
+
+    def __init__(self, path, key="url", name_field="name", flush_every=200):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.key = key
+        self.name_field = name_field
+        self.flush_every = flush_every
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [offset, length, name]
+        self._names = {}  # case-folded name -> key
+        self._file = None
+        self._size = 0
+        self.load()
+
+    def load(self):
+        covered = 0
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                self._entries, covered = index["entries"], index["size"]
+            except (OSError, ValueError, KeyError):
+                self._entries, covered = {}, 0
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if covered > size:
+            self._entries, covered = {}, 0  # The archive was replaced; rebuild
+        if covered < size:
+            size = covered  # Anything after the last complete member is a torn write
+            with open(self.path, "rb") as f:
+                f.seek(covered)
+                for offset, length, record in _members(f, covered):
+                    self._entries[record[self.key]] = [offset, length, record.get(self.name_field)]
+                    size = offset + length
+        self._size = size
+        self._names = {str(entry[2]).casefold(): key for key, entry in self._entries.items()}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return list(self._entries)
+
+    def append(self, record):
+        """Store one record under record[key]; a record already stored with that key is replaced."""
+        member = gzip.compress((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+                self._file.truncate(self._size)  # Drop a torn member left by a crash
+            self._file.write(member)
+            self._file.flush()
+            key, name = record[self.key], record.get(self.name_field)
+            self._entries[key] = [self._size, len(member), name]
+            self._names[str(name).casefold()] = key
+            self._size += len(member)
+            self._unsaved += 1
+            if self.flush_every and self._unsaved >= self.flush_every:
+                self._save_index()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        with open(self.path, "rb") as f:
+            f.seek(entry[0])
+            return json.loads(gzip.decompress(f.read(entry[1])))
+
+    def find(self, name, default=None):
+        """The record stored under a name, ignoring case."""
+        key = self._names.get(str(name).casefold())
+        return default if key is None else self.get(key, default)
+
+    def records(self):
+        """Stream the current record of every key, in the order they were written."""
+        entries = sorted(self._entries.values())
+        with open(self.path, "rb") as f:
+            for offset, length, _ in entries:
+                f.seek(offset)
+                yield json.loads(gzip.decompress(f.read(length)))
+
+    def flush(self):
+        """Save the index; everything appended so far is then found without a scan."""
+        with self._lock:
+            if self._file:
+                self._file.flush()
+            self._save_index()
+
+    def _save_index(self):
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"size": self._size, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+        self._unsaved = 0
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def compact(self):
+        """Rewrite the archive without replaced records."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            for record in self.records():
+                f.write(gzip.compress((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")))
+        self.close()
+        os.replace(temp_path, self.path)
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self.load()
+        self.flush()
+
+    def export_txt(self, output_dir, text_field="description", title_field="product_name"):
+        """Write the one-.txt-per-record view (title, blank line, text); returns the paths written.
+
+        Names that sanitize to the same file name get " (2)", " (3)", ... instead
+        of overwriting each other.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        taken, paths = set(), []
+        for record in self.records():
+            stem = safe_filename(str(record.get(self.name_field) or record[self.key]))
+            filename, n = f"{stem}.txt", 1
+            while filename.casefold() in taken:
+                n += 1
+                filename = f"{stem} ({n}).txt"
+            taken.add(filename.casefold())
+            path = os.path.join(output_dir, filename)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(f"{record.get(title_field) or record.get(self.name_field)}\n\n")
+                file.write(record.get(text_field) or "")
+            paths.append(path)
+        return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or export a packed archive")
+    parser.add_argument("archive")
+    parser.add_argument("--get", metavar="KEY", help="print the record stored under KEY")
+    parser.add_argument("--find", metavar="NAME", help="print the record stored under NAME")
+    parser.add_argument("--export-txt", metavar="DIR", help="write one .txt file per record to DIR")
+    parser.add_argument("--compact", action="store_true", help="drop replaced records from the archive")
+    args = parser.parse_args(argv)
+
+    archive = PackedArchive(args.archive)
+    if args.compact:
+        archive.compact()
+    if args.get or args.find:
+        record = archive.get(args.get) if args.get else archive.find(args.find)
+        print(json.dumps(record, indent=4, ensure_ascii=False))
+    if args.export_txt:
+        print(f"Wrote {len(archive.export_txt(args.export_txt))} files to {args.export_txt}")
+    if not (args.get or args.find or args.export_txt):
+        print(f"{len(archive)} records in {args.archive}")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Bounded producer/consumer pipelines of worker-thread stages.
+
+    pipeline = Pipeline("products")
+    pipeline.add_stage("fetch", fetch_page, workers=3)
+    pipeline.add_stage("parse", parse, workers=2)
+    pipeline.add_stage("write", write, workers=1)
+    results = pipeline.run(pages)
+
+Every stage has its own worker threads and an input queue holding at most
+`capacity` items (twice its workers by default). A stage function returns an
+iterable of items for the next stage, or None; generators are consumed as they
+produce, so a browser can hand over one dialog while it opens the next.
+Putting into a full queue blocks: a slow stage holds back the stages feeding
+it (backpressure) instead of letting work pile up in memory. The outputs of
+the last stage are returned by run(). An exception in a stage function is
+logged and counted and that item is dropped; the pipeline keeps running.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a pipeline with its workers, input queue and counters."""
+
+    def __init__(self, name, func, workers=1, capacity=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.capacity = capacity or 2 * self.workers
+        self.queue = queue.Queue(maxsize=self.capacity)
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0  # Waiting for room in the next stage's queue
+        self.peak_queue = 0
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "processed": self.processed,
+                "errors": self.errors,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "blocked_seconds": round(self.blocked_seconds, 3),
+                "peak_queue": self.peak_queue,
+            }
+
+
+class Pipeline:
+    """Stages connected by bounded queues, each run by its own worker threads."""
+
+    def __init__(self, name="pipeline"):
+        self.name = name
+        self.stages = []
+
+    def add_stage(self, name, func, workers=1, capacity=None):
+        stage = Stage(name, func, workers, capacity)
+        self.stages.append(stage)
+        return stage
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def run(self, source):
+        """Feed every item of `source` through the stages; returns the outputs of the last stage."""
+        results = []
+        results_lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def put(index, item):
+            """Hand an item to stage `index` (or collect it after the last stage); returns seconds blocked."""
+            if index == len(self.stages):
+                with results_lock:
+                    results.append(item)
+                return 0.0
+            stage = self.stages[index]
+            started = time.perf_counter()
+            stage.queue.put(item)
+            with stage._lock:
+                stage.peak_queue = max(stage.peak_queue, stage.queue.qsize())
+            return time.perf_counter() - started
+
+        def work(index):
+            stage = self.stages[index]
+            while True:
+                item = stage.queue.get()
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                blocked = 0.0
+                failed = False
+                try:
+                    for output in stage.func(item) or ():
+                        blocked += put(index + 1, output)
+                except Exception as e:
+                    failed = True
+                    logger.error(f"{self.name} pipeline: {stage.name} failed on {item!r:.80}: {e}")
+                with stage._lock:
+                    stage.processed += 1
+                    stage.errors += failed
+                    stage.blocked_seconds += blocked
+                    stage.busy_seconds += time.perf_counter() - started - blocked
+
+            # The last worker of a stage to finish closes the next stage
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    self.stages[index + 1].queue.put(_DONE)
+
+        threads = [
+            threading.Thread(target=work, args=(index,), name=f"{self.name}-{stage.name}-{n}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for item in source:
+                put(0, item)
+        finally:
+            if self.stages:
+                for _ in range(self.stages[0].workers):
+                    self.stages[0].queue.put(_DONE)
+            for thread in threads:
+                thread.join()
+        return results
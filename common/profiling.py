@@ -0,0 +1,145 @@
+"""Sampled cProfile/tracemalloc profiling of scraping scopes (parsing and storing of a page).
+
+Only one scope is profiled at a time and only a fraction of scopes is picked,
+so the profiler can stay enabled on production runs. Scopes that are not picked
+cost one random() call. tracemalloc is process-wide, so memory figures of a
+scope also include allocations made by other threads while it ran.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+
+class ScopeProfiler:
+    """Profiles sampled scopes and writes aggregated stats, collapsed stacks and memory peaks."""
+
+    def __init__(self, name, sample_rate=1.0, output_dir=".", enabled=False, stack_interval=0.005):
+        self.name = name
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.stack_interval = stack_interval
+        self._busy = threading.Lock()
+        self._stats = None
+        self._stacks = Counter()
+        self._allocations = Counter()
+        self._scopes = []
+        self._active_thread = None
+
+    def configure(self, enabled=True, sample_rate=None, output_dir=None):
+        """Switch profiling on (typically from a --profile command-line flag)."""
+        self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if output_dir is not None:
+            self.output_dir = output_dir
+
+    @contextmanager
+    def scope(self, label):
+        """Profile the with-block if profiling is on, it is sampled and no other scope is running.
+
+        The with-statement gets True when the block is profiled, so work that would
+        run elsewhere (in a worker process) can run on the profiled thread instead.
+        """
+        if not self.enabled or random.random() >= self.sample_rate or not self._busy.acquire(blocking=False):
+            yield False
+            return
+
+        profile = cProfile.Profile()
+        self._active_thread = threading.get_ident()
+        stop_sampling = threading.Event()
+        sampler = threading.Thread(target=self._sample_stacks, args=(self._active_thread, stop_sampling), daemon=True)
+        tracemalloc.start()
+        start = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            yield True
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            stop_sampling.set()
+            sampler.join()
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:20]
+            tracemalloc.stop()
+            self._record(label, profile, elapsed, current, peak, top)
+            self._active_thread = None
+            self._busy.release()
+
+    def _record(self, label, profile, elapsed, current, peak, top):
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+        for stat in top:
+            frame = stat.traceback[0]
+            self._allocations[f"{frame.filename}:{frame.lineno}"] += stat.size
+        self._scopes.append({
+            "scope": label,
+            "seconds": round(elapsed, 4),
+            "memory_peak_mb": round(peak / (1024 * 1024), 3),
+            "memory_retained_mb": round(current / (1024 * 1024), 3),
+        })
+
+    def _sample_stacks(self, thread_id, stop):
+        """Sample the profiled thread's stack for a collapsed-stack (flamegraph) file."""
+        while not stop.wait(self.stack_interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def dump(self):
+        """Write profile_<name>.pstats, _profile.txt, .collapsed and _scopes.json; return their paths."""
+        if not self._scopes:
+            return []
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile_{self.name}")
+        paths = [f"{base}.pstats", f"{base}_profile.txt", f"{base}.collapsed", f"{base}_scopes.json"]
+
+        self._stats.dump_stats(paths[0])
+
+        text = io.StringIO()
+        stats = pstats.Stats(paths[0], stream=text)
+        stats.sort_stats("cumulative").print_stats(50)
+        with open(paths[1], "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+
+        with open(paths[2], "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            "profiled_scopes": len(self._scopes),
+            "sample_rate": self.sample_rate,
+            "scopes": self._scopes,
+            "top_allocations_mb": {
+                site: round(size / (1024 * 1024), 3) for site, size in self._allocations.most_common(25)
+            },
+        }
+        with open(paths[3], "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4)
+        return paths
+
+
+def add_profile_arguments(parser):
+    """Add the shared --profile options to an argparse parser."""
+    parser.add_argument("--profile", action="store_true", help="profile a sample of the parse and write steps")
+    parser.add_argument("--profile-rate", type=float, default=0.1,
+                        help="fraction of pages/products to profile (default: 0.1)")
+    parser.add_argument("--profile-dir", default="profiles", help="where to write profiling output")
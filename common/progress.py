@@ -0,0 +1,265 @@
+"""Live progress of a scraping run: throughput, pages in flight, worker states, errors and ETA.
+
+Scrapers report events (page started/finished, item finished, worker state);
+a background thread renders a one-line summary to the terminal and/or writes
+the same snapshot as JSON to a status file. A small HTTP endpoint can serve
+the snapshot too, so a stall is visible while it happens.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+WINDOWS = (10, 60, 300)  # Seconds covered by the items/sec figures
+
+
+def format_seconds(seconds):
+    """Short human-readable duration, e.g. 1h02m or 45s."""
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{(seconds % 3600) // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressTracker:
+    """Thread-safe progress counters for one pipeline, with optional live reporting."""
+
+    def __init__(self, pipeline, windows=WINDOWS, stall_after=120):
+        self.pipeline = pipeline
+        self.windows = tuple(sorted(windows))
+        self.stall_after = stall_after
+        self.total_pages = None
+        self.total_items = None
+        self.render = False
+        self.status_file = None
+        self.port = None
+        self.interval = 2.0
+        self._lock = threading.Lock()
+        self._events = deque()  # (timestamp, failed) of recently finished items
+        self._counts = {"ok": 0, "failed": 0, "skipped": 0}
+        self._pages_in_flight = {}
+        self._pages_done = 0
+        self._page_sizes = {}
+        self._workers = {}
+        self._started = time.monotonic()
+        self._last_item = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def configure(self, render=None, status_file=None, port=None, interval=None):
+        """Choose the live outputs (typically from the --progress command-line flags)."""
+        if render is not None:
+            self.render = render
+        if status_file is not None:
+            self.status_file = status_file
+        if port is not None:
+            self.port = port
+        if interval is not None:
+            self.interval = interval
+
+    def set_totals(self, pages=None, items=None):
+        with self._lock:
+            if pages is not None:
+                self.total_pages = pages
+            if items is not None:
+                self.total_items = items
+
+    # --- events reported by the scrapers ---
+
+    def page_started(self, page):
+        with self._lock:
+            self._pages_in_flight[page] = time.monotonic()
+
+    def page_found(self, page, items):
+        """Record how many items a page lists; used to estimate the total when it is unknown."""
+        with self._lock:
+            self._page_sizes[page] = items
+
+    def page_finished(self, page):
+        with self._lock:
+            if self._pages_in_flight.pop(page, None) is not None:
+                self._pages_done += 1
+
+    def worker_state(self, state, page=None, item=None):
+        """Set what the calling worker thread is doing right now."""
+        with self._lock:
+            self._workers[threading.current_thread().name] = {
+                "state": state, "page": page, "item": item, "since": time.monotonic()}
+
+    def item_finished(self, status="ok"):
+        """Count one item as "ok", "failed" or "skipped"."""
+        now = time.monotonic()
+        with self._lock:
+            self._counts[status] += 1
+            self._last_item = now
+            if status != "skipped":
+                self._events.append((now, status == "failed"))
+            self._prune(now)
+
+    def _prune(self, now):
+        horizon = now - self.windows[-1]
+        while self._events and self._events[0][0] < horizon:
+            self._events.popleft()
+
+    # --- reporting ---
+
+    def snapshot(self, now=None):
+        """Current progress as a JSON-serializable dict."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._prune(now)
+            elapsed = max(now - self._started, 1e-9)
+            rates = {}
+            for window in self.windows:
+                recent = sum(1 for t, _ in self._events if t >= now - window)
+                rates[f"{window}s"] = round(recent / min(window, elapsed), 3)
+            recent_errors = sum(1 for _, failed in self._events if failed)
+
+            done = sum(self._counts.values())
+            attempted = self._counts["ok"] + self._counts["failed"]
+            total = self.total_items
+            if total is None and self.total_pages and self._page_sizes:
+                average = sum(self._page_sizes.values()) / len(self._page_sizes)
+                total = round(average * self.total_pages)
+
+            rate = rates[f"{self.windows[len(self.windows) // 2]}s"]  # Middle window, 60s by default
+            eta = None
+            if total is not None and rate > 0:
+                eta = max(total - done, 0) / rate
+
+            idle = None if self._last_item is None else now - self._last_item
+            stalled = (idle if idle is not None else elapsed) > self.stall_after  # No item finished for a while
+
+            return {
+                "pipeline": self.pipeline,
+                "updated": time.time(),
+                "elapsed_seconds": round(elapsed, 1),
+                "items": dict(self._counts, total=total),
+                "items_per_second": rates,
+                "error_rate": round(self._counts["failed"] / attempted, 4) if attempted else 0.0,
+                "recent_error_rate": round(recent_errors / len(self._events), 4) if self._events else 0.0,
+                "pages": {
+                    "done": self._pages_done,
+                    "total": self.total_pages,
+                    "in_flight": sorted(self._pages_in_flight),
+                },
+                "workers": {
+                    name: dict(worker, seconds=round(now - worker["since"], 1))
+                    for name, worker in sorted(self._workers.items())
+                },
+                "eta_seconds": None if eta is None else round(eta),
+                "seconds_since_last_item": None if idle is None else round(idle, 1),
+                "stalled": stalled,
+            }
+
+    def render_line(self, snapshot=None):
+        """One-line terminal summary of a snapshot."""
+        s = snapshot or self.snapshot()
+        items = s["items"]
+        rates = " ".join(f"{rate:.2f}/s@{window}" for window, rate in s["items_per_second"].items())
+        pages = s["pages"]
+        workers = ", ".join(
+            f"{name}:{w['state']}" + (f" p{w['page']}" if w["page"] is not None else "")
+            for name, w in s["workers"].items())
+        line = (f"[{s['pipeline']}] {items['ok']} ok {items['failed']} failed {items['skipped']} skipped"
+                f" | {rates} | err {s['error_rate']:.1%}"
+                f" | pages {pages['done']}/{pages['total'] or '?'} ({len(pages['in_flight'])} in flight)"
+                f" | ETA {format_seconds(s['eta_seconds'])}")
+        if workers:
+            line += f" | {workers}"
+        if s["stalled"]:
+            line += f" | STALLED {format_seconds(s['seconds_since_last_item'])}"
+        return line
+
+    def write_status(self, path=None, snapshot=None):
+        """Atomically write the snapshot as JSON so readers never see a partial file."""
+        path = path or self.status_file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot or self.snapshot(), f, indent=4)
+        os.replace(temp_path, path)
+
+    def start(self, stream=None):
+        """Start the reporter thread (and HTTP endpoint) if any live output was configured."""
+        if self._thread is not None or not (self.render or self.status_file or self.port is not None):
+            return
+        self._stream = stream or sys.stderr
+        self._stop.clear()
+        if self.port is not None:
+            from http.server import ThreadingHTTPServer  # Only needed for --status-port
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+            threading.Thread(target=self._server.serve_forever, name="progress-http", daemon=True).start()
+        self._thread = threading.Thread(target=self._report_loop, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop reporting after one final update."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _report_loop(self):
+        while True:
+            stopping = self._stop.wait(self.interval)
+            self._report(final=stopping)
+            if stopping:
+                return
+
+    def _report(self, final=False):
+        snapshot = self.snapshot()
+        if self.status_file:
+            try:
+                self.write_status(snapshot=snapshot)
+            except OSError:
+                pass
+        if self.render:
+            line = self.render_line(snapshot)
+            if self._stream.isatty():
+                self._stream.write("\r\033[K" + line + ("\n" if final else ""))
+            else:
+                self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def _handler(self):
+        from http.server import BaseHTTPRequestHandler
+        tracker = self
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(tracker.snapshot(), indent=4).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return StatusHandler
+
+
+def add_progress_arguments(parser):
+    """Add the shared live-progress options to an argparse parser."""
+    parser.add_argument("--progress", action="store_true", help="show live throughput and ETA in the terminal")
+    parser.add_argument("--status-file", help="keep a JSON progress snapshot in this file")
+    parser.add_argument("--status-port", type=int, help="serve the progress snapshot on http://127.0.0.1:PORT/")
+
+
+def configure_from_args(tracker, args):
+    """Apply the --progress/--status-file/--status-port options to a tracker."""
+    tracker.configure(render=args.progress, status_file=args.status_file, port=args.status_port)
@@ -0,0 +1,52 @@
+"""Token-bucket rate limiting for requests shared by several worker threads.
+
+The bucket holds up to `capacity` tokens and gains `rate` tokens per second.
+Every request takes one token, waiting for it when the bucket is empty, so
+requests average `rate` per second across all threads while short bursts of up
+to `capacity` go out at once. Unlike a fixed sleep after each request, time a
+worker spends on the page itself counts towards the spacing.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take `tokens` if they are available now; returns whether they were taken."""
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Take `tokens`, waiting for them as long as needed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(self.clock())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
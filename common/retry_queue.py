@@ -0,0 +1,115 @@
+"""Persistent retry queue with exponential backoff for items that failed to scrape.
+
+Workers push a failed item and move on; after the main pass one worker drains
+the queue, waiting for each item's backoff (base_delay * 2 ** (attempts - 1),
+capped at max_delay) before trying it again. An item that fails max_attempts
+times in total is moved to the exhausted list and not tried again, until it
+succeeds some other way and is discarded. The queue is saved after every
+change, so items still pending when a run stops are retried by the next one.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class RetryQueue:
+    """Failed items by key, with attempt counts and the time each is due again."""
+
+    def __init__(self, path=None, max_attempts=4, base_delay=5.0, max_delay=300.0, clock=time.time, sleep=time.sleep):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.exhausted = {}
+        self.last_exhausted = []  # Keys that used up their attempts in the most recent drain()
+        self.load()
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._pending = data.get("pending", {})
+                self.exhausted = data.get("exhausted", {})
+            except (OSError, ValueError):
+                pass
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"pending": self._pending, "exhausted": self.exhausted}, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, key):
+        return key in self._pending
+
+    def payloads(self, exhausted=False):
+        """Payloads of the pending items by key, and of the exhausted ones too if `exhausted`."""
+        with self._lock:
+            entries = {**self.exhausted, **self._pending} if exhausted else self._pending
+            return {key: entry["payload"] for key, entry in entries.items()}
+
+    def delay(self, attempts):
+        """Seconds to wait before the next try after `attempts` failed ones."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+
+    def push(self, key, payload, error=None):
+        """Record a failed attempt; returns False once the item has used up its attempts."""
+        with self._lock:
+            attempts = self._pending.pop(key, {}).get("attempts", 0) + 1
+            entry = {"payload": payload, "attempts": attempts, "error": error}
+            if attempts >= self.max_attempts:
+                self.exhausted[key] = entry
+                retry = False
+            else:
+                entry["next_attempt"] = self.clock() + self.delay(attempts)
+                self._pending[key] = entry
+                retry = True
+            self.save()
+        return retry
+
+    def discard(self, key):
+        """Forget an item that has succeeded, whether it is pending or was given up before."""
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            exhausted = self.exhausted.pop(key, None)
+            if pending is not None or exhausted is not None:
+                self.save()
+
+    def drain(self, handler):
+        """Retry pending items in due order until none are left; returns how many succeeded.
+
+        handler(payload) returns a true value on success; exceptions count as failures.
+        The keys given up on during this drain are left in last_exhausted.
+        """
+        succeeded = 0
+        self.last_exhausted = []
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return succeeded
+                key = min(self._pending, key=lambda k: self._pending[k]["next_attempt"])
+                entry = self._pending[key]
+            wait = entry["next_attempt"] - self.clock()
+            if wait > 0:
+                self.sleep(wait)
+            try:
+                ok, error = bool(handler(entry["payload"])), None
+            except Exception as e:
+                ok, error = False, str(e)
+            if ok:
+                self.discard(key)
+                succeeded += 1
+            elif not self.push(key, entry["payload"], error):
+                self.last_exhausted.append(key)
@@ -0,0 +1,30 @@
+"""Locations of the scraper scripts and a loader for them.
+
+The scripts live in folders whose names are not importable (spaces, no
+package), so they are loaded by path, with their folder on sys.path for
+sibling imports such as `countries`.
+"""
+
+import importlib.util
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT_PATHS = {
+    "products": os.path.join(REPO_ROOT, "task1", "products", "Products.py"),
+    "brands": os.path.join(REPO_ROOT, "task1", "brands", "brand.py"),
+    "raw-materials": os.path.join(REPO_ROOT, "task1", "raw material", "raw_materials.py"),
+    "newdirections": os.path.join(REPO_ROOT, "task 2", "INCI1.py"),
+}
+
+
+def load_script(path, name):
+    """Import a scraper script by path under the given module name."""
+    script_dir = os.path.dirname(path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
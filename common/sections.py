@@ -0,0 +1,207 @@
+"""Split New Directions product descriptions into structured fields.
+
+The .productView-description text is a run of sections under upper-case
+headings (FEATURES AND BENEFITS, DESCRIPTION, DIRECTIONS AND SUGGESTED USAGE,
+MORE ABOUT ...). Other upper-case lines open a section of their own only if
+they name one (SAFETY NOTES, STORAGE, ...), so emphasised text such as
+"100% PURE" stays in its section. Feature and usage sections are
+"Title: text" lines, and the MORE ABOUT section holds "Key: value"
+specifications (INCI Name, Origin, Shelf Life, ...). parse_description() returns
+
+    {"title": ..., "inci_name": ..., "cas_numbers": [...], "origin": ...,
+     "specifications": {key: value}, "features": [{"title", "text"}],
+     "usage": [{"title", "text"}], "description": ..., "sections": {name: text}}
+
+Headings repeat across thousands of products, so heading detection is
+memoized. Whole output folders or packed archives are parsed in worker
+processes:
+
+    python -m common.sections product_details -o newdirections_sections.jsonl
+    python -m common.sections newdirections_products.jsonl.gz --workers 8
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import json
+import os
+import re
+
+# Section name -> keywords searched for in an all upper-case heading
+SECTION_PATTERNS = [
+    ("features", re.compile(r"FEATURES|BENEFITS")),
+    ("usage", re.compile(r"DIRECTIONS|USAGE|HOW TO USE|APPLICATIONS")),
+    ("specifications", re.compile(r"^MORE ABOUT|SPECIFICATIONS|TECHNICAL|PRODUCT INFORMATION")),
+    ("description", re.compile(r"^DESCRIPTION|^ABOUT|^OVERVIEW")),
+    ("details", re.compile(r"^PRODUCT DETAILS$")),
+]
+# Section name -> pattern a mixed-case heading must match as a whole (upper-cased),
+# so a short sentence that mentions "benefits" or "applications" stays text
+HEADING_PATTERNS = [
+    ("features", re.compile(r"(KEY )?(FEATURES|BENEFITS)( (AND|&) (FEATURES|BENEFITS))?")),
+    ("usage", re.compile(r"(SUGGESTED )?(DIRECTIONS|USAGE|HOW TO USE|APPLICATIONS)"
+                         r"( (AND|&) (SUGGESTED )?(DIRECTIONS|USAGE|APPLICATIONS))?")),
+    ("specifications", re.compile(r"MORE ABOUT( [\w'-]+){1,6}|(PRODUCT |TECHNICAL )?SPECIFICATIONS|PRODUCT INFORMATION")),
+    ("description", re.compile(r"(PRODUCT )?DESCRIPTION|ABOUT THIS PRODUCT|OVERVIEW")),
+    ("details", re.compile(r"PRODUCT DETAILS")),
+]
+# Words that make any other short upper-case line a heading, kept under its own name
+OTHER_HEADING_RE = re.compile(r"\b(NOTES?|WARNINGS?|CAUTIONS?|PRECAUTIONS|SAFETY|STORAGE|INGREDIENTS|"
+                              r"CERTIFICATIONS?|PACKAGING|SHIPPING|DISCLAIMER|COMPOSITION|PROPERTIES)\b")
+LIST_SECTIONS = ("features", "usage")
+
+# Specification keys that are spelled several ways
+FIELD_ALIASES = {
+    "inci": "inci_name",
+    "inci_names": "inci_name",
+    "cas": "cas_number",
+    "cas_no": "cas_number",
+    "cas_numbers": "cas_number",
+    "cas_#": "cas_number",
+    "country_of_origin": "origin",
+}
+
+_LABELLED_RE = re.compile(r"^\s*([A-Z][\w#./&()' -]{0,48}?)\s*:\s*(.+?)\s*$")
+_CAS_RE = re.compile(r"\b\d{2,7}-\d{2}-\d\b")
+_KEY_RE = re.compile(r"[^\w#]+")
+_HEADING_WORDS_RE = re.compile(r"[A-Za-z]")
+
+
+@functools.lru_cache(maxsize=4096)
+def section_name(line):
+    """The section a heading line opens, or None if the line is not a heading."""
+    text = line.strip()
+    if not text or len(text) > 80 or ":" in text or not _HEADING_WORDS_RE.search(text):
+        return None
+    upper = text.upper()
+    if text != upper:
+        for name, pattern in HEADING_PATTERNS:
+            if pattern.fullmatch(upper):
+                return name
+        return None
+    for name, pattern in SECTION_PATTERNS:
+        if pattern.search(upper):
+            return name
+    if len(text.split()) <= 10 and OTHER_HEADING_RE.search(upper):
+        return _KEY_RE.sub("_", text.lower()).strip("_")
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def field_key(label):
+    key = _KEY_RE.sub("_", label.lower()).strip("_")
+    return FIELD_ALIASES.get(key, key)
+
+
+def labelled(line):
+    """("Title", "text") for a "Title: text" line, else None."""
+    match = _LABELLED_RE.match(line)
+    if match and len(match.group(1).split()) <= 6:
+        return match.group(1), match.group(2)
+    return None
+
+
+def parse_description(text, title=None):
+    """Structured fields of one product description (see the module docstring)."""
+    lines = text.splitlines()
+    if title is None and len(lines) > 1 and not lines[1].strip():
+        title, lines = lines[0].strip(), lines[2:]  # The saved .txt layout: title, blank line, description
+
+    sections, order, current = {}, [], "intro"
+    for line in lines:
+        name = section_name(line)
+        if name:
+            current = name
+            if name not in sections:
+                sections[name] = []
+                order.append(name)
+            continue
+        if line.strip():
+            sections.setdefault(current, []).append(line.strip())
+            if current not in order:
+                order.append(current)
+
+    result = {"title": title, "inci_name": None, "cas_numbers": sorted(set(_CAS_RE.findall(text))),
+              "origin": None, "specifications": {}, "features": [], "usage": [], "description": None,
+              "sections": {}}
+    for name in order:
+        body = sections[name]
+        if name in LIST_SECTIONS:
+            for line in body:
+                pair = labelled(line)
+                result[name].append({"title": pair[0], "text": pair[1]} if pair else {"title": None, "text": line})
+            continue
+        if name == "specifications":
+            unlabelled = []
+            for line in body:
+                pair = labelled(line)
+                if pair:
+                    result["specifications"][field_key(pair[0])] = pair[1]
+                else:
+                    unlabelled.append(line)
+            body = unlabelled
+        if name == "description":
+            result["description"] = "\n".join(body)
+        elif body:
+            result["sections"][name] = "\n".join(body)
+
+    specifications = result["specifications"]
+    result["inci_name"] = specifications.get("inci_name")
+    result["origin"] = specifications.get("origin")
+    if specifications.get("cas_number"):
+        result["cas_numbers"] = sorted(set(result["cas_numbers"]) | set(_CAS_RE.findall(specifications["cas_number"])))
+    return result
+
+
+def parse_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        parsed = parse_description(f.read())
+    parsed["source"] = os.path.basename(path)
+    return parsed
+
+
+def parse_record(record):
+    """Parse one record of the packed New Directions archive, keeping its URL, name and scrape time."""
+    parsed = parse_description(record.get("description") or "", title=record.get("product_name"))
+    for field in ("url", "name", "scraped_at"):
+        parsed[field] = record.get(field)
+    return parsed
+
+
+def parse_source(source, workers=None, chunksize=32):
+    """Parse every product of an output folder (*.txt) or packed archive (*.jsonl.gz) in worker processes.
+
+    Yields parsed records in input order.
+    """
+    if os.path.isdir(source):
+        func = parse_file
+        items = sorted(os.path.join(source, name) for name in os.listdir(source) if name.endswith(".txt"))
+    else:
+        from common.packed import PackedArchive
+        func = parse_record
+        items = PackedArchive(source).records()
+    if workers == 1:
+        yield from map(func, items)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, items, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse New Directions product descriptions into JSON Lines")
+    parser.add_argument("source", help="folder of .txt files or packed archive (.jsonl.gz)")
+    parser.add_argument("-o", "--output", default="newdirections_sections.jsonl", help="JSON Lines file to write")
+    parser.add_argument("--workers", type=int, help="parser processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    count = 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        for parsed in parse_source(args.source, args.workers):
+            f.write(json.dumps(parsed, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"Parsed {count} products from {args.source} into {args.output}")
+    return args.output
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import json
+import os
+import pytest
+from common.catalog import CatalogWriter, count_records, main, read_catalog, repair_tail, write_catalog
+
+PRODUCTS = [
+    {"name": "Rose Cream", "brand": "Lavera", "ingredients": "Aqua, Rosa Damascena Flower Water"},
+    {"name": "Aloe Gel", "brand": "Weleda", "ingredients": "Aloe Barbadensis Leaf Juice"},
+    {"name": "Neem Soap", "brand": "Lavera", "ingredients": "Sodium Olivate"},
+]
+
+def test_records_stream_with_projection_and_filters(tmp_path):
+    """Records come back one at a time, reduced to the asked-for fields and matching the filter."""
+    path = str(tmp_path / "products.jsonl.gz")
+    assert write_catalog(PRODUCTS, path) == 3
+    assert list(read_catalog(path)) == PRODUCTS
+    assert list(read_catalog(path, fields=["name"], where={"brand": "Lavera"})) == [{"name": "Rose Cream"}, {"name": "Neem Soap"}]
+    assert [r["name"] for r in read_catalog(path, where=lambda r: "Aqua" in r["ingredients"])] == ["Rose Cream"]
+    assert count_records(path, where={"brand": "Weleda"}) == 1
+
+def test_dict_filter_compares_values_not_substrings(tmp_path):
+    """The cheap line test only pre-selects; a value appearing in another field does not match."""
+    path = str(tmp_path / "products.jsonl.gz")
+    write_catalog([{"name": "Lavera", "brand": "Other"}, {"name": "X", "brand": "Lavera"}], path)
+    assert [r["name"] for r in read_catalog(path, where={"brand": "Lavera"})] == ["X"]
+
+def test_appends_survive_reopening_and_a_crash(tmp_path):
+    """Each writer session adds to the file; after a crash the flushed records are kept and appends go on."""
+    path = str(tmp_path / "products.jsonl.gz")
+    writer = CatalogWriter(path)
+    writer.append(PRODUCTS[0])
+    writer.close()
+    crashed = CatalogWriter(path, sync=True)
+    crashed.append(PRODUCTS[1])
+    flushed = os.path.getsize(path)
+    crashed.append(PRODUCTS[2])
+    with open(path, "r+b") as f:
+        f.truncate(flushed + 3)  # The process died while writing the last record
+    assert [r["name"] for r in read_catalog(path)] == ["Rose Cream", "Aloe Gel"]
+
+    writer = CatalogWriter(path)
+    writer.append(PRODUCTS[2])
+    writer.close()
+    assert [r["name"] for r in read_catalog(path)] == ["Rose Cream", "Aloe Gel", "Neem Soap"]
+    assert repair_tail(path) == 0
+
+def test_plain_and_gzip_catalogs_hold_the_same_records(tmp_path):
+    """Uncompressed .jsonl works too, and gzip makes the file smaller."""
+    products = PRODUCTS * 200
+    write_catalog(products, str(tmp_path / "p.jsonl"))
+    write_catalog(products, str(tmp_path / "p.jsonl.gz"))
+    assert list(read_catalog(str(tmp_path / "p.jsonl"))) == list(read_catalog(str(tmp_path / "p.jsonl.gz")))
+    assert (tmp_path / "p.jsonl.gz").stat().st_size < (tmp_path / "p.jsonl").stat().st_size / 5
+
+def test_zstd_catalog_needs_the_zstandard_package(tmp_path):
+    """.zst catalogs round-trip when zstandard is installed and fail with a clear message otherwise."""
+    path = str(tmp_path / "products.jsonl.zst")
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError, match="zstandard"):
+            write_catalog(PRODUCTS, path)
+        return
+    write_catalog(PRODUCTS, path)
+    assert list(read_catalog(path, fields=["brand"])) == [{"brand": p["brand"]} for p in PRODUCTS]
+
+def test_convert_a_json_store(tmp_path, capsys):
+    """An indented JSON store converts to a catalog that reads back the same records."""
+    (tmp_path / "store.json").write_text(json.dumps({"products": PRODUCTS}, indent=4), encoding="utf-8")
+    assert main(["convert", str(tmp_path / "store.json"), str(tmp_path / "store.jsonl.gz")]) == 3
+    assert main(["read", str(tmp_path / "store.jsonl.gz"), "--fields", "name", "--where", "brand=Weleda"]) == 1
+    assert json.loads(capsys.readouterr().out.splitlines()[-1]) == {"name": "Aloe Gel"}
@@ -0,0 +1,121 @@
+import argparse
+import json
+import pandas as pd
+import pytest
+from common import cli
+
+@pytest.fixture
+def products(monkeypatch):
+    """The products script with run() stubbed out and its constants restored afterwards."""
+    module = cli.script("products")
+    calls = []
+    for name in ("FIRST_PAGE", "TOTAL_PAGES", "MAX_WORKERS", "SINKS", "PAGE_URL_TEMPLATE", "BASE_URL"):
+        monkeypatch.setattr(module, name, getattr(module, name))
+    monkeypatch.setattr(module, "configure_run", lambda args: calls.append(("configure", args)))
+    monkeypatch.setattr(module, "run", lambda: calls.append(("run", module.PAGE_URL_TEMPLATE)))
+    return module, calls
+
+def test_page_range():
+    """Single pages, closed and open ranges are accepted; nonsense is rejected."""
+    assert cli.page_range("5") == (5, 5)
+    assert cli.page_range("3-10") == (3, 10)
+    assert cli.page_range("3-") == (3, None)
+    for bad in ("0", "10-3", "a-b"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            cli.page_range(bad)
+
+def test_products_options_set_script_constants(products, tmp_path):
+    """Concurrency, page range and sinks are applied before the script runs."""
+    module, calls = products
+    cli.main(["products", "--pages", "2-4", "--workers", "5", "--sinks", "json", "--data-dir", str(tmp_path / "out")])
+    assert (module.FIRST_PAGE, module.TOTAL_PAGES, module.MAX_WORKERS, module.SINKS) == (2, 4, 5, ("json",))
+    assert [call[0] for call in calls] == ["configure", "run"]
+    assert (tmp_path / "out").is_dir()
+
+def test_config_file_supplies_defaults(products, tmp_path):
+    """Values from --config are used unless given on the command line."""
+    module, _ = products
+    config = tmp_path / "run.json"
+    config.write_text(json.dumps({"workers": 7, "pages": "1-3", "sinks": ["excel"]}), encoding="utf-8")
+    cli.main(["products", "--config", str(config), "--workers", "2"])
+    assert (module.FIRST_PAGE, module.TOTAL_PAGES, module.MAX_WORKERS, module.SINKS) == (1, 3, 2, ("excel",))
+
+def test_replay_backend_points_the_script_at_a_local_server(products, monkeypatch):
+    """--backend replay runs against the local replay server."""
+    from benchmarks.replay_server import ReplayCatalog
+    monkeypatch.setattr(ReplayCatalog, "from_scraped_files", classmethod(lambda cls: cls([{"name": "A"}], [])))
+    _, calls = products
+    cli.main(["products", "--backend", "replay", "--pages", "1"])
+    assert calls[-1][1].startswith("http://127.0.0.1:")
+
+def test_export_formats(tmp_path):
+    """Stores are exported as CSV and JSON Lines, ignoring torn trailing writes."""
+    store = {"products": [{"name": "A", "brand": "X"}, {"name": "B", "brand": "Y"}]}
+    (tmp_path / "natrue_product_details.json").write_text(json.dumps(store) + '{"torn', encoding="utf-8")
+
+    csv_path = cli.main(["export", "products", "--data-dir", str(tmp_path), "-o", str(tmp_path / "p.csv")])
+    assert pd.read_csv(csv_path)["name"].tolist() == ["A", "B"]
+
+    jsonl_path = cli.main(["export", "products", "--format", "jsonl", "--data-dir", str(tmp_path),
+                           "-o", str(tmp_path / "p.jsonl")])
+    lines = open(jsonl_path, encoding="utf-8").read().splitlines()
+    assert [json.loads(line)["brand"] for line in lines] == ["X", "Y"]
+
+def test_export_reads_the_packed_new_directions_archive(tmp_path):
+    """The New Directions archive exports like the other stores, with one row per URL."""
+    from common.packed import PackedArchive
+    archive = PackedArchive(str(tmp_path / "newdirections_products.jsonl.gz"))
+    for name in ("Jojoba Oil", "Shea Butter", "Jojoba Oil"):
+        archive.append({"url": f"https://example.test/{name}", "name": name, "description": "..."})
+    archive.close()
+
+    csv_path = cli.main(["export", "newdirections", "--data-dir", str(tmp_path), "-o", str(tmp_path / "nd.csv")])
+    assert pd.read_csv(csv_path)["name"].tolist() == ["Shea Butter", "Jojoba Oil"]
+
+def test_newdirections_headless_option_reaches_the_browser(monkeypatch, tmp_path):
+    """Browsers are headless unless --no-headless is given, and the scraper's config decides."""
+    module = cli.script("newdirections")
+    runs = []
+    monkeypatch.setattr(module, "run", lambda args, **config: runs.append(config))
+    cli.main(["newdirections", "--data-dir", str(tmp_path)])
+    cli.main(["newdirections", "--no-headless", "--data-dir", str(tmp_path)])
+    assert runs == [{}, {"headless": False}]
+
+    started = []
+    monkeypatch.setattr(module.webdriver, "Chrome", lambda service, options: started.append(options.arguments) or
+                        argparse.Namespace(set_page_load_timeout=lambda seconds: None))
+    scraper = module.NewDirectionsScraper.__new__(module.NewDirectionsScraper)
+    scraper.timer, scraper.chrome_driver_path = module.StageTimer("test"), None
+    for headless in (True, False):
+        scraper.config = {"headless": headless, "timeout": 60}
+        scraper.get_browser()
+    assert ["--headless" in arguments for arguments in started] == [True, False]
+
+def test_newdirections_runs_the_scraper_with_its_run_options(monkeypatch, tmp_path):
+    """The real run() gets every option it reads: profile and progress flags as well as the config."""
+    module = cli.script("newdirections")
+    built = []
+
+    class FakeScraper:
+        def __init__(self, **config):
+            self.config = config
+            self.progress = module.ProgressTracker("test")
+            self.profiler = module.ScopeProfiler("test")
+            built.append(self)
+
+        def scrape(self):
+            self.scraped = True
+
+    monkeypatch.setattr(module, "NewDirectionsScraper", FakeScraper)
+    cli.main(["newdirections", "--headless", "--workers", "3", "--profile", "--profile-rate", "0.5",
+              "--data-dir", str(tmp_path)])
+    assert built[0].config == {"headless": True, "max_workers": 3}
+    assert built[0].scraped and built[0].profiler.enabled and built[0].profiler.sample_rate == 0.5
+
+def test_bench_passes_options_through(monkeypatch):
+    """bench forwards its remaining options to the benchmark's own parser."""
+    import benchmarks.bench_persistence
+    seen = []
+    monkeypatch.setattr(benchmarks.bench_persistence, "main", lambda argv: seen.append(argv))
+    cli.main(["bench", "persistence", "--scales", "10", "--sample", "2"])
+    assert seen == [["--scales", "10", "--sample", "2"]]
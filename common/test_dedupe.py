@@ -0,0 +1,71 @@
+import pandas as pd
+from common.dedupe import (
+    normalize_text,
+    record_key,
+    frame_keys,
+    dedupe_records,
+    shingles,
+    MinHasher,
+    find_near_duplicates
+)
+
+def test_normalize_text():
+    """Case, whitespace and NaN differences are normalized away."""
+    assert normalize_text("  Hand   CREAM ") == "hand cream"
+    assert normalize_text(None) == ""
+    assert normalize_text(float("nan")) == ""
+
+def test_record_key_uses_brand_and_manufacturer():
+    """Same name under different brands gives different keys."""
+    a = {"name": "Shampoo", "brand": "Weleda", "manufacturer": "Weleda AG"}
+    b = {"name": "Shampoo", "brand": "Lavera", "manufacturer": "Laverana GmbH"}
+    c = {"name": "SHAMPOO ", "brand": "weleda", "manufacturer": "Weleda AG"}
+    assert record_key(a) != record_key(b)
+    assert record_key(a) == record_key(c)
+
+def test_frame_keys_match_record_keys():
+    """DataFrame rows hash the same way as dict records."""
+    records = [{"name": "A", "brand": "B", "manufacturer": "C"}, {"name": "A", "brand": None, "manufacturer": ""}]
+    df = pd.DataFrame(records)
+    assert frame_keys(df) == [record_key(r) for r in records]
+
+def test_dedupe_records_keeps_first():
+    """Exact composite duplicates are dropped, the first one is kept."""
+    records = [
+        {"name": "Lipbalm", "brand": "X", "manufacturer": "X", "page_number": 1},
+        {"name": "Lipbalm", "brand": "Y", "manufacturer": "Y", "page_number": 1},
+        {"name": "lipbalm", "brand": "x", "manufacturer": "X", "page_number": 2},
+    ]
+    unique = list(dedupe_records(records))
+    assert [r["brand"] for r in unique] == ["X", "Y"]
+
+def test_shingles():
+    """Short texts give words, longer ones word trigrams."""
+    assert shingles("Aqua, Glycerin") == {"aqua", "glycerin"}
+    assert shingles("a b c d") == {"a b c", "b c d"}
+
+def test_minhash_signature_is_deterministic():
+    """The same tokens always give the same signature."""
+    hasher = MinHasher(num_perm=32)
+    tokens = {"aqua", "glycerin", "parfum"}
+    assert (hasher.signature(tokens) == MinHasher(num_perm=32).signature(tokens)).all()
+    assert len(hasher.signature(set())) == 32
+
+def test_find_near_duplicates():
+    """Near-identical products are paired, unrelated ones are not."""
+    ingredients = "Aqua, Helianthus Annuus Seed Oil, Glycerin, Cetearyl Alcohol, Tocopherol, Parfum, Limonene"
+    records = [
+        {"name": "Arnica Massage Oil", "ingredients": ingredients},
+        {"name": "Arnica Massage Oil", "ingredients": ingredients + ", Linalool"},
+        {"name": "Mint Toothpaste", "ingredients": "Calcium Carbonate, Silica, Mentha Piperita Oil, Xylitol"},
+        {"name": "", "ingredients": ""},
+        {"name": "", "ingredients": ""},
+    ]
+    pairs = find_near_duplicates(records, threshold=0.5)
+    assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+    assert 0.5 <= pairs[0][2] <= 1.0
+
+def test_find_near_duplicates_scales_without_pairwise_compare():
+    """Many distinct records produce few candidate pairs."""
+    records = [{"name": f"Product {i} cream", "ingredients": f"Aqua, Extract {i}, Oil {i * 7}"} for i in range(2000)]
+    assert find_near_duplicates(records, threshold=0.9) == []
@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from common import driver_cache
+from common.driver_cache import resolve_chromedriver, read_cache, write_cache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    """Every test starts without the in-process memo and driver environment variables."""
+    driver_cache._resolved.clear()
+    for name in ("CHROMEDRIVER", "SCRAPER_DRIVER_OFFLINE", "SCRAPER_DRIVER_CACHE"):
+        monkeypatch.delenv(name, raising=False)
+    yield
+    driver_cache._resolved.clear()
+
+@pytest.fixture
+def fake_driver(tmp_path):
+    path = tmp_path / "chromedriver"
+    path.write_text("binary")
+    return str(path)
+
+def counting_install(path):
+    calls = []
+
+    def install():
+        calls.append(1)
+        return path
+    return install, calls
+
+def test_lookup_happens_once(tmp_path, fake_driver):
+    """The first call installs and caches; later calls (even in a new process) reuse it."""
+    cache_file = str(tmp_path / "cache.json")
+    install, calls = counting_install(fake_driver)
+    assert resolve_chromedriver(cache_file=cache_file, install=install) == fake_driver
+    assert resolve_chromedriver(cache_file=cache_file, install=install) == fake_driver
+
+    driver_cache._resolved.clear()  # As seen by another process
+    assert resolve_chromedriver(cache_file=cache_file, install=install) == fake_driver
+    assert len(calls) == 1
+    assert read_cache(cache_file)["path"] == fake_driver
+
+def test_expired_or_missing_driver_is_resolved_again(tmp_path, fake_driver):
+    """Stale entries and deleted binaries trigger a new lookup."""
+    cache_file = str(tmp_path / "cache.json")
+    write_cache(cache_file, str(tmp_path / "gone"))
+    install, calls = counting_install(fake_driver)
+    assert resolve_chromedriver(cache_file=cache_file, install=install) == fake_driver
+
+    driver_cache._resolved.clear()
+    assert resolve_chromedriver(cache_file=cache_file, max_age=0, install=install) == fake_driver
+    assert len(calls) == 2
+
+def test_failed_lookup_falls_back_to_stale_cache(tmp_path, fake_driver):
+    """Without network an expired cached driver is still used."""
+    cache_file = str(tmp_path / "cache.json")
+    write_cache(cache_file, fake_driver)
+
+    def offline_install():
+        raise ConnectionError("Could not reach host")
+
+    assert resolve_chromedriver(cache_file=cache_file, max_age=0, install=offline_install) == fake_driver
+
+def test_offline_mode_never_installs(tmp_path, fake_driver, monkeypatch):
+    """Offline mode uses the cache (however old) and never calls the manager."""
+    cache_file = str(tmp_path / "cache.json")
+    write_cache(cache_file, fake_driver)
+    with open(cache_file, "r+", encoding="utf-8") as f:
+        entry = json.load(f)
+        entry["resolved_at"] = time.time() - 10 * driver_cache.MAX_AGE
+        f.seek(0)
+        json.dump(entry, f)
+        f.truncate()
+
+    monkeypatch.setenv("SCRAPER_DRIVER_OFFLINE", "1")
+    install, calls = counting_install("unused")
+    assert resolve_chromedriver(cache_file=cache_file, install=install) == fake_driver
+    assert not calls
+
+def test_offline_without_cache_fails_clearly(tmp_path, monkeypatch):
+    """Offline with nothing cached and nothing on PATH raises instead of hanging."""
+    monkeypatch.setattr(driver_cache.shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError, match="Offline mode"):
+        resolve_chromedriver(offline=True, cache_file=str(tmp_path / "cache.json"))
+
+def test_explicit_driver_wins(monkeypatch):
+    """CHROMEDRIVER overrides the cache entirely."""
+    monkeypatch.setenv("CHROMEDRIVER", "/opt/chromedriver")
+    assert resolve_chromedriver(install=lambda: pytest.fail("should not install")) == "/opt/chromedriver"
+
+def test_concurrent_processes_resolve_once(tmp_path, fake_driver):
+    """Processes started together serialize on the lock; only the first one installs."""
+    cache_file = str(tmp_path / "cache.json")
+    log_file = str(tmp_path / "installs.log")
+    script = (
+        "import sys, time\n"
+        f"sys.path.insert(0, {REPO_ROOT!r})\n"
+        "from common.driver_cache import resolve_chromedriver\n"
+        "def install():\n"
+        f"    open({log_file!r}, 'a').write('x')\n"
+        "    time.sleep(0.3)\n"
+        f"    return {fake_driver!r}\n"
+        f"print(resolve_chromedriver(offline=False, cache_file={cache_file!r}, install=install))\n"
+    )
+    processes = [subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True)
+                 for _ in range(3)]
+    outputs = [p.communicate(timeout=30)[0].strip() for p in processes]
+    assert outputs == [fake_driver] * 3
+    assert open(log_file).read() == "x"
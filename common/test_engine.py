@@ -0,0 +1,349 @@
+import contextlib
+import json
+import logging
+import os
+import pandas as pd
+import pytest
+from common.engine import EntitySpec, ListDialogScraper, parse_dialog
+
+PAGES = {
+    1: [("Rose Cream", "Brand X"), ("Aloe Gel", "Brand Y")],
+    2: [("Neem Soap", "Brand Z")],
+}
+
+def extract(soup, name, page_number):
+    return {"name": name, "brand": soup.find("div", class_="dialog-thing__brand").text, "page_number": page_number}
+
+class FakeElement:
+    def __init__(self, driver, text="", html=""):
+        self.driver, self.text, self.html = driver, text, html
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def get_attribute(self, name):
+        return self.html
+
+class FakeDriver:
+    """Just enough of a WebDriver for the list/click/dialog/close loop."""
+
+    def __init__(self):
+        self.dialog = None
+        self.links = []
+        self.quit_called = False
+
+    def get(self, url):
+        page = int(url.rsplit("=", 1)[1])
+        self.dialog = None
+        self.links = [FakeElement(self, name, brand) for name, brand in PAGES[page]]
+
+    def find_element(self, by, value):
+        if value == ".thing-list__name" and self.links:
+            return self.links[0]
+        if value in (".dialog-thing", ".el-dialog__close") and self.dialog is not None:
+            return self.dialog
+        from selenium.common.exceptions import NoSuchElementException
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        if value == ".dialog-thing":
+            return [self.dialog] if self.dialog else []
+        return list(self.links)
+
+    def execute_script(self, script, element):
+        if "click" in script and element in self.links:
+            html = f'<div class="dialog-thing"><div class="dialog-thing__brand">{element.html}</div></div>'
+            self.dialog = FakeElement(self, html=html)
+        elif "click" in script:
+            self.dialog = None
+
+    @property
+    def page_source(self):
+        return f"<html><body>{self.dialog.html if self.dialog else ''}</body></html>"
+
+    def quit(self):
+        self.quit_called = True
+
+class FlakyDriver(FakeDriver):
+    """Fails clicks on one entry, as a detached element would, while `failures` lasts (shared by all drivers)."""
+
+    def __init__(self, name="Aloe Gel", failures=None):
+        super().__init__()
+        self.loads = 0
+        self.name = name
+        self.failures = failures if failures is not None else [1]
+
+    def get(self, url):
+        self.loads += 1
+        super().get(url)
+
+    def execute_script(self, script, element):
+        if "click" in script and getattr(element, "text", None) == self.name and self.failures[0]:
+            self.failures[0] -= 1
+            from selenium.common.exceptions import StaleElementReferenceException
+            raise StaleElementReferenceException("element is not attached to the page document")
+        super().execute_script(script, element)
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr("common.engine.time.sleep", lambda seconds: None)
+    spec = EntitySpec("things", "thing", list_selector=".thing-list__name", dialog_selector=".dialog-thing",
+                      extract=extract, key_fields=("name", "brand"), columns=["name", "brand", "page_number"])
+    settings = {
+        "PAGE_URL_TEMPLATE": "http://replay.invalid/?page={}",
+        "JSON_FILE": str(tmp_path / "things.json"),
+        "EXCEL_FILE": str(tmp_path / "things.xlsx"),
+        "CSV_FILE": str(tmp_path / "things.csv"),
+        "TEMP_DIR": str(tmp_path / "temp"),
+        "PROCESSED_FILE": str(tmp_path / "processed_things.json"),
+        "MANIFEST_FILE": str(tmp_path / "manifest.json"),
+        "MAX_WORKERS": 2,
+    }
+    engine = ListDialogScraper(spec, settings, new_driver=FakeDriver)
+    engine.initialize_files()
+    return engine
+
+def test_pages_are_scraped_into_every_store(engine, tmp_path):
+    """Each entry is clicked, parsed with the spec's extractor and stored in JSON, Excel and the CSV mirror."""
+    assert engine.run_pages(1, 2) == 3
+
+    with open(tmp_path / "things.json", encoding="utf-8") as f:
+        stored = json.load(f)["things"]
+    assert sorted((r["name"], r["brand"]) for r in stored) == sorted(PAGES[1] + PAGES[2])
+    assert len(pd.read_excel(tmp_path / "things.xlsx")) == 3
+    assert len(pd.read_csv(tmp_path / "things.csv")) == 3
+    assert engine.setting("TIMER").report()["stages"]["thing"]["count"] == 3
+
+def test_finished_logs_carry_the_entry_duration(engine, caplog):
+    """Each "Finished" log has the time from the start of the entry's fetch to its store."""
+    with caplog.at_level("INFO", logger="common.engine"):
+        engine.run_pages(1, 1)
+    finished = [r for r in caplog.records if r.getMessage().startswith("Finished thing")]
+    assert len(finished) == 2
+    assert all(r.duration_ms > 0 for r in finished)
+
+def test_same_name_from_another_brand_on_a_later_page_is_opened(engine, monkeypatch, tmp_path):
+    """Listings of one name are told apart by rank, so a second brand's product with that name is scraped."""
+    monkeypatch.setitem(PAGES, 3, [("Rose Cream", "Brand Q")])
+    engine.settings["MAX_WORKERS"] = 1
+    assert engine.run_pages(1, 3) == 4
+    with open(tmp_path / "things.json", encoding="utf-8") as f:
+        assert sorted(r["brand"] for r in json.load(f)["things"] if r["name"] == "Rose Cream") == ["Brand Q", "Brand X"]
+    assert engine.run_pages(1, 3) == 0
+
+def test_names_processed_before_ranks_only_cover_their_first_listing(engine, monkeypatch, tmp_path):
+    """A processed list of plain names skips a name's first listing and re-opens its later ones."""
+    monkeypatch.setitem(PAGES, 3, [("Rose Cream", "Brand Q")])
+    engine.settings["MAX_WORKERS"] = 1
+    with open(tmp_path / "processed_things.json", "w", encoding="utf-8") as f:
+        json.dump({"processed_things": ["Rose Cream", "Aloe Gel", "Neem Soap"]}, f)
+    assert engine.run_pages(1, 3) == 1
+    assert engine.processed_listings() >= {("Rose Cream", 1), ("Rose Cream", 2)}
+    assert engine.page_manifest().state(3) == "complete"
+
+def test_processed_entries_are_skipped(engine):
+    """Names recorded as processed are not opened again on a second run."""
+    engine.run_pages(1, 1)
+    assert engine.processed() == {"Rose Cream", "Aloe Gel"}
+    assert engine.run_pages(1, 1) == 0
+
+def test_resumed_run_does_not_load_completed_pages(engine, monkeypatch):
+    """Pages the manifest records as complete start no browser on the next run."""
+    engine.run_pages(1, 2)
+    started = []
+    monkeypatch.setattr(engine, "new_driver", lambda: started.append(1) or FakeDriver())
+    assert engine.run_pages(1, 2) == 0
+    assert started == []
+
+    engine.settings["RESUME"] = False
+    engine.run_pages(1, 2)
+    assert len(started) == 2
+
+def test_failed_entry_is_retried_without_reloading(engine):
+    """A single flaky entry is relocated on the loaded list and retried; the page is not reloaded."""
+    drivers = []
+    engine.new_driver = lambda: drivers.append(FlakyDriver()) or drivers[-1]
+    assert engine.run_pages(1, 1) == 2
+    assert drivers[0].loads == 1
+    assert engine.processed() == {"Rose Cream", "Aloe Gel"}
+
+def test_queued_failure_keeps_its_error(engine, tmp_path):
+    """The retry queue records why an entry failed in the main pass."""
+    engine.new_driver = lambda: FlakyDriver(failures=[99])
+    engine.settings.update(RETRY_FILE=str(tmp_path / "retries.json"), RETRY_BASE_DELAY=0.01, RETRY_ATTEMPTS=1)
+    engine.run_pages(1, 1)
+    exhausted = engine.retry_queue().exhausted
+    assert [entry["error"].startswith("Message: element is not attached") for entry in exhausted.values()] == [True]
+
+def test_persistent_failure_is_queued_and_retried_after_the_pass(engine, tmp_path):
+    """An entry that keeps failing is queued with backoff and stored by the retry pass."""
+    failures = [3]  # The main pass tries twice, the retry pass fails once more and then succeeds
+    drivers = []
+    engine.new_driver = lambda: drivers.append(FlakyDriver(failures=failures)) or drivers[-1]
+    engine.settings.update(RETRY_FILE=str(tmp_path / "retries.json"), RETRY_BASE_DELAY=0.01)
+    assert engine.run_pages(1, 1) == 2
+    assert len(drivers) == 2  # One for the page, one for the retries
+    assert engine.processed() == {"Rose Cream", "Aloe Gel"}
+    assert len(engine.retry_queue()) == 0 and not engine.retry_queue().exhausted
+    assert engine.page_manifest().state(1) == "complete"
+
+class DyingDriver(FlakyDriver):
+    """Fails one click and then stops answering at all, as a crashed browser does."""
+
+    def find_elements(self, by, value):
+        if not self.failures[0]:
+            from selenium.common.exceptions import WebDriverException
+            raise WebDriverException("chrome not reachable")
+        return super().find_elements(by, value)
+
+def test_entries_after_a_dead_browser_are_queued_and_the_page_finishes(engine, tmp_path):
+    """When recovery fails, every remaining new entry is queued for retry and the page still completes."""
+    drivers = []
+    engine.new_driver = lambda: drivers.append(DyingDriver(name="Rose Cream") if not drivers else FakeDriver()) or drivers[-1]
+    engine.settings.update(RETRY_FILE=str(tmp_path / "retries.json"), RETRY_BASE_DELAY=0.01, MAX_WORKERS=1)
+    assert engine.run_pages(1, 1) == 2
+    assert len(drivers) == 2  # The dead page browser and the retry browser
+    with open(tmp_path / "retries.json", encoding="utf-8") as f:
+        assert json.load(f)["pending"] == {}
+    assert engine.processed() == {"Rose Cream", "Aloe Gel"}
+    assert engine.page_manifest().state(1) == "complete"
+
+def test_locate_falls_back_to_the_position_among_same_name_rows(engine):
+    """After the list shifts, an entry is found as the same occurrence of its name, not the first one."""
+    driver = FakeDriver()
+    links = [FakeElement(driver, text) for text in ("New Balm", "Rose Cream", "Aloe Gel", "Rose Cream")]
+    assert engine.locate(links, 2, "Rose Cream", occurrence=2) is links[3]
+    assert engine.locate(links, 0, "Rose Cream", occurrence=1) is links[1]
+    assert engine.locate(links, 5, "Rose Cream", occurrence=3) is None
+
+def test_parse_stage_can_run_on_threads(engine):
+    """With PARSE_POOL = "thread" the parse stage needs no worker processes and stores the same records."""
+    engine.settings.update(PARSE_POOL="thread", PARSE_WORKERS=2, QUEUE_SIZE=1)
+    assert engine.parse_pool(2) is None
+    assert engine.run_pages(1, 2) == 3
+    assert engine.processed() == {"Rose Cream", "Aloe Gel", "Neem Soap"}
+    assert engine.page_manifest().state(1) == engine.page_manifest().state(2) == "complete"
+
+def logging_extract(soup, name, page_number):
+    logging.getLogger("things.extract").error(f"No brand field for {name}")
+    return extract(soup, name, page_number)
+
+def test_parse_worker_logs_reach_this_process(engine, caplog):
+    """Errors logged by the extractor in a forked parse worker are written by the parent's handlers."""
+    engine.spec.extract = logging_extract
+    engine.settings.update(PARSE_POOL="process", PARSE_WORKERS=2)
+    with caplog.at_level("INFO"):
+        assert engine.run_pages(1, 1) == 2
+    messages = [r.getMessage() for r in caplog.records if r.name == "things.extract"]
+    assert sorted(messages) == ["No brand field for Aloe Gel", "No brand field for Rose Cream"]
+    assert engine._parse_pool is None  # Shut down with the run
+
+class RecordingProfiler:
+    """Stands in for ScopeProfiler, picking every scope and remembering its label and any nesting."""
+
+    def __init__(self):
+        self.scopes = []
+        self.active = 0
+        self.nested = False
+
+    @contextlib.contextmanager
+    def scope(self, label):
+        self.scopes.append(label)
+        self.nested = self.nested or self.active > 0
+        self.active += 1
+        try:
+            yield True
+        finally:
+            self.active -= 1
+
+def test_parse_and_write_stages_are_profiled(engine, monkeypatch):
+    """Parsing and storing get their own scopes, never nested in a page scope; a profiled parse stays in this process."""
+    engine.settings.update(PROFILER=RecordingProfiler(), PARSE_POOL="process")
+    parsed_in = []
+    monkeypatch.setattr("common.engine.parse_dialog",
+                        lambda *args: parsed_in.append(os.getpid()) or parse_dialog(*args))
+    assert engine.run_pages(1, 1) == 2
+    scopes = engine.settings["PROFILER"].scopes
+    assert "page 1" not in scopes
+    assert not engine.settings["PROFILER"].nested
+    assert scopes.count("parse page 1") == 2
+    assert scopes.count("write page 1") == 3  # Two records and the page marker
+    assert parsed_in == [os.getpid()] * 2
+
+def test_sinks_setting_is_read_at_use(engine, tmp_path):
+    """Settings come from the mapping on every use, so later overrides apply."""
+    engine.settings["SINKS"] = ("json",)
+    engine.run_pages(1, 1)
+    assert not list((tmp_path / "temp").iterdir())
+    assert pd.read_excel(tmp_path / "things.xlsx").empty
+
+def test_catalog_sink_appends_each_key_once(engine, tmp_path):
+    """The catalog sink streams new records into the compressed store and skips keys already there."""
+    from common.catalog import read_catalog
+    engine.settings.update(SINKS=("catalog",), CATALOG_FILE=str(tmp_path / "things.jsonl.gz"))
+    assert engine.run_pages(1, 2) == 3
+    engine.append_to_catalog({"name": "Rose Cream", "brand": "Brand X", "page_number": 1})
+    engine.close_catalog()
+    stored = list(read_catalog(str(tmp_path / "things.jsonl.gz"), fields=("name", "brand")))
+    assert sorted((r["name"], r["brand"]) for r in stored) == sorted(PAGES[1] + PAGES[2])
+
+def test_merge_dedupes_on_the_spec_key_fields(engine, tmp_path):
+    """Rows are unique by the spec's key fields, in the Excel file and the CSV mirror."""
+    for brand in ("Brand X", "Brand Y", "Brand X"):
+        engine.append_to_json({"name": "Rose Cream", "brand": brand, "page_number": 1})
+        engine.append_to_excel({"name": "Rose Cream", "brand": brand, "page_number": 1})
+    assert engine.merge_temp_files(max_files=10) >= 2
+    assert engine.exists_in_excel({"name": "rose cream", "brand": "brand y"})
+    assert sorted(pd.read_excel(tmp_path / "things.xlsx")["brand"]) == ["Brand X", "Brand Y"]
+    assert sorted(pd.read_csv(tmp_path / "things.csv")["brand"]) == ["Brand X", "Brand Y"]
+    with open(tmp_path / "things.json", encoding="utf-8") as f:
+        assert len(json.load(f)["things"]) == 2
+
+class PagedTableDriver(FakeDriver):
+    """A table whose rows change when its pager's next button is clicked; the URL never selects a page."""
+
+    TABLE = [["Aqua", "Glycerin"], ["Shea Butter", "Jojoba Oil"], ["Zinc Oxide"]]
+
+    def get(self, url):
+        self.loads = getattr(self, "loads", 0) + 1
+        self.page = 0
+
+    def find_element(self, by, value):
+        return self.find_elements(by, value)[0]
+
+    def find_elements(self, by, value):
+        if value == ".pager .next":
+            disabled = "true" if self.page == len(self.TABLE) - 1 else None
+            button = FakeElement(self)
+            button.get_attribute = lambda name: disabled if name == "disabled" else None
+            return [button]
+        return [FakeElement(self, name) for name in self.TABLE[self.page]]
+
+    def execute_script(self, script, element):
+        self.page += 1
+
+    @property
+    def page_source(self):
+        return "<table>" + "".join(f"<tr><td>{name}</td></tr>" for name in self.TABLE[self.page]) + "</table>"
+
+def test_paged_list_spec_reads_every_page_of_the_table():
+    """The pager is turned until its next button is disabled; the list URL is loaded once."""
+    drivers = []
+    spec = EntitySpec("names", "name", list_selector=".thing-list__name", next_selector=".pager .next",
+                      extract=lambda soup, page: [{"name": td.text, "page": page} for td in soup.find_all("td")])
+    engine = ListDialogScraper(spec, {"PAGE_URL_TEMPLATE": "http://replay.invalid/?page={}"},
+                               new_driver=lambda: drivers.append(PagedTableDriver()) or drivers[-1])
+    records = list(engine.read_paged_list())
+    assert [r["name"] for r in records] == ["Aqua", "Glycerin", "Shea Butter", "Jojoba Oil", "Zinc Oxide"]
+    assert [r["page"] for r in records] == [1, 1, 2, 2, 3]
+    assert drivers[0].loads == 1 and drivers[0].quit_called
+
+def test_list_spec_reads_records_from_one_page_load(tmp_path):
+    """A spec without a dialog gets the parsed list page and returns its records."""
+    spec = EntitySpec("names", "name", list_selector=".thing-list__name",
+                      extract=lambda soup, page: [{"page": page, "body": soup.body is not None}])
+    engine = ListDialogScraper(spec, {"PAGE_URL_TEMPLATE": "http://replay.invalid/?page={}"}, new_driver=FakeDriver)
+    assert engine.read_list_page(2) == [{"page": 2, "body": True}]
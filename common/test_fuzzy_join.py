@@ -0,0 +1,69 @@
+import json
+import random
+import time
+from common.fuzzy_join import NgramIndex, inci_keys, link_materials, main, split_ingredients
+
+PRODUCTS = [
+    {"name": "Detox Mask", "brand": "Brand X", "ingredients": "Aqua, Kaolin, Charcoal Powder*, Simmondsia Chinensis Seed Oil"},
+    {"name": "Body Butter", "brand": "Brand Y", "ingredients": "Butyrospermum Parkii (Shea) Butter**, Parfum (Fragrance)."},
+]
+RAW_MATERIALS = [
+    {"name": "Shea butter refined", "inci": "Butyrospermum Parkii Butter"},
+    {"name": "Jojoba oil", "inci": "Simmondsia Chinensis Seed Oil"},
+]
+MATERIALS = [
+    {"name": "Activated Coconut Charcoal Powder", "inci_name": "Charcoal Powder"},
+    {"name": "Jojoba Oil Golden", "inci_name": "Simmondsia Chinensis (Jojoba) Seed Oil"},
+    {"name": "Organic Shea Butter Refined", "inci_name": "Butyrospermum Parkii (Shea Butter)"},
+    {"name": "Rose Absolute", "inci_name": "Rosa Centifolia Flower Extract"},
+]
+
+def test_inci_keys_normalize_case_markers_parentheses_and_synonyms():
+    """Variants of the same INCI name share a key."""
+    assert "simmondsia chinensis seed oil" in inci_keys("SIMMONDSIA CHINENSIS (JOJOBA) SEED OIL*")
+    assert inci_keys("Aqua") == inci_keys("water") == ["water"]
+    assert inci_keys("Organic Aloe Barbadensis Leaf Juice") == ["aloe barbadensis leaf juice"]
+
+def test_ingredient_lists_split_outside_parentheses():
+    """Commas inside a parenthesised alternative do not split the name."""
+    assert split_ingredients("Ingredients: Aqua (Water, Eau), Glycerin; Parfum.") == ["Aqua (Water, Eau)", "Glycerin", "Parfum"]
+
+def test_materials_link_to_products_and_raw_materials():
+    """Exact keys, parenthesised alternatives and near spellings link; unrelated materials do not."""
+    results = {r["material"]: r for r in link_materials(MATERIALS, PRODUCTS, RAW_MATERIALS)}
+    assert [p["name"] for p in results["Activated Coconut Charcoal Powder"]["products"]] == ["Detox Mask"]
+    assert results["Jojoba Oil Golden"]["raw_materials"][0]["name"] == "Jojoba oil"
+    shea = results["Organic Shea Butter Refined"]
+    assert [p["name"] for p in shea["products"]] == ["Body Butter"]
+    assert shea["raw_materials"][0]["inci"] == "Butyrospermum Parkii Butter"
+    assert results["Rose Absolute"]["products"] == results["Rose Absolute"]["raw_materials"] == []
+
+def test_near_spellings_are_scored_below_one():
+    """A misspelled name is found with a similarity score instead of an exact hit."""
+    index = NgramIndex(threshold=0.7)
+    index.add("Butyrospermum Parkii Butter", "shea")
+    [(score, key)] = index.match("Butyrospermum Parki Butter")
+    assert 0.7 <= score < 1 and index.refs[key] == ["shea"]
+
+def test_join_scales_with_names_not_pairs():
+    """Thousands of materials against tens of thousands of ingredient mentions finish in seconds."""
+    rng = random.Random(1)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))) for _ in range(3000)]
+    names = [" ".join(rng.sample(words, 3)) for _ in range(8000)]
+    products = [{"name": f"P{i}", "ingredients": ", ".join(rng.sample(names, 12))} for i in range(2000)]
+    used = sorted({name for product in products for name in split_ingredients(product["ingredients"])})
+    materials = [{"name": name, "inci_name": name} for name in rng.sample(used, 2000)]
+    started = time.perf_counter()
+    results = link_materials(materials, products)
+    assert time.perf_counter() - started < 30
+    assert all(result["products"] for result in results)
+
+def test_command_line_writes_one_line_per_material(tmp_path):
+    """The command line reads the stores from files and writes one JSON line per material."""
+    (tmp_path / "materials.jsonl").write_text("\n".join(json.dumps(m) for m in MATERIALS), encoding="utf-8")
+    (tmp_path / "products.json").write_text(json.dumps({"products": PRODUCTS}), encoding="utf-8")
+    (tmp_path / "raw.jsonl").write_text("\n".join(json.dumps(r) for r in RAW_MATERIALS), encoding="utf-8")
+    output = main(["--materials", str(tmp_path / "materials.jsonl"), "--products", str(tmp_path / "products.json"),
+                   "--raw-materials", str(tmp_path / "raw.jsonl"), "-o", str(tmp_path / "links.jsonl")])
+    with open(output, encoding="utf-8") as f:
+        assert len(f.readlines()) == len(MATERIALS)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from common.images import ImageFetcher, ImageStore, main
+
+IMAGES = {
+    "/a.jpg": b"\xff\xd8 rose cream",
+    "/copy-of-a.jpg": b"\xff\xd8 rose cream",
+    "/b.png": b"\x89PNG aloe gel",
+    "/thumb?id=7": b"GIF89a neem soap",
+}
+
+class ImageHandler(BaseHTTPRequestHandler):
+    requests_seen = Counter()
+
+    def do_GET(self):
+        ImageHandler.requests_seen[self.path] += 1
+        body = IMAGES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/gif" if self.path.startswith("/thumb") else "application/octet-stream")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    ImageHandler.requests_seen = Counter()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_urls_and_content_are_deduplicated(server, tmp_path):
+    """Each URL is requested once, and two URLs with the same bytes share one sharded file."""
+    urls = [server + path for path in IMAGES] + [server + "/a.jpg", server + "/missing.jpg", None]
+    store = ImageStore(str(tmp_path / "images"))
+    outcomes = ImageFetcher(store, workers=3).fetch_all(urls)
+    assert outcomes == Counter(fetched=3, duplicate=1, failed=1)
+    assert ImageHandler.requests_seen["/a.jpg"] == 1
+
+    digest = hashlib.sha256(IMAGES["/a.jpg"]).hexdigest()
+    assert store.path(server + "/a.jpg") == store.path(server + "/copy-of-a.jpg") == \
+        os.path.join(str(tmp_path / "images"), digest[:2], digest[2:4], f"{digest}.jpg")
+    assert store.path(server + "/thumb?id=7").endswith(".gif")
+
+def test_stored_images_are_not_fetched_again(server, tmp_path):
+    """A second run uses the index; --refresh re-checks with conditional requests that return 304."""
+    urls = [server + "/a.jpg", server + "/b.png"]
+    ImageFetcher(ImageStore(str(tmp_path / "images"))).fetch_all(urls)
+
+    assert ImageFetcher(ImageStore(str(tmp_path / "images"))).fetch_all(urls) == Counter(cached=2)
+    assert sum(ImageHandler.requests_seen.values()) == 2
+
+    assert ImageFetcher(ImageStore(str(tmp_path / "images"))).fetch_all(urls, refresh=True) == Counter(not_modified=2)
+    assert sum(ImageHandler.requests_seen.values()) == 4
+
+def test_deleted_file_is_fetched_again_in_full(server, tmp_path):
+    """An indexed image whose file is gone is requested without validators, with or without --refresh."""
+    store = ImageStore(str(tmp_path / "images"))
+    ImageFetcher(store).fetch_all([server + "/a.jpg"])
+    os.remove(store.path(server + "/a.jpg"))
+
+    for refresh in (False, True):
+        store = ImageStore(str(tmp_path / "images"))
+        assert ImageFetcher(store).fetch_all([server + "/a.jpg"], refresh=refresh) == Counter(fetched=1)
+        with open(store.path(server + "/a.jpg"), "rb") as f:
+            assert f.read() == IMAGES["/a.jpg"]
+        os.remove(store.path(server + "/a.jpg"))
+
+def test_command_line_reads_image_urls_from_the_products_store(server, tmp_path):
+    """The image URLs of a products JSON store are downloaded into the given store directory."""
+    products = [{"name": "Rose Cream", "image_url": server + "/a.jpg"}, {"name": "No Image", "image_url": ""}]
+    (tmp_path / "products.json").write_text(json.dumps({"products": products}), encoding="utf-8")
+    outcomes = main([str(tmp_path / "products.json"), "--store", str(tmp_path / "images"), "--workers", "2"])
+    assert outcomes == Counter(fetched=1)
+    assert (tmp_path / "images" / "index.json").exists()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+import pytest
+from common.lazy import lazy_import
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_module_is_imported_on_first_use():
+    """Nothing is imported until an attribute is used."""
+    sys.modules.pop("colorsys", None)
+    colorsys = lazy_import("colorsys")
+    assert not colorsys.loaded and "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0)[0] == 0.0
+    assert colorsys.loaded and "colorsys" in sys.modules
+
+def test_attribute_proxy_is_callable():
+    """`from x import Y` style proxies can be called like the real object."""
+    ordered = lazy_import("collections", "OrderedDict")
+    assert list(ordered(a=1, b=2)) == ["a", "b"]
+
+def test_patch_through_proxy():
+    """unittest.mock.patch on a proxied module patches (and restores) the real module."""
+    import json as real_json
+    proxy = lazy_import("json")
+    original = real_json.dumps
+    with patch.object(proxy, "dumps", return_value="patched"):
+        assert real_json.dumps({}) == "patched"
+    assert real_json.dumps is original
+
+def test_missing_module_fails_on_use():
+    """A missing optional dependency only fails where it is needed."""
+    missing = lazy_import("module_that_does_not_exist")
+    with pytest.raises(ImportError):
+        missing.anything
+
+@pytest.mark.parametrize("folder,module", [
+    (os.path.join("task1", "products"), "Products"),
+    (os.path.join("task1", "brands"), "brand"),
+    (os.path.join("task1", "raw material"), "diff_exports"),
+])
+def test_scraper_import_is_light(tmp_path, folder, module):
+    """Importing a scraper loads no selenium/pandas/bs4 and configures no logging."""
+    script = (
+        "import sys, logging\n"
+        f"sys.path.insert(0, {os.path.join(REPO_ROOT, folder)!r})\n"
+        f"import {module}\n"
+        "heavy = [m for m in ('selenium', 'pandas', 'bs4', 'openpyxl', 'numpy') if m in sys.modules]\n"
+        "print(heavy, len(logging.getLogger().handlers))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[] 0"
+    assert not list(tmp_path.glob("*.log"))
@@ -0,0 +1,86 @@
+import json
+import logging
+import logging.handlers
+import time
+import pytest
+from common import logging_config
+from common.logging_config import (
+    JsonFormatter,
+    ItemSamplingFilter,
+    configure_logging,
+    stop_logging,
+    item_extra
+)
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, "Processing %s", ("SHAMPOO",), None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+@pytest.fixture
+def isolated_root():
+    """Run configure_logging against a clean root logger and restore it afterwards."""
+    stop_logging()
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    root.handlers = []
+    yield root
+    stop_logging()
+    root.handlers = saved_handlers
+    root.setLevel(saved_level)
+
+def test_item_extra_duration():
+    """The duration is measured from a perf_counter start value."""
+    extra = item_extra(3, "SHAMPOO", "product", started=time.perf_counter() - 0.05)
+    assert extra["page"] == 3 and extra["item"] == "SHAMPOO" and extra["stage"] == "product"
+    assert extra["duration_ms"] >= 50
+
+def test_json_formatter_includes_item_fields():
+    """Per-item fields end up as JSON keys."""
+    line = JsonFormatter().format(make_record(page=2, item="SHAMPOO", stage="parse", duration_ms=1.5))
+    entry = json.loads(line)
+    assert entry["message"] == "Processing SHAMPOO"
+    assert entry["page"] == 2 and entry["stage"] == "parse" and entry["duration_ms"] == 1.5
+    assert "item" in entry
+
+def test_sampling_only_drops_item_chatter():
+    """Item INFO lines are sampled; page-level lines and warnings always pass."""
+    drop_all = ItemSamplingFilter(rate=0.0)
+    assert not drop_all.filter(make_record(item="SHAMPOO"))
+    assert drop_all.filter(make_record())
+    assert drop_all.filter(make_record(level=logging.WARNING, item="SHAMPOO"))
+    assert ItemSamplingFilter(rate=1.0).filter(make_record(item="SHAMPOO"))
+
+def test_configure_logging_writes_through_queue(isolated_root, tmp_path):
+    """Records go through a QueueHandler and reach the file after the writer stops."""
+    log_file = tmp_path / "scraper.log"
+    configure_logging(str(log_file), json_logs=True, sample_rate=1.0)
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in isolated_root.handlers)
+
+    logging.getLogger().info("Saved product", extra=item_extra(1, "LIPBALM", "persist_json"))
+    stop_logging()
+
+    entry = json.loads(log_file.read_text(encoding="utf-8").strip())
+    assert entry["item"] == "LIPBALM"
+    assert not any(isinstance(h, logging.handlers.QueueHandler) for h in isolated_root.handlers)
+
+def test_configure_logging_only_once(isolated_root, tmp_path):
+    """Later calls reuse the first configuration, like basicConfig."""
+    first = configure_logging(str(tmp_path / "a.log"))
+    second = configure_logging(str(tmp_path / "b.log"))
+    assert first is second
+    assert logging_config._listener is first
+    assert not (tmp_path / "b.log").exists()
+
+def test_configure_logging_reads_environment(isolated_root, tmp_path, monkeypatch):
+    """SCRAPER_LOG_JSON and SCRAPER_LOG_SAMPLE switch on JSON output and sampling."""
+    monkeypatch.setenv("SCRAPER_LOG_JSON", "1")
+    monkeypatch.setenv("SCRAPER_LOG_SAMPLE", "0")
+    log_file = tmp_path / "env.log"
+    configure_logging(str(log_file))
+    logging.getLogger().info("item line", extra=item_extra(1, "A", "parse"))
+    logging.getLogger().info("page line")
+    stop_logging()
+    lines = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert [line["message"] for line in lines] == ["page line"]
@@ -0,0 +1,47 @@
+import random
+from common.manifest import PageManifest, COMPLETE, PARTIAL
+
+def test_state_survives_a_restart(tmp_path):
+    """Names and completion are saved on every change and read back by a new run."""
+    path = str(tmp_path / "manifest.json")
+    manifest = PageManifest(path)
+    manifest.page_found(1, ["A", "B"])
+    manifest.page_done(1, complete=True)
+    manifest.page_found(2, ["C"])
+
+    resumed = PageManifest(path)
+    assert (resumed.state(1), resumed.state(2), resumed.state(3)) == (COMPLETE, PARTIAL, None)
+    assert resumed.items(1) == ["A", "B"]
+
+def test_only_incomplete_pages_are_scheduled(tmp_path):
+    """Complete pages whose names are all processed are skipped; the rest are loaded."""
+    manifest = PageManifest(str(tmp_path / "manifest.json"))
+    for page, names in ((1, ["A"]), (2, ["B"]), (3, ["C"])):
+        manifest.page_found(page, names)
+    manifest.page_done(1, complete=True)
+    manifest.page_done(2, complete=True)
+    # Page 2 is complete, but its name is no longer in the processed list
+    assert manifest.pages_to_run(range(1, 5), processed={"A"}) == ([2, 3, 4], 1)
+
+def test_a_sample_of_complete_pages_is_verified(tmp_path):
+    """With a sample share, that many completed pages are re-scraped anyway."""
+    manifest = PageManifest(str(tmp_path / "manifest.json"))
+    for page in range(1, 11):
+        manifest.page_found(page, [str(page)])
+        manifest.page_done(page, complete=True)
+    pages, skipped = manifest.pages_to_run(range(1, 11), {str(p) for p in range(1, 11)}, sample=0.2, rng=random.Random(0))
+    assert len(pages) == 2 and skipped == 8
+
+def test_unreadable_manifest_skips_nothing(tmp_path):
+    """A torn manifest file is ignored rather than failing the run."""
+    path = tmp_path / "manifest.json"
+    path.write_text('{"pages": {"1": ', encoding="utf-8")
+    assert PageManifest(str(path)).pages_to_run([1, 2]) == ([1, 2], 0)
+
+def test_ranks_count_listings_of_a_name_in_page_order(tmp_path):
+    """A name's first listing across the pages is rank 1, the next ones 2, 3, ...; later pages do not count."""
+    manifest = PageManifest(str(tmp_path / "manifest.json"))
+    manifest.page_found(1, ["Rose Cream", "Aloe Gel"])
+    manifest.page_found(4, ["Rose Cream"])
+    assert manifest.ranks(2, ["Rose Cream", "Neem Soap", "Rose Cream"]) == [2, 1, 3]
+    assert manifest.ranks(1, ["Rose Cream", "Aloe Gel"]) == [1, 1]
@@ -0,0 +1,103 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from common import memory
+from common.memory import MemoryBudget, rss_mb, descendant_pids, children_rss_mb
+from common.timing import StageTimer
+
+linux_only = pytest.mark.skipif(rss_mb() is None, reason="needs /proc")
+
+@linux_only
+def test_rss_of_this_process():
+    """The current process has a plausible resident size."""
+    assert 1 < rss_mb() < 100000
+
+def test_rss_of_missing_process():
+    """Processes that went away report None."""
+    assert rss_mb(2 ** 22 + 12345) is None
+
+@linux_only
+def test_child_processes_are_found():
+    """Descendants (like chromedriver and Chrome) are found recursively and counted."""
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        time.sleep(0.2)
+        assert child.pid in descendant_pids()
+        assert children_rss_mb() > 0
+    finally:
+        child.kill()
+        child.wait()
+
+def test_no_proc_means_no_figures(monkeypatch, tmp_path):
+    """Without /proc nothing is measured and the budget never throttles."""
+    monkeypatch.setattr(memory, "PROC", str(tmp_path / "missing"))
+    budget = MemoryBudget(budget_mb=1)
+    assert budget.sample() is None
+    assert not budget.over_budget()
+    assert descendant_pids() == []
+
+@linux_only
+def test_stage_peaks_follow_timer_spans():
+    """Samples taken while a span is open count towards that stage's peak."""
+    timer = StageTimer("test")
+    budget = MemoryBudget(budget_mb=100000)
+    budget.track(timer)
+    with timer.span("parse"):
+        budget.sample()
+    budget.sample()
+    report = budget.report()
+    assert list(report["stage_peak_total_mb"]) == ["parse"]
+    assert report["peak"]["total_mb"] >= report["peak"]["python_mb"] > 0
+
+@linux_only
+def test_admit_waits_while_over_budget():
+    """Over budget, new work waits until running work finishes."""
+    budget = MemoryBudget(budget_mb=0.001, interval=0.05)
+    order = []
+    release = threading.Event()
+
+    def running():
+        with budget.admit():
+            order.append("first started")
+            release.wait(5)
+        order.append("first finished")
+
+    first = threading.Thread(target=running)
+    first.start()
+    while not order:
+        time.sleep(0.01)
+
+    def waiting():
+        with budget.admit():
+            order.append("second started")
+
+    second = threading.Thread(target=waiting)
+    second.start()
+    time.sleep(0.2)
+    assert "second started" not in order
+    release.set()
+    first.join()
+    second.join()
+    assert order.index("second started") > order.index("first started")
+    assert budget.report()["throttled"] == 1
+
+@linux_only
+def test_admit_never_blocks_the_only_worker():
+    """A single worker always runs, so an unreachable budget cannot deadlock the run."""
+    budget = MemoryBudget(budget_mb=0.001, interval=0.05)
+    with budget.admit():
+        pass
+    assert budget.report()["throttled"] == 0
+
+def test_disabled_budget_is_a_no_op(tmp_path):
+    """Without --memory-budget nothing samples or throttles."""
+    budget = MemoryBudget()
+    budget.start()
+    assert budget._thread is None
+    with budget.admit():
+        pass
+    budget.write_report(str(tmp_path / "memory.json"))
+    assert json.loads((tmp_path / "memory.json").read_text(encoding="utf-8"))["budget_mb"] is None
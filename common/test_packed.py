@@ -0,0 +1,77 @@
+import gzip
+import json
+import os
+from common.packed import PackedArchive
+
+def record(n, name=None):
+    return {"url": f"https://example.test/products/{n}", "name": name or f"Oil {n}",
+            "product_name": f"Oil {n} Raw Material", "scraped_at": "2026-01-01T00:00:00", "description": f"INCI Name: Oil {n}"}
+
+def test_records_are_found_by_url_and_name(tmp_path):
+    """Each record is read back with one seek, by its URL or case-insensitively by name."""
+    archive = PackedArchive(str(tmp_path / "products.jsonl.gz"))
+    for n in range(5):
+        archive.append(record(n))
+    assert archive.get("https://example.test/products/3")["description"] == "INCI Name: Oil 3"
+    assert archive.find("oil 4")["url"].endswith("/4")
+    assert archive.get("https://example.test/missing") is None
+    archive.close()
+
+def test_archive_is_plain_jsonl_gz_and_rewrites_replace(tmp_path):
+    """Any gzip reader streams the archive; a second write of a URL wins in the index."""
+    path = tmp_path / "products.jsonl.gz"
+    archive = PackedArchive(str(path))
+    archive.append(record(1))
+    archive.append(record(1, name="Renamed Oil"))
+    archive.close()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["name"] for line in f] == ["Oil 1", "Renamed Oil"]
+    assert [r["name"] for r in PackedArchive(str(path)).records()] == ["Renamed Oil"]
+
+    archive = PackedArchive(str(path))
+    archive.compact()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+def test_index_catches_up_after_a_crash(tmp_path):
+    """Records appended after the last saved index, and a torn last write, are handled on load."""
+    path = tmp_path / "products.jsonl.gz"
+    archive = PackedArchive(str(path))
+    archive.append(record(1))
+    archive.flush()
+    archive.append(record(2))
+    archive._file.close()  # Stopped without close(); then a torn write
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"url": "torn"}\n')[:10])
+
+    reopened = PackedArchive(str(path))
+    assert reopened.keys() == [record(1)["url"], record(2)["url"]]
+    reopened.append(record(3))
+    reopened.close()
+    assert len(list(PackedArchive(str(path)).records())) == 3
+
+def test_index_is_saved_during_long_runs(tmp_path):
+    """The index is saved every flush_every appends; a rescan after a crash finds every later member."""
+    path = tmp_path / "products.jsonl.gz"
+    archive = PackedArchive(str(path), flush_every=100)
+    for n in range(250):
+        archive.append(record(n))
+    archive._file.close()  # Stopped without close()
+    with open(f"{path}.idx", encoding="utf-8") as f:
+        assert len(json.load(f)["entries"]) == 200
+
+    reopened = PackedArchive(str(path), flush_every=0)
+    assert len(reopened) == 250
+    assert reopened.get(record(249)["url"])["name"] == "Oil 249"
+    os.remove(f"{path}.idx")
+    assert PackedArchive(str(path)).keys() == [record(n)["url"] for n in range(250)]
+
+def test_txt_view_keeps_colliding_names_apart(tmp_path):
+    """The .txt export writes title and description per record, suffixing names that sanitize alike."""
+    archive = PackedArchive(str(tmp_path / "products.jsonl.gz"))
+    archive.append(record(1, name="Oil/A"))
+    archive.append(record(2, name="Oil?A"))
+    paths = archive.export_txt(str(tmp_path / "txt"))
+    assert [p.rsplit("/", 1)[1] for p in paths] == ["Oil_A.txt", "Oil_A (2).txt"]
+    with open(paths[1], encoding="utf-8") as f:
+        assert f.read() == "Oil 2 Raw Material\n\nINCI Name: Oil 2"
@@ -0,0 +1,54 @@
+import threading
+import time
+from common.pipeline import Pipeline
+
+def test_items_flow_through_every_stage():
+    """Each stage's outputs feed the next; a stage may emit several items or none for one input."""
+    pipeline = Pipeline("numbers")
+    pipeline.add_stage("split", lambda n: range(n), workers=2)
+    pipeline.add_stage("square", lambda n: [n * n] if n % 2 == 0 else None, workers=3)
+    pipeline.add_stage("label", lambda n: [f"#{n}"], workers=1)
+    assert sorted(pipeline.run([3, 5])) == sorted(["#0", "#4", "#0", "#4", "#16"])
+    assert pipeline.stats()["square"]["processed"] == 8
+
+def test_full_queue_holds_back_the_stage_feeding_it():
+    """A slow stage blocks its producer once its bounded queue is full, so items never pile up."""
+    release = threading.Event()
+    pipeline = Pipeline("backpressure")
+    pipeline.add_stage("produce", lambda n: [n], workers=1, capacity=1)
+    pipeline.add_stage("consume", lambda n: release.wait() and [n], workers=1, capacity=2)
+    threading.Timer(0.3, release.set).start()
+    assert sorted(pipeline.run(range(10))) == list(range(10))
+    stats = pipeline.stats()
+    assert stats["consume"]["peak_queue"] <= 2
+    assert stats["produce"]["blocked_seconds"] > 0.1
+
+def test_errors_are_counted_and_the_item_dropped():
+    """An exception loses only the item that raised it; the run finishes with the rest."""
+    def check(n):
+        if n == 2:
+            raise ValueError("bad item")
+        return [n]
+
+    pipeline = Pipeline("errors")
+    pipeline.add_stage("check", check, workers=2)
+    pipeline.add_stage("pass", lambda n: [n], workers=2)
+    assert sorted(pipeline.run(range(5))) == [0, 1, 3, 4]
+    assert pipeline.stats()["check"]["errors"] == 1
+
+def test_generator_outputs_reach_the_next_stage_while_it_runs():
+    """Items a generator stage yields are processed before the generator finishes."""
+    seen = []
+
+    def produce(n):
+        for i in range(3):
+            yield i
+            time.sleep(0.05)
+            assert i in seen or i == 2  # Already consumed while this stage was still running
+
+    pipeline = Pipeline("streaming")
+    pipeline.add_stage("produce", produce, workers=1)
+    pipeline.add_stage("consume", lambda i: seen.append(i), workers=1)
+    pipeline.run([1])
+    assert seen == [0, 1, 2]
+    assert pipeline.stats()["produce"]["errors"] == 0
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import pstats
+import threading
+from common.profiling import ScopeProfiler, add_profile_arguments
+
+def busy_work(n=20000):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return [str(i) for i in range(n // 10)], total
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    """Without --profile, scopes are plain pass-throughs and nothing is written."""
+    profiler = ScopeProfiler("test", output_dir=str(tmp_path))
+    with profiler.scope("page 1"):
+        busy_work()
+    assert profiler.dump() == []
+    assert os.listdir(tmp_path) == []
+
+def test_profiled_scope_writes_all_outputs(tmp_path):
+    """A sampled scope produces pstats, a text report, collapsed stacks and a memory summary."""
+    profiler = ScopeProfiler("test", stack_interval=0.001)
+    profiler.configure(sample_rate=1.0, output_dir=str(tmp_path))
+    for page in (1, 2):
+        with profiler.scope(f"page {page}"):
+            busy_work()
+
+    paths = profiler.dump()
+    assert [os.path.basename(p) for p in paths] == [
+        "profile_test.pstats", "profile_test_profile.txt", "profile_test.collapsed", "profile_test_scopes.json"]
+
+    stats = pstats.Stats(paths[0])
+    assert any(func[2] == "busy_work" for func in stats.stats)
+    assert "busy_work" in open(paths[1], encoding="utf-8").read()
+
+    summary = json.load(open(paths[3], encoding="utf-8"))
+    assert summary["profiled_scopes"] == 2
+    assert [s["scope"] for s in summary["scopes"]] == ["page 1", "page 2"]
+    assert all(s["memory_peak_mb"] > 0 for s in summary["scopes"])
+
+def test_zero_sample_rate_skips_scopes(tmp_path):
+    """Scopes that are not sampled are not profiled."""
+    profiler = ScopeProfiler("test", sample_rate=0.0, output_dir=str(tmp_path), enabled=True)
+    for page in range(5):
+        with profiler.scope(f"page {page}"):
+            busy_work(100)
+    assert profiler.dump() == []
+
+def test_only_one_scope_at_a_time(tmp_path):
+    """A scope opened while another thread is being profiled runs unprofiled."""
+    profiler = ScopeProfiler("test", output_dir=str(tmp_path), enabled=True)
+    inside, release = threading.Event(), threading.Event()
+
+    def first():
+        with profiler.scope("first"):
+            inside.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=first)
+    worker.start()
+    inside.wait(5)
+    with profiler.scope("second"):
+        busy_work(100)
+    release.set()
+    worker.join()
+
+    summary = json.load(open(profiler.dump()[3], encoding="utf-8"))
+    assert [s["scope"] for s in summary["scopes"]] == ["first"]
+
+def test_add_profile_arguments():
+    """The shared flags parse with their defaults."""
+    parser = argparse.ArgumentParser()
+    add_profile_arguments(parser)
+    args = parser.parse_args(["--profile", "--profile-rate", "0.5"])
+    assert args.profile and args.profile_rate == 0.5 and args.profile_dir == "profiles"
+    assert not parser.parse_args([]).profile
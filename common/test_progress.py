@@ -0,0 +1,114 @@
+import argparse
+import io
+import json
+import threading
+import time
+import urllib.request
+from common.progress import ProgressTracker, format_seconds, add_progress_arguments, configure_from_args
+
+def test_format_seconds():
+    """Durations are shortened for the terminal line."""
+    assert format_seconds(None) == "?"
+    assert format_seconds(42) == "42s"
+    assert format_seconds(125) == "2m05s"
+    assert format_seconds(3720) == "1h02m"
+
+def test_rates_errors_and_eta():
+    """Items/sec, error rate and ETA come from the recorded events."""
+    tracker = ProgressTracker("test", windows=(10, 60, 300))
+    tracker.set_totals(items=100)
+    for _ in range(18):
+        tracker.item_finished("ok")
+    tracker.item_finished("failed")
+    tracker.item_finished("skipped")
+
+    snapshot = tracker.snapshot(now=tracker._started + 10)
+    assert snapshot["items"] == {"ok": 18, "failed": 1, "skipped": 1, "total": 100}
+    assert snapshot["items_per_second"]["10s"] == 1.9
+    assert snapshot["error_rate"] == round(1 / 19, 4)
+    assert snapshot["eta_seconds"] == round(80 / 1.9)
+
+def test_old_events_leave_the_windows():
+    """Only items inside each window count towards its rate."""
+    tracker = ProgressTracker("test", windows=(10, 60))
+    tracker.item_finished("ok")
+    later = tracker.snapshot(now=tracker._started + 30)
+    assert later["items_per_second"]["10s"] == 0
+    assert later["items_per_second"]["60s"] > 0
+
+def test_total_estimated_from_page_sizes():
+    """Without an item total, the ETA uses the average page size times the page count."""
+    tracker = ProgressTracker("test")
+    tracker.set_totals(pages=10)
+    tracker.page_started(1)
+    tracker.page_found(1, 20)
+    tracker.item_finished("ok")
+    tracker.page_finished(1)
+    snapshot = tracker.snapshot()
+    assert snapshot["items"]["total"] == 200
+    assert snapshot["pages"] == {"done": 1, "total": 10, "in_flight": []}
+
+def test_worker_states_and_pages_in_flight():
+    """Each worker thread reports its own state."""
+    tracker = ProgressTracker("test")
+    tracker.page_started(3)
+
+    def worker():
+        tracker.worker_state("page_load", page=3)
+
+    thread = threading.Thread(target=worker, name="worker-1")
+    thread.start()
+    thread.join()
+    snapshot = tracker.snapshot()
+    assert snapshot["pages"]["in_flight"] == [3]
+    assert snapshot["workers"]["worker-1"]["state"] == "page_load"
+    assert "worker-1:page_load p3" in tracker.render_line(snapshot)
+
+def test_stall_detection():
+    """No finished item within stall_after marks the run as stalled."""
+    tracker = ProgressTracker("test", stall_after=5)
+    tracker.page_started(1)
+    assert not tracker.snapshot()["stalled"]
+    snapshot = tracker.snapshot(now=tracker._started + 6)
+    assert snapshot["stalled"]
+    assert "STALLED" in tracker.render_line(snapshot)
+
+def test_status_file_and_terminal(tmp_path):
+    """The reporter thread keeps the status file up to date and renders lines."""
+    status_file = tmp_path / "status.json"
+    stream = io.StringIO()
+    tracker = ProgressTracker("test")
+    tracker.configure(render=True, status_file=str(status_file), interval=0.05)
+    tracker.start(stream=stream)
+    tracker.item_finished("ok")
+    time.sleep(0.2)
+    tracker.stop()
+    assert json.loads(status_file.read_text(encoding="utf-8"))["items"]["ok"] == 1
+    assert "[test] 1 ok" in stream.getvalue()
+
+def test_http_endpoint():
+    """The snapshot is served as JSON on the configured port."""
+    tracker = ProgressTracker("test")
+    tracker.configure(port=0, interval=60)
+    tracker.start(stream=io.StringIO())
+    try:
+        port = tracker._server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as response:
+            assert json.loads(response.read())["pipeline"] == "test"
+    finally:
+        tracker.stop()
+
+def test_nothing_started_without_outputs():
+    """Without --progress options no reporter thread runs."""
+    tracker = ProgressTracker("test")
+    tracker.start()
+    assert tracker._thread is None
+    tracker.stop()
+
+def test_progress_arguments():
+    """The shared flags configure the tracker."""
+    parser = argparse.ArgumentParser()
+    add_progress_arguments(parser)
+    tracker = ProgressTracker("test")
+    configure_from_args(tracker, parser.parse_args(["--progress", "--status-file", "s.json"]))
+    assert tracker.render and tracker.status_file == "s.json" and tracker.port is None
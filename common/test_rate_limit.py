@@ -0,0 +1,47 @@
+import threading
+import pytest
+from common.rate_limit import TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_burst_then_steady_rate():
+    """A full bucket allows `capacity` requests at once, then one every 1/rate seconds."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(2.0)
+    assert bucket.acquire() == pytest.approx(2.0)
+    assert clock.now == pytest.approx(4.0)
+
+def test_time_spent_working_counts_towards_the_spacing():
+    """Tokens refill while the caller is busy, so a slow request needs no extra wait."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    clock.now += 1.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+def test_threads_share_one_rate():
+    """Concurrent callers together stay within the bucket's rate."""
+    bucket = TokenBucket(rate=50.0, capacity=1)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    started = bucket.clock()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert bucket.clock() - started >= 5 / 50.0 * 0.9
+
+def test_rate_must_be_positive():
+    """A bucket that never refills is rejected up front."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
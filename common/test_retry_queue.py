@@ -0,0 +1,70 @@
+from common.retry_queue import RetryQueue
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def test_backoff_doubles_up_to_the_cap():
+    """Each failed attempt doubles the wait, never beyond max_delay."""
+    queue = RetryQueue(base_delay=5, max_delay=30)
+    assert [queue.delay(n) for n in range(1, 6)] == [5, 10, 20, 30, 30]
+
+def test_items_are_given_up_after_max_attempts():
+    """Pushing counts attempts; the last allowed failure moves the item to the exhausted list."""
+    queue = RetryQueue(max_attempts=3)
+    assert queue.push("a", {"name": "A"}, "timeout")
+    assert queue.push("a", {"name": "A"}, "timeout")
+    assert not queue.push("a", {"name": "A"}, "timeout")
+    assert "a" not in queue and queue.exhausted["a"]["attempts"] == 3
+
+def test_drain_waits_for_backoff_and_retries_until_success():
+    """Draining sleeps until each item is due and stops retrying items that succeed."""
+    clock = FakeClock()
+    queue = RetryQueue(max_attempts=4, base_delay=5, clock=clock, sleep=clock.sleep)
+    queue.push("flaky", "flaky")
+    queue.push("broken", "broken")
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        if payload == "broken":
+            raise RuntimeError("still broken")
+        return calls.count("flaky") >= 2
+
+    assert queue.drain(handler) == 1
+    assert calls.count("flaky") == 2 and calls.count("broken") == 3
+    assert clock.slept[0] == 5 and max(clock.slept) <= 20
+    assert queue.exhausted["broken"]["error"] == "still broken"
+    assert queue.last_exhausted == ["broken"]
+    assert len(queue) == 0
+
+def test_successes_clear_old_failures_and_only_this_drain_is_reported(tmp_path):
+    """An item given up in an earlier run is forgotten once it succeeds and is not reported again."""
+    path = str(tmp_path / "retries.json")
+    queue = RetryQueue(path, max_attempts=1)
+    queue.push("old", "old")
+    resumed = RetryQueue(path, max_attempts=2, base_delay=0, sleep=lambda seconds: None)
+    resumed.discard("old")  # Stored by the main pass of this run
+    assert "old" not in RetryQueue(path).exhausted
+
+    resumed.push("new", "new")
+    assert resumed.drain(lambda payload: False) == 0
+    assert resumed.last_exhausted == ["new"]
+    assert list(resumed.exhausted) == ["new"]
+
+def test_pending_items_survive_a_restart(tmp_path):
+    """Items and their attempt counts are saved, so the next run retries them."""
+    path = str(tmp_path / "retries.json")
+    RetryQueue(path).push("a", {"url": "http://example.invalid/a"})
+    resumed = RetryQueue(path)
+    assert resumed.payloads() == {"a": {"url": "http://example.invalid/a"}}
+    resumed.push("a", {"url": "http://example.invalid/a"})
+    assert RetryQueue(path)._pending["a"]["attempts"] == 2
@@ -0,0 +1,72 @@
+import json
+import os
+from common.packed import PackedArchive
+from common.sections import main, parse_description, parse_file, parse_source, section_name
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "task 2", "product_details.txt")
+
+def test_sample_product_is_split_into_fields():
+    """The saved sample yields its title, specifications, features, usage notes and description."""
+    parsed = parse_file(SAMPLE)
+    assert parsed["title"] == "Activated Coconut Charcoal Powder Raw Material"
+    assert parsed["inci_name"] == "Charcoal Powder"
+    assert parsed["origin"] == "France"
+    assert parsed["specifications"]["mesh_size"] == "8-15 microns"
+    assert [f["title"] for f in parsed["features"]][0] == "Quick Absorption Rate"
+    assert len(parsed["usage"]) == 4 and parsed["usage"][0]["title"] == "Clarifying Shampoo"
+    assert parsed["description"].startswith("Activated Coconut Charcoal Powder is a versatile")
+
+def test_cas_numbers_and_spelling_variants():
+    """CAS numbers are found anywhere; INCI and CAS keys are normalized; unknown headings keep their text."""
+    text = ("DESCRIPTION\nCold pressed oil.\nSAFETY NOTES\nFor external use only.\n"
+            "PRODUCT SPECIFICATIONS\nINCI: Simmondsia Chinensis (Jojoba) Seed Oil\nCAS No.: 61789-91-1\n"
+            "Country of Origin: Peru\n")
+    parsed = parse_description(text, title="Jojoba Oil")
+    assert parsed["inci_name"] == "Simmondsia Chinensis (Jojoba) Seed Oil"
+    assert parsed["cas_numbers"] == ["61789-91-1"]
+    assert parsed["origin"] == "Peru"
+    assert parsed["sections"] == {"safety_notes": "For external use only."}
+
+def test_heading_detection():
+    """Known headings and upper-case lines naming a section open sections; labelled or sentence lines do not."""
+    assert section_name("MORE ABOUT SHEA BUTTER") == "specifications"
+    assert section_name("Directions and Suggested Usage") == "usage"
+    assert section_name("INCI Name: Charcoal Powder") is None
+    assert section_name("In hair care, the powder purifies the scalp.") is None
+    assert section_name("Great for skin care applications.") is None
+    assert section_name("Offers many benefits for dry skin") is None
+    assert section_name("STORAGE AND HANDLING") == "storage_and_handling"
+    assert section_name("100% PURE") is None
+
+def test_emphasised_line_stays_in_its_section():
+    """An upper-case line that names no section is kept as description text."""
+    text = "DESCRIPTION\nCold pressed oil.\n100% PURE\nNo additives or fillers.\nSAFETY NOTES\nFor external use only.\n"
+    parsed = parse_description(text, title="Jojoba Oil")
+    assert parsed["description"].splitlines() == ["Cold pressed oil.", "100% PURE", "No additives or fillers."]
+    assert parsed["sections"] == {"safety_notes": "For external use only."}
+
+def test_short_prose_stays_in_its_section():
+    """A short sentence mentioning a heading keyword is kept as description text."""
+    text = "DESCRIPTION\nA light, fast-absorbing oil.\nGreat for skin care applications.\nPairs well with shea butter.\n"
+    parsed = parse_description(text, title="Argan Oil")
+    assert parsed["usage"] == []
+    assert parsed["description"].splitlines() == ["A light, fast-absorbing oil.", "Great for skin care applications.",
+                                                  "Pairs well with shea butter."]
+
+def test_archive_is_parsed_in_worker_processes(tmp_path):
+    """Records of a packed archive are parsed in parallel, in order, keeping URL and name."""
+    with open(SAMPLE, encoding="utf-8") as f:
+        title, _, description = f.read().partition("\n\n")
+    archive = PackedArchive(str(tmp_path / "products.jsonl.gz"))
+    for n in range(5):
+        archive.append({"url": f"https://example.test/{n}", "name": f"Charcoal {n}", "product_name": title,
+                        "scraped_at": "2026-01-01T00:00:00", "description": description})
+    archive.close()
+
+    parsed = list(parse_source(str(tmp_path / "products.jsonl.gz"), workers=2, chunksize=2))
+    assert [p["url"] for p in parsed] == [f"https://example.test/{n}" for n in range(5)]
+    assert {p["inci_name"] for p in parsed} == {"Charcoal Powder"}
+
+    output = main([str(tmp_path / "products.jsonl.gz"), "-o", str(tmp_path / "sections.jsonl"), "--workers", "1"])
+    with open(output, encoding="utf-8") as f:
+        assert len([json.loads(line) for line in f]) == 5
@@ -0,0 +1,72 @@
+import json
+import threading
+import pytest
+from common.timing import StageTimer, StageStats, MAX_SAMPLES
+
+def test_span_records_duration():
+    """A span adds one occurrence with a non-negative duration."""
+    timer = StageTimer("products")
+    with timer.span("parse"):
+        pass
+    stats = timer.report()["stages"]["parse"]
+    assert stats["count"] == 1
+    assert stats["sum_seconds"] >= 0
+
+def test_span_records_on_error():
+    """Failing stages are timed too."""
+    timer = StageTimer("products")
+    with pytest.raises(ValueError):
+        with timer.span("dialog_open"):
+            raise ValueError("stale element")
+    assert timer.report()["stages"]["dialog_open"]["count"] == 1
+
+def test_histogram_and_percentiles():
+    """Buckets are cumulative and percentiles come from the samples."""
+    timer = StageTimer("brands")
+    for seconds in (0.001, 0.2, 0.2, 3.0, 100.0):
+        timer.record("page_load", seconds)
+    stats = timer.report()["stages"]["page_load"]
+    assert stats["histogram"]["0.005"] == 1
+    assert stats["histogram"]["0.25"] == 3
+    assert stats["histogram"]["5.0"] == 4
+    assert stats["histogram"]["+Inf"] == 5
+    assert stats["p50_seconds"] == 0.2
+    assert stats["min_seconds"] == 0.001
+    assert stats["max_seconds"] == 100.0
+
+def test_samples_stay_bounded():
+    """The sample reservoir never grows past its cap."""
+    stats = StageStats()
+    for i in range(MAX_SAMPLES + 500):
+        stats.add(i / 1000)
+    assert stats.count == MAX_SAMPLES + 500
+    assert len(stats.samples) == MAX_SAMPLES
+
+def test_thread_safety():
+    """Concurrent workers do not lose spans."""
+    timer = StageTimer("products")
+
+    def work():
+        for _ in range(500):
+            timer.record("persist_json", 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert timer.report()["stages"]["persist_json"]["count"] == 2000
+
+def test_write_reports(tmp_path):
+    """Both the JSON report and the Prometheus textfile are written."""
+    timer = StageTimer("newdirections")
+    timer.record("page_load", 0.3)
+    json_path = tmp_path / "timings.json"
+    prom_path = tmp_path / "scraper.prom"
+    timer.write_reports(str(json_path), str(prom_path))
+
+    report = json.loads(json_path.read_text(encoding="utf-8"))
+    assert report["pipeline"] == "newdirections"
+    prom = prom_path.read_text(encoding="utf-8")
+    assert 'scraper_stage_duration_seconds_bucket{pipeline="newdirections",stage="page_load",le="0.5"} 1' in prom
+    assert 'scraper_stage_duration_seconds_count{pipeline="newdirections",stage="page_load"} 1' in prom
@@ -0,0 +1,140 @@
+"""Per-stage timing spans with JSON and Prometheus textfile reports."""
+
+import bisect
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds (Prometheus style, +Inf is implicit)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MAX_SAMPLES = 10000
+
+
+class StageStats:
+    """Count, sum, extremes, histogram and a bounded sample of one stage's durations."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.samples = []
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+        # Reservoir sampling keeps percentiles honest with bounded memory
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = seconds
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def to_dict(self):
+        cumulative = 0
+        histogram = {}
+        for bound, hits in zip([*BUCKETS, "+Inf"], self.buckets):
+            cumulative += hits
+            histogram[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else None,
+            "min_seconds": self.min,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "histogram": histogram,
+        }
+
+
+class StageTimer:
+    """Collects timing spans per stage for one pipeline; safe to share between threads."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.started = time.time()
+        self._stages = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """Add one measured duration to a stage."""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds)
+
+    def add_listener(self, listener):
+        """Notify `listener.stage_started(stage)` / `stage_finished(stage)` around every span."""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def span(self, stage):
+        """Time the body of a with-block as one occurrence of a stage (also on errors)."""
+        for listener in self._listeners:
+            listener.stage_started(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+            for listener in self._listeners:
+                listener.stage_finished(stage)
+
+    def report(self):
+        """Return the run report as a JSON-serializable dict."""
+        with self._lock:
+            stages = {stage: stats.to_dict() for stage, stats in sorted(self._stages.items())}
+        return {
+            "pipeline": self.pipeline,
+            "started_at": self.started,
+            "wall_seconds": round(time.time() - self.started, 3),
+            "stages": stages,
+        }
+
+    def prometheus_text(self):
+        """Return the stage histograms in the Prometheus text exposition format."""
+        report = self.report()
+        metric = "scraper_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Time spent per scraping stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for stage, stats in report["stages"].items():
+            labels = f'pipeline="{self.pipeline}",stage="{stage}"'
+            for bound, cumulative in stats["histogram"].items():
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {stats['sum_seconds']}")
+            lines.append(f"{metric}_count{{{labels}}} {stats['count']}")
+        lines.append(f'scraper_run_wall_seconds{{pipeline="{self.pipeline}"}} {report["wall_seconds"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, json_path, prom_path=None):
+        """Write the JSON report and, optionally, a Prometheus textfile (both atomically)."""
+        _atomic_write(json_path, json.dumps(self.report(), indent=4))
+        if prom_path:
+            _atomic_write(prom_path, self.prometheus_text())
+
+
+def _atomic_write(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
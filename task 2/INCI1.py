@@ -1,5 +1,8 @@
 import os
+import sys
+import json
 import time
+import argparse
 import logging
 import threading
 import concurrent.futures
@@ -9,45 +12,78 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+
+# Make the shared helpers in common/ importable when run from this folder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from common.timing import StageTimer
+from common.logging_config import configure_logging, item_extra
+from common.profiling import ScopeProfiler, add_profile_arguments
+from common.progress import ProgressTracker, add_progress_arguments, configure_from_args
+from common.driver_cache import resolve_chromedriver
+from common.retry_queue import RetryQueue
+from common.rate_limit import TokenBucket
+from common.packed import PackedArchive, safe_filename
 
 class NewDirectionsScraper:
-    """Scrapes product details from multiple pages and saves each product as a text file."""
+    """Scrapes product details from multiple pages into a packed archive (or one text file per product)."""
 
-    def __init__(self):
-        """Initialize scraper settings."""
+    def __init__(self, **overrides):
+        """Initialize scraper settings; keyword arguments override the config defaults."""
         self.config = {
             'base_url': 'https://www.newdirectionsaromatics.com/category/raw-materials/',
-            'output_dir': 'product_details',  # Save text files in this folder
+            'output_format': 'packed',  # 'packed': one indexed archive; 'txt': one text file per product
+            'archive_file': 'newdirections_products.jsonl.gz',  # Packed records with URL, name, scrape time, description
+            'output_dir': 'product_details',  # Text files ('txt' format, or the export_txt view of the archive)
+            'export_txt': False,  # Also write the .txt view of the archive after the run
             'timeout': 60,
-            'headless': False,
+            'headless': True,  # Run Chrome without a window
             'max_workers': 2,
+            'timing_report': 'newdirections_timings.json',  # Per-stage timing report of the last run
+            'prometheus_file': 'newdirections_scraper.prom',  # Same timings as a Prometheus textfile
+            'retry_file': 'newdirections_retries.json',  # Failed products, retried with backoff after the main pass
+            'retry_attempts': 4,
+            'retry_base_delay': 5.0,
+            'request_rate': 0.5,  # Product page loads per second, shared by all workers
+            'request_burst': 1,  # Page loads allowed at once after an idle spell
+            'status_report': 'newdirections_products.json',  # Final status of every product of the last run
         }
+        self.config.update(overrides)
 
-        os.makedirs(self.config['output_dir'], exist_ok=True)
+        if self.config['output_format'] == 'txt':
+            os.makedirs(self.config['output_dir'], exist_ok=True)
         self.setup_logging()
         self.product_queue = Queue()
         self.lock = threading.Lock()
-        self.chrome_driver_path = ChromeDriverManager().install()  # ✅ Install WebDriver only ONCE
+        self.timer = StageTimer('newdirections')
+        self.profiler = ScopeProfiler('newdirections')  # Switched on by --profile
+        self.progress = ProgressTracker('newdirections')  # Shown with --progress / --status-file / --status-port
+        self.retry_queue = RetryQueue(self.config['retry_file'], max_attempts=self.config['retry_attempts'],
+                                      base_delay=self.config['retry_base_delay'])
+        self.rate_limiter = TokenBucket(self.config['request_rate'], self.config['request_burst'])
+        self.statuses = {}  # Product URL -> name, status, attempts and last error
+        self.archive = PackedArchive(self.config['archive_file']) if self.config['output_format'] == 'packed' else None
+        with self.timer.span('driver_resolve'):
+            self.chrome_driver_path = resolve_chromedriver()  # ✅ Cached on disk, shared with other runs
 
         self.logger.info("Scraper initialized.")
 
     def setup_logging(self):
-        """Setup logging."""
+        """Setup queued logging (SCRAPER_LOG_JSON / SCRAPER_LOG_SAMPLE switch on JSON and sampling)."""
         log_file = f'scraper_{time.strftime("%Y%m%d_%H%M%S")}.log'
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
-                            handlers=[logging.FileHandler(log_file), logging.StreamHandler()])
+        configure_logging(log_file)
         self.logger = logging.getLogger('NewDirectionsScraper')
 
     def get_browser(self):
         """Setup Selenium WebDriver without redundant WebDriver checks."""
         options = Options()
-        options.add_argument("--headless")  # Run in headless mode
+        if self.config['headless']:
+            options.add_argument("--headless")  # Run in headless mode
         options.add_argument("--disable-gpu")
         options.add_argument("--no-sandbox")
 
-        driver = webdriver.Chrome(service=Service(self.chrome_driver_path), options=options)
-        driver.set_page_load_timeout(self.config['timeout'])
+        with self.timer.span('driver_startup'):
+            driver = webdriver.Chrome(service=Service(self.chrome_driver_path), options=options)
+            driver.set_page_load_timeout(self.config['timeout'])
         return driver
 
     def scrape_category_pages(self):
@@ -59,15 +95,18 @@ class NewDirectionsScraper:
             while True:  # Loop through pagination until no more pages
                 page_url = f"{self.config['base_url']}?page={page_number}" if page_number > 1 else self.config['base_url']
                 self.logger.info(f"Scraping category page {page_number}: {page_url}")
-                driver.get(page_url)
-                time.sleep(5)  # Allow page to load
+                self.progress.worker_state('category_page', page_number)
+                with self.timer.span('category_page_load'):
+                    driver.get(page_url)
+                    time.sleep(5)  # Allow page to load
 
-                # Scroll down to load all content
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
+                    # Scroll down to load all content
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    time.sleep(3)
 
                 # Extract product links
-                product_links = driver.find_elements(By.CSS_SELECTOR, "div.page--full-width.page--grid a")
+                with self.timer.span('link_discovery'):
+                    product_links = driver.find_elements(By.CSS_SELECTOR, "div.page--full-width.page--grid a")
 
                 if not product_links:
                     self.logger.warning(f"No product links found on page {page_number}!")
@@ -81,7 +120,8 @@ class NewDirectionsScraper:
 
                         if "/products/" in product_url:
                             self.product_queue.put({'url': product_url, 'name': product_name})
-                            self.logger.info(f"Found product: {product_name} ({product_url})")
+                            self.logger.info(f"Found product: {product_name} ({product_url})",
+                                             extra=item_extra(page_number, product_name, 'link_discovery'))
                     except Exception as e:
                         self.logger.warning(f"Error processing product link: {str(e)}")
 
@@ -101,59 +141,236 @@ class NewDirectionsScraper:
         finally:
             driver.quit()
 
+    def discover_products(self):
+        """Queue the products of every category page, then mark the end of the queue for the workers."""
+        try:
+            with self.timer.span('category_pages'):
+                self.scrape_category_pages()
+        finally:
+            self.product_queue.put(None)
+
+    def set_status(self, product_info, status, error=None):
+        """Record where one product stands: queued, running, ok, failed or given_up."""
+        with self.lock:
+            entry = self.statuses.setdefault(product_info['url'], {'name': product_info['name'], 'attempts': 0})
+            entry['status'] = status
+            if status == 'running':
+                entry['attempts'] += 1
+            if error:
+                entry['error'] = error
+
     def extract_product_details(self, product_info):
-        """Extract product details and save to a text file."""
+        """Extract product details and save them to the archive or a text file; returns whether it worked."""
         url = product_info['url']
         name = product_info['name']
 
-        # Clean file name to avoid OS issues
-        safe_filename = "".join(c if c.isalnum() or c in " _-" else "_" for c in name) + ".txt"
-        file_path = os.path.join(self.config['output_dir'], safe_filename)
-
-        driver = self.get_browser()
+        started = time.perf_counter()
+        driver = None
         try:
-            driver.get(url)
-            time.sleep(3)
+            # Wait for a token before starting Chrome, so no browser sits idle in the queue
+            self.progress.worker_state('rate_limit', item=name)
+            with self.timer.span('rate_limit'):
+                self.rate_limiter.acquire()
+            self.progress.worker_state('product', item=name)
+            driver = self.get_browser()
+            with self.timer.span('page_load'):
+                driver.get(url)
+                time.sleep(3)
 
             # Extract product name and details
-            product_name = driver.find_element(By.TAG_NAME, "h1").text
-            details_section = driver.find_element(By.CLASS_NAME, "productView-description").text
+            with self.timer.span('page_source'):
+                product_name = driver.find_element(By.TAG_NAME, "h1").text
+                details_section = driver.find_element(By.CLASS_NAME, "productView-description").text
 
-            with open(file_path, "w", encoding="utf-8") as file:
-                file.write(f"{product_name}\n\n")
-                file.write(details_section)
+            with self.timer.span('persist'):
+                saved_to = self.save_product(url, name, product_name, details_section)
 
-            self.logger.info(f"Saved: {file_path}")
+            self.logger.info(f"Saved: {saved_to}", extra=item_extra(item=name, stage='product', started=started))
+            self.progress.item_finished('ok')
+            return True
 
         except Exception as e:
             self.logger.error(f"Error extracting {name}: {str(e)}")
+            self.progress.item_finished('failed')
+            return False
 
         finally:
-            driver.quit()
+            if driver:
+                driver.quit()
+            self.progress.worker_state('idle')
+
+    def save_product(self, url, name, product_name, details_section):
+        """Store one product in the packed archive, or as <name>.txt in the output folder; returns where."""
+        if self.archive is not None:
+            self.archive.append({
+                'url': url,
+                'name': name,
+                'product_name': product_name,
+                'scraped_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                'description': details_section,
+            })
+            return f"{self.config['archive_file']} ({url})"
+
+        # Clean file name to avoid OS issues
+        file_path = os.path.join(self.config['output_dir'], safe_filename(name) + ".txt")
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(f"{product_name}\n\n")
+            file.write(details_section)
+        return file_path
+
+    def profiled_product_details(self, product_info):
+        """Extract one product, profiling it if it is picked by the profiler's sample; failures are queued for retry."""
+        self.set_status(product_info, 'running')
+        with self.profiler.scope(product_info['name']):
+            ok = self.extract_product_details(product_info)
+        if ok:
+            self.retry_queue.discard(product_info['url'])  # Given up on in an earlier run
+        else:
+            self.retry_queue.push(product_info['url'], product_info)
+        return ok
+
+    def retry_product_details(self, product_info):
+        """Extract one queued product again and record the outcome."""
+        self.set_status(product_info, 'running')
+        ok = self.extract_product_details(product_info)
+        self.set_status(product_info, 'ok' if ok else 'failed')
+        return ok
+
+    def drain_retries(self):
+        """Retry the failed products one at a time, with exponential backoff; returns how many succeeded."""
+        if not len(self.retry_queue):
+            return 0
+        self.logger.info(f"Retrying {len(self.retry_queue)} failed products...")
+        succeeded = self.retry_queue.drain(self.retry_product_details)
+        given_up = self.retry_queue.last_exhausted
+        for url in given_up:
+            entry = self.retry_queue.exhausted[url]
+            self.set_status(entry['payload'], 'given_up', entry.get('error'))
+        if given_up:
+            self.logger.warning(f"Gave up on {len(given_up)} products after "
+                                f"{self.config['retry_attempts']} attempts: {', '.join(sorted(given_up))}")
+        return succeeded
 
     def process_product_queue(self):
-        """Process product queue using multiple threads."""
-        total_products = self.product_queue.qsize()
-        self.logger.info(f"Processing {total_products} products...")
+        """Extract products on worker threads as discovery queues them and collect every result; returns the ok count.
 
+        Page loads are spaced by the token bucket instead of a fixed pause per
+        submit, and the queue is read until discover_products() marks its end.
+        """
+        self.logger.info("Processing products as they are found...")
+        futures = {}
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
-            futures = []
-            while not self.product_queue.empty():
+            while True:
                 product_info = self.product_queue.get()
-                future = executor.submit(self.extract_product_details, product_info)
-                futures.append(future)
-                time.sleep(2.0)
+                if product_info is None:  # Discovery is finished
+                    break
+                if product_info['url'] in self.statuses:
+                    continue  # Listed on more than one category page
+                self.set_status(product_info, 'queued')
+                self.progress.set_totals(items=len(self.statuses))
+                futures[executor.submit(self.profiled_product_details, product_info)] = product_info
+
+                for future in [f for f in futures if f.done()]:
+                    self.collect_result(futures.pop(future), future)
+
+            for future in concurrent.futures.as_completed(futures):
+                self.collect_result(futures[future], future)
+
+        counts = {}
+        for entry in self.statuses.values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        self.logger.info(f"Processed {len(self.statuses)} products: "
+                         f"{', '.join(f'{count} {status}' for status, count in sorted(counts.items()))}")
+        return counts.get('ok', 0)
+
+    def collect_result(self, product_info, future):
+        """Record a finished product; one that raised is queued for retry like one that failed."""
+        try:
+            ok, error = future.result(), None
+        except Exception as e:
+            ok, error = False, str(e)
+            self.logger.error(f"Error extracting {product_info['name']}: {error}")
+            self.retry_queue.push(product_info['url'], product_info, error)
+        self.set_status(product_info, 'ok' if ok else 'failed', error)
 
     def scrape(self):
         """Run full scraping process."""
         self.logger.info("Starting scraping process...")
-        self.scrape_category_pages()
-        self.process_product_queue()
-        self.logger.info("Scraping completed successfully!")
+        self.progress.start()
+        try:
+            # Products are extracted while the category pages are still being walked
+            discovery = threading.Thread(target=self.discover_products, name='discovery', daemon=True)
+            discovery.start()
+            with self.timer.span('product_queue'):
+                self.process_product_queue()
+            discovery.join()
+            with self.timer.span('retries'):
+                self.drain_retries()
+            self.logger.info("Scraping completed successfully!")
+        finally:
+            self.progress.stop()
+            self.close_archive()
+            self.write_timing_reports()
+            self.write_status_report()
+            self.write_profile()
 
-def main():
-    scraper = NewDirectionsScraper()
+    def write_timing_reports(self):
+        """Write the per-stage timing report and Prometheus textfile."""
+        try:
+            self.timer.write_reports(self.config['timing_report'], self.config['prometheus_file'])
+            self.logger.info(f"Timing report written to {self.config['timing_report']}")
+        except Exception as e:
+            self.logger.error(f"Error writing timing report: {str(e)}")
+
+    def close_archive(self):
+        """Save the archive index and, if asked for, write the .txt view of the archive."""
+        if self.archive is None:
+            return
+        try:
+            self.archive.close()
+            if self.config['export_txt']:
+                paths = self.archive.export_txt(self.config['output_dir'])
+                self.logger.info(f"Wrote {len(paths)} text files to {self.config['output_dir']}")
+        except Exception as e:
+            self.logger.error(f"Error closing archive: {str(e)}")
+
+    def write_status_report(self):
+        """Write the final status of every product found in this run."""
+        try:
+            with self.lock:
+                statuses = dict(self.statuses)
+            with open(self.config['status_report'], "w", encoding="utf-8") as file:
+                json.dump(statuses, file, indent=4, ensure_ascii=False)
+            self.logger.info(f"Product status report written to {self.config['status_report']}")
+        except Exception as e:
+            self.logger.error(f"Error writing product status report: {str(e)}")
+
+    def write_profile(self):
+        """Write the aggregated profile if profiling was switched on."""
+        try:
+            paths = self.profiler.dump()
+            if paths:
+                self.logger.info(f"Profile written to {', '.join(paths)}")
+        except Exception as e:
+            self.logger.error(f"Error writing profile: {str(e)}")
+
+def add_run_arguments(parser):
+    """Add the run options shared with the unified CLI (common/cli.py)."""
+    add_profile_arguments(parser)
+    add_progress_arguments(parser)
+
+def run(args, **config):
+    """Build a scraper with the given config overrides and run it."""
+    scraper = NewDirectionsScraper(**config)
+    configure_from_args(scraper.progress, args)
+    if args.profile:
+        scraper.profiler.configure(sample_rate=args.profile_rate, output_dir=args.profile_dir)
     scraper.scrape()
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape New Directions Aromatics raw materials")
+    add_run_arguments(parser)
+    run(parser.parse_args(argv))
+
 if __name__ == "__main__":
     main()
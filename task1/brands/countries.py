@@ -0,0 +1,388 @@
+import json
+import re
+import sys
+
+# ISO 3166 country names (short English form) with the aliases that show up in
+# NATRUE brand addresses. Every alias maps back to the canonical name.
+COUNTRIES = {
+    "Afghanistan": [],
+    "Åland Islands": ["Aland Islands"],
+    "Albania": ["Shqipëria"],
+    "Algeria": [],
+    "American Samoa": [],
+    "Andorra": [],
+    "Angola": [],
+    "Anguilla": [],
+    "Antarctica": [],
+    "Antigua and Barbuda": ["Antigua & Barbuda"],
+    "Argentina": [],
+    "Armenia": [],
+    "Aruba": [],
+    "Australia": [],
+    "Austria": ["Österreich", "Oesterreich"],
+    "Azerbaijan": [],
+    "Bahamas": ["The Bahamas"],
+    "Bahrain": [],
+    "Bangladesh": [],
+    "Barbados": [],
+    "Belarus": [],
+    "Belgium": ["Belgique", "België", "Belgien"],
+    "Belize": [],
+    "Benin": [],
+    "Bermuda": [],
+    "Bhutan": [],
+    "Bolivia": [],
+    "Bonaire, Sint Eustatius and Saba": ["Caribbean Netherlands"],
+    "Bosnia and Herzegovina": ["Bosnia & Herzegovina", "Bosnia-Herzegovina"],
+    "Botswana": [],
+    "Bouvet Island": [],
+    "Brazil": ["Brasil"],
+    "British Indian Ocean Territory": [],
+    "Brunei": ["Brunei Darussalam"],
+    "Bulgaria": ["България"],
+    "Burkina Faso": [],
+    "Burundi": [],
+    "Cabo Verde": ["Cape Verde"],
+    "Cambodia": [],
+    "Cameroon": [],
+    "Canada": [],
+    "Cayman Islands": [],
+    "Central African Republic": [],
+    "Chad": [],
+    "Chile": [],
+    "China": ["P.R. China", "PR China", "People's Republic of China"],
+    "Christmas Island": [],
+    "Cocos (Keeling) Islands": ["Cocos Islands"],
+    "Colombia": [],
+    "Comoros": [],
+    "Congo": ["Republic of the Congo"],
+    "Democratic Republic of the Congo": ["DR Congo", "Congo-Kinshasa"],
+    "Cook Islands": [],
+    "Costa Rica": [],
+    "Côte d'Ivoire": ["Cote d'Ivoire", "Ivory Coast"],
+    "Croatia": ["Hrvatska"],
+    "Cuba": [],
+    "Curaçao": ["Curacao"],
+    "Cyprus": [],
+    "Czech Republic": ["Czechia", "Česká republika", "Ceska republika"],
+    "Denmark": ["Danmark"],
+    "Djibouti": [],
+    "Dominica": [],
+    "Dominican Republic": [],
+    "Ecuador": [],
+    "Egypt": [],
+    "El Salvador": [],
+    "Equatorial Guinea": [],
+    "Eritrea": [],
+    "Estonia": ["Eesti"],
+    "Eswatini": ["Swaziland"],
+    "Ethiopia": [],
+    "Falkland Islands": [],
+    "Faroe Islands": [],
+    "Fiji": [],
+    "Finland": ["Suomi"],
+    "France": [],
+    "French Guiana": [],
+    "French Polynesia": [],
+    "French Southern Territories": [],
+    "Gabon": [],
+    "Gambia": ["The Gambia"],
+    "Georgia": [],
+    "Germany": ["Deutschland"],
+    "Ghana": [],
+    "Gibraltar": [],
+    "Greece": ["Hellas", "Ελλάδα"],
+    "Greenland": [],
+    "Grenada": [],
+    "Guadeloupe": [],
+    "Guam": [],
+    "Guatemala": [],
+    "Guernsey": [],
+    "Guinea": [],
+    "Guinea-Bissau": [],
+    "Guyana": [],
+    "Haiti": [],
+    "Heard Island and McDonald Islands": [],
+    "Holy See": ["Vatican City", "Vatican"],
+    "Honduras": [],
+    "Hong Kong": [],
+    "Hungary": ["Magyarország"],
+    "Iceland": ["Ísland"],
+    "India": [],
+    "Indonesia": [],
+    "Iran": [],
+    "Iraq": [],
+    "Ireland": ["Republic of Ireland", "Éire"],
+    "Isle of Man": [],
+    "Israel": [],
+    "Italy": ["Italia"],
+    "Jamaica": [],
+    "Japan": [],
+    "Jersey": [],
+    "Jordan": [],
+    "Kazakhstan": [],
+    "Kenya": [],
+    "Kiribati": [],
+    "North Korea": ["DPRK"],
+    "South Korea": ["Korea", "Republic of Korea", "Korea, Republic of"],
+    "Kosovo": [],
+    "Kuwait": [],
+    "Kyrgyzstan": [],
+    "Laos": ["Lao PDR"],
+    "Latvia": ["Latvija"],
+    "Lebanon": [],
+    "Lesotho": [],
+    "Liberia": [],
+    "Libya": [],
+    "Liechtenstein": [],
+    "Lithuania": ["Lietuva"],
+    "Luxembourg": ["Luxemburg"],
+    "Macao": ["Macau"],
+    "Madagascar": [],
+    "Malawi": [],
+    "Malaysia": [],
+    "Maldives": [],
+    "Mali": [],
+    "Malta": [],
+    "Marshall Islands": [],
+    "Martinique": [],
+    "Mauritania": [],
+    "Mauritius": [],
+    "Mayotte": [],
+    "Mexico": ["México"],
+    "Micronesia": [],
+    "Moldova": [],
+    "Monaco": [],
+    "Mongolia": [],
+    "Montenegro": [],
+    "Montserrat": [],
+    "Morocco": ["Maroc"],
+    "Mozambique": [],
+    "Myanmar": ["Burma"],
+    "Namibia": [],
+    "Nauru": [],
+    "Nepal": [],
+    "Netherlands": ["The Netherlands", "Nederland", "Holland"],
+    "New Caledonia": [],
+    "New Zealand": [],
+    "Nicaragua": [],
+    "Niger": [],
+    "Nigeria": [],
+    "Niue": [],
+    "Norfolk Island": [],
+    "North Macedonia": ["Macedonia"],
+    "Northern Mariana Islands": [],
+    "Norway": ["Norge"],
+    "Oman": [],
+    "Pakistan": [],
+    "Palau": [],
+    "Palestine": [],
+    "Panama": [],
+    "Papua New Guinea": [],
+    "Paraguay": [],
+    "Peru": [],
+    "Philippines": [],
+    "Pitcairn": [],
+    "Poland": ["Polska"],
+    "Portugal": [],
+    "Puerto Rico": [],
+    "Qatar": [],
+    "Réunion": ["Reunion"],
+    "Romania": ["România"],
+    "Russia": ["Russian Federation"],
+    "Rwanda": [],
+    "Saint Barthélemy": ["Saint Barthelemy"],
+    "Saint Helena": [],
+    "Saint Kitts and Nevis": [],
+    "Saint Lucia": [],
+    "Saint Martin": [],
+    "Saint Pierre and Miquelon": [],
+    "Saint Vincent and the Grenadines": [],
+    "Samoa": [],
+    "San Marino": [],
+    "Sao Tome and Principe": ["São Tomé and Príncipe"],
+    "Saudi Arabia": ["KSA"],
+    "Senegal": [],
+    "Serbia": ["Srbija"],
+    "Seychelles": [],
+    "Sierra Leone": [],
+    "Singapore": [],
+    "Sint Maarten": [],
+    "Slovakia": ["Slovak Republic", "Slovensko"],
+    "Slovenia": ["Slovenija"],
+    "Solomon Islands": [],
+    "Somalia": [],
+    "South Africa": [],
+    "South Georgia and the South Sandwich Islands": [],
+    "South Sudan": [],
+    "Spain": ["España", "Espana"],
+    "Sri Lanka": [],
+    "Sudan": [],
+    "Suriname": [],
+    "Svalbard and Jan Mayen": [],
+    "Sweden": ["Sverige"],
+    "Switzerland": ["Schweiz", "Suisse", "Svizzera"],
+    "Syria": [],
+    "Taiwan": [],
+    "Tajikistan": [],
+    "Tanzania": [],
+    "Thailand": [],
+    "Timor-Leste": ["East Timor"],
+    "Togo": [],
+    "Tokelau": [],
+    "Tonga": [],
+    "Trinidad and Tobago": [],
+    "Tunisia": [],
+    "Turkey": ["Türkiye", "Turkiye"],
+    "Turkmenistan": [],
+    "Turks and Caicos Islands": [],
+    "Tuvalu": [],
+    "Uganda": [],
+    "Ukraine": [],
+    "United Arab Emirates": ["UAE", "U.A.E."],
+    "United Kingdom": ["UK", "U.K.", "Great Britain", "England", "Scotland", "Wales", "Northern Ireland"],
+    "United States": ["USA", "U.S.A.", "United States of America"],
+    "Uruguay": [],
+    "Uzbekistan": [],
+    "Vanuatu": [],
+    "Venezuela": [],
+    "Vietnam": ["Viet Nam"],
+    "British Virgin Islands": [],
+    "U.S. Virgin Islands": [],
+    "Wallis and Futuna": [],
+    "Western Sahara": [],
+    "Yemen": [],
+    "Zambia": [],
+    "Zimbabwe": [],
+}
+
+# Lower-cased alias -> canonical country name
+_ALIASES = {}
+for _name, _aliases in COUNTRIES.items():
+    for _alias in [_name, *_aliases]:
+        _ALIASES[_alias.lower()] = _name
+
+# One compiled alternation over every name and alias. Longer aliases come first
+# so "South Sudan" wins over "Sudan" and "Guinea-Bissau" over "Guinea" when
+# they start at the same position.
+COUNTRY_PATTERN = re.compile(
+    r"(?<!\w)(?:"
+    + "|".join(re.escape(alias) for alias in sorted(_ALIASES, key=len, reverse=True))
+    + r")(?!\w)",
+    re.IGNORECASE,
+)
+
+# US states (and their postal codes) that start the "State ZIP" end of a US address
+US_STATES = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "District of Columbia": "DC",
+    "Florida": "FL", "Georgia": "GA", "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL",
+    "Indiana": "IN", "Iowa": "IA", "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA",
+    "Maine": "ME", "Maryland": "MD", "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN",
+    "Mississippi": "MS", "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV",
+    "New Hampshire": "NH", "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY",
+    "North Carolina": "NC", "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR",
+    "Pennsylvania": "PA", "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD",
+    "Tennessee": "TN", "Texas": "TX", "Utah": "UT", "Vermont": "VT", "Virginia": "VA",
+    "Washington": "WA", "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY",
+}
+
+# "City, State 12345" or "City, ST 12345-6789" at a US address
+US_ADDRESS_PATTERN = re.compile(
+    r",\s*(?:(?i:" + "|".join(re.escape(state) for state in sorted(US_STATES, key=len, reverse=True))
+    + r")|" + "|".join(US_STATES.values()) + r")\s+\d{5}(?:-\d{4})?(?!\w)"
+)
+
+
+# A country name that is part of a US state ("Atlanta, Georgia 30303", "Newark, New Jersey")
+def _is_us_state(line, match, us_spans):
+    if any(start <= match.start() < end for start, end in us_spans):
+        return True
+    return line[:match.start()].lower().endswith("new ")
+
+
+# Find the country mentioned in a piece of text (the last mention wins)
+def find_country(text):
+    return split_country(text)[0]
+
+
+# Split one address line into (country, rest of the line)
+# A US "State ZIP" after the last country name makes it the United States
+def split_country(line):
+    line = line or ""
+    us_spans = [match.span() for match in US_ADDRESS_PATTERN.finditer(line)]
+    match = None
+    for candidate in COUNTRY_PATTERN.finditer(line):
+        if not _is_us_state(line, candidate, us_spans):
+            match = candidate
+    if us_spans and (match is None or match.start() < us_spans[-1][0]):
+        return "United States", line.strip()
+    if match is None:
+        return "", line.strip()
+    rest = (line[:match.start()] + line[match.end():]).strip(" ,;-\t")
+    return _ALIASES[match.group(0).lower()], rest
+
+
+# Turn address lines into (country, address); the last line naming a country wins
+def parse_address(lines):
+    country = ""
+    address_parts = []
+    for line in lines:
+        found, rest = split_country(line)
+        if found:
+            country = found
+        if rest:
+            address_parts.append(rest)
+    return country, " ".join(address_parts)
+
+
+# Split a brand info block into company, address and country
+def parse_brand_block(text, website=""):
+    lines = [line.strip() for line in re.split(r"[|\n]", text or "") if line.strip()]
+    if not lines:
+        return "", "", ""
+
+    company = lines[0]
+    country, address = parse_address(lines[1:])
+
+    # If website was in the text, remove it from address
+    if website and website in address:
+        address = address.replace(website, "").strip()
+    return company, address, country
+
+
+# Re-derive company/address/country for already stored brand records
+def enrich_brand_records(records):
+    for record in records:
+        if record.get("country"):
+            yield record
+            continue
+
+        company, address, country = parse_brand_block(record.get("company", ""), record.get("website", ""))
+        if not country:
+            yield record
+            continue
+
+        enriched = dict(record)
+        enriched["company"] = company
+        enriched["country"] = country
+        if address and not record.get("address"):
+            enriched["address"] = address
+        yield enriched
+
+
+if __name__ == "__main__":
+    # Usage: python countries.py natrue_brand_details.json [--write]
+    path = sys.argv[1] if len(sys.argv) > 1 else "natrue_brand_details.json"
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    brands = data.get("brands", [])
+    before = sum(1 for brand in brands if brand.get("country"))
+    data["brands"] = list(enrich_brand_records(brands))
+    after = sum(1 for brand in data["brands"] if brand.get("country"))
+    print(f"{len(brands)} brands, country known for {before} before and {after} after parsing")
+
+    if "--write" in sys.argv:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
@@ -0,0 +1,82 @@
+import pytest
+from countries import (
+    find_country,
+    split_country,
+    parse_address,
+    parse_brand_block,
+    enrich_brand_records
+)
+
+def test_find_country_outside_old_list():
+    """Countries missing from the old hard-coded list are found."""
+    assert find_country("Ljubljana 1000, Slovenia") == "Slovenia"
+    assert find_country("Seoul 06164\nSouth Korea") == "South Korea"
+
+def test_find_country_aliases_and_case():
+    """Aliases and upper-case addresses map to the canonical name."""
+    assert find_country("RIYADH, 13224\nSAUDI ARABIA") == "Saudi Arabia"
+    assert find_country("10115 Berlin, Deutschland") == "Germany"
+    assert find_country("New York, USA") == "United States"
+
+def test_find_country_prefers_longest_name():
+    """Overlapping names resolve to the longer one."""
+    assert find_country("Juba, South Sudan") == "South Sudan"
+    assert find_country("Bissau, Guinea-Bissau") == "Guinea-Bissau"
+    assert find_country("Abuja, Nigeria") == "Nigeria"
+
+def test_find_country_requires_word_boundary():
+    """Country names inside other words are not matched."""
+    assert find_country("Omani Street 5") == ""
+    assert find_country("") == ""
+
+def test_us_states_are_not_countries():
+    """A US state named like a country, or a "State ZIP" ending, gives the United States."""
+    assert split_country("Atlanta, Georgia 30303") == ("United States", "Atlanta, Georgia 30303")
+    assert find_country("Jersey City, NJ 07302") == "United States"
+    assert find_country("Santa Fe, New Mexico") == ""
+    assert find_country("Tbilisi 0108, Georgia") == "Georgia"
+    assert find_country("St Helier, Jersey JE2 3QA") == "Jersey"
+
+def test_split_country():
+    """The matched country is removed from the line."""
+    assert split_country("73025 Martano (LE) Italy") == ("Italy", "73025 Martano (LE)")
+    assert split_country("via Laterale Campo Sportivo") == ("", "via Laterale Campo Sportivo")
+
+def test_parse_address():
+    """Address lines are joined and the country is pulled out."""
+    country, address = parse_address(["Hauptstrasse 1", "1010 Wien", "Austria"])
+    assert country == "Austria"
+    assert address == "Hauptstrasse 1 1010 Wien"
+
+def test_parse_brand_block_newlines_and_website():
+    """Stored blocks use newlines and may contain the website."""
+    text = "N&B natural is better s.r.l\nvia Laterale Campo Sportivo\n73025 Martano (LE)\nItaly|www.nb.com"
+    company, address, country = parse_brand_block(text, "www.nb.com")
+    assert company == "N&B natural is better s.r.l"
+    assert address == "via Laterale Campo Sportivo 73025 Martano (LE)"
+    assert country == "Italy"
+
+def test_parse_brand_block_us_address():
+    """A US address whose state is also a country name is placed in the United States."""
+    text = "Peach Naturals Inc.\n1 Peachtree St NE\nAtlanta, Georgia 30303"
+    assert parse_brand_block(text) == ("Peach Naturals Inc.", "1 Peachtree St NE Atlanta, Georgia 30303", "United States")
+
+@pytest.mark.parametrize("text", ["", "   ", "|\n|"])
+def test_parse_brand_block_empty(text):
+    """Empty blocks give empty fields."""
+    assert parse_brand_block(text) == ("", "", "")
+
+def test_enrich_brand_records():
+    """Stored records without a country are re-parsed, others are kept."""
+    records = [
+        {"name": "A", "company": "A GmbH\nStr. 1\nGermany", "address": "", "country": "", "website": ""},
+        {"name": "B", "company": "B AG", "address": "", "country": "Switzerland", "website": ""},
+        {"name": "C", "company": "C Ltd", "address": "", "country": "", "website": ""},
+    ]
+    enriched = list(enrich_brand_records(records))
+    assert enriched[0]["company"] == "A GmbH"
+    assert enriched[0]["address"] == "Str. 1"
+    assert enriched[0]["country"] == "Germany"
+    assert enriched[1] is records[1]
+    assert enriched[2] is records[2]
+    assert records[0]["country"] == ""
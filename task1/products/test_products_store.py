@@ -0,0 +1,58 @@
+import json
+
+import pandas as pd
+import pytest
+import Products
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    """Point the products stores at a temporary directory and create them there."""
+    monkeypatch.setattr(Products, "JSON_FILE", str(tmp_path / "natrue_product_details.json"))
+    monkeypatch.setattr(Products, "EXCEL_FILE", str(tmp_path / "natrue_product_details.xlsx"))
+    monkeypatch.setattr(Products, "TEMP_DIR", str(tmp_path / "temp_files"))
+    monkeypatch.setattr(Products, "PROCESSED_FILE", str(tmp_path / "processed_products.json"))
+    monkeypatch.setattr(Products, "CATALOG_FILE", str(tmp_path / "natrue_product_details.jsonl.gz"))
+    monkeypatch.setattr(Products, "MANIFEST_FILE", str(tmp_path / "natrue_products_manifest.json"))
+    monkeypatch.setattr(Products, "RETRY_FILE", str(tmp_path / "natrue_products_retries.json"))
+    Products.initialize_files()
+    return tmp_path
+
+
+def test_same_name_different_brand_is_kept(store):
+    """Products sharing a name but not brand/manufacturer are both stored."""
+    base = {
+        "name": "Shampoo",
+        "certification_level": "Certified",
+        "certification_description": "Organic",
+        "ingredients": "Aqua",
+        "product_description": "",
+        "usage": "",
+        "image_url": "",
+        "page_number": 3
+    }
+    Products.append_to_json(dict(base, brand="Brand X", manufacturer="Company X"))
+    Products.append_to_json(dict(base, brand="Brand Y", manufacturer="Company Y"))
+    Products.append_to_json(dict(base, brand="Brand X", manufacturer="Company X"))
+    Products.append_to_excel(dict(base, brand="Brand X", manufacturer="Company X"))
+    Products.append_to_excel(dict(base, brand="Brand Y", manufacturer="Company Y"))
+    Products.merge_temp_files_to_excel()
+
+    with open(store / "natrue_product_details.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert [p["brand"] for p in data["products"]] == ["Brand X", "Brand Y"]
+
+    df_excel = pd.read_excel(store / "natrue_product_details.xlsx")
+    assert sorted(df_excel["brand"].tolist()) == ["Brand X", "Brand Y"]
+
+
+def test_merge_temp_files_in_batches(store):
+    """With max_files, each merge only loads a bounded batch of temp files."""
+    for name in ("Batch A", "Batch B", "Batch C"):
+        Products.append_to_excel({"name": name, "brand": "Brand", "manufacturer": "Company", "page_number": 4})
+    assert Products.merge_temp_files_to_excel(max_files=2) == 2
+    assert Products.merge_temp_files_to_excel(max_files=2) == 1
+    assert Products.merge_temp_files_to_excel(max_files=2) == 0
+
+    df_excel = pd.read_excel(store / "natrue_product_details.xlsx")
+    assert {"Batch A", "Batch B", "Batch C"} <= set(df_excel["name"])
@@ -0,0 +1,95 @@
+import os
+import re
+import sys
+import glob
+import json
+import hashlib
+import argparse
+from raw_materials import iter_raw_materials
+
+# A material is identified by its trade name and manufacturer
+KEY_FIELDS = ("name", "manufacturer")
+
+# Normalize a cell for comparing; whitespace-only edits are not changes
+def normalize_value(value):
+    if value is None:
+        return ""
+    return " ".join(str(value).split())
+
+# Build the join key of a row
+def material_key(row):
+    return "|".join(normalize_value(row.get(field)).casefold() for field in KEY_FIELDS)
+
+# Hash the normalized row so unchanged rows are compared with one string check
+def row_hash(row):
+    joined = "\x1f".join(f"{field}={normalize_value(row[field])}" for field in sorted(row))
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+# Yield (key, hash, row); repeated keys get a "#n" suffix so they still pair up in order
+def keyed_rows(xlsx_path):
+    seen = {}
+    for row in iter_raw_materials(xlsx_path):
+        key = material_key(row)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        yield key, row_hash(row), row
+
+# Compare two exports, reading each file once; yields delta entries
+def diff_exports(old_path, new_path):
+    old_rows = {key: (digest, row) for key, digest, row in keyed_rows(old_path)}
+
+    for key, digest, row in keyed_rows(new_path):
+        old = old_rows.pop(key, None)
+        if old is None:
+            yield {"op": "added", "key": key, "row": row}
+        elif old[0] != digest:
+            old_row = old[1]
+            changes = {
+                field: [old_row.get(field), row.get(field)]
+                for field in sorted(set(old_row) | set(row))
+                if normalize_value(old_row.get(field)) != normalize_value(row.get(field))
+            }
+            yield {"op": "modified", "key": key, "changes": changes}
+
+    # Whatever is left in the old export is gone from the new one
+    for key, (_, row) in old_rows.items():
+        yield {"op": "removed", "key": key, "row": row}
+
+# Write the delta as JSON Lines and return the counts per operation
+def write_delta(old_path, new_path, delta_path):
+    counts = {"added": 0, "removed": 0, "modified": 0}
+    with open(delta_path, "w", encoding="utf-8") as f:
+        for entry in diff_exports(old_path, new_path):
+            counts[entry["op"]] += 1
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    return counts
+
+# Find the two most recent dated exports in a folder (oldest first)
+def latest_exports(folder="."):
+    exports = glob.glob(os.path.join(folder, "raw_materials_*.xlsx"))
+    dated = sorted(path for path in exports if re.search(r"raw_materials_\d{4}-\d{2}-\d{2}\.xlsx$", path))
+    return dated[-2:]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff two dated raw materials exports")
+    parser.add_argument("old", nargs="?", help="older export (default: second newest raw_materials_<date>.xlsx)")
+    parser.add_argument("new", nargs="?", help="newer export (default: newest raw_materials_<date>.xlsx)")
+    parser.add_argument("-o", "--output", help="delta file to write (default: raw_materials_delta_<old>_<new>.jsonl)")
+    args = parser.parse_args()
+
+    if args.old and args.new:
+        old_path, new_path = args.old, args.new
+    else:
+        exports = latest_exports()
+        if len(exports) < 2:
+            sys.exit("Need two raw_materials_<date>.xlsx exports to compare")
+        old_path, new_path = exports
+
+    def stem(path):
+        return os.path.splitext(os.path.basename(path))[0].replace("raw_materials_", "")
+
+    delta_path = args.output or f"raw_materials_delta_{stem(old_path)}_{stem(new_path)}.jsonl"
+    counts = write_delta(old_path, new_path, delta_path)
+    print(f"{old_path} -> {new_path}: {counts['added']} added, {counts['removed']} removed, "
+          f"{counts['modified']} modified (written to {delta_path})")
@@ -1,22 +1,160 @@
+import sys
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import json
+import argparse
+from datetime import date
 import os
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.action_chains import ActionChains
 
-def export_natrue_data():
+# Make the shared helpers in common/ importable when run from this folder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from common.lazy import lazy_import
+from common.driver_cache import resolve_chromedriver
+from common.engine import EntitySpec, ListDialogScraper, chrome_options
+
+# Selenium and openpyxl are only imported by the export/ingest steps that use them
+load_workbook = lazy_import("openpyxl", "load_workbook")
+webdriver = lazy_import("selenium.webdriver")
+Options = lazy_import("selenium.webdriver.chrome.options", "Options")
+Service = lazy_import("selenium.webdriver.chrome.service", "Service")
+By = lazy_import("selenium.webdriver.common.by", "By")
+WebDriverWait = lazy_import("selenium.webdriver.support.ui", "WebDriverWait")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+ActionChains = lazy_import("selenium.webdriver.common.action_chains", "ActionChains")
+
+RAW_MATERIALS_STORE = "raw_materials.jsonl"
+RAW_MATERIALS_URL = "https://natrue.org/our-standard/natrue-certified-world/?database[tab]=raw-materials&prod[pageIndex]=1&prod[search]=&brands[pageNumber]=1&brands[filters][letter]="
+# The raw materials tab is a table without dialogs, paged by its own pager (the URL does not select the page)
+RAW_MATERIALS_TABLE = "#pane-raw-materials .el-table"
+RAW_MATERIALS_NEXT_PAGE = "#pane-raw-materials .el-pagination .btn-next"
+# Chrome and Firefox write to these names while a download is still running
+IN_PROGRESS_SUFFIXES = (".crdownload", ".part")
+
+# Wait until a new .xlsx shows up in download_dir and its size stops changing
+def wait_for_download(download_dir, started_after, timeout=120, poll_interval=0.5, stable_polls=2):
+    deadline = time.monotonic() + timeout
+    last_seen = None
+    stable = 0
+    
+    while time.monotonic() < deadline:
+        names = os.listdir(download_dir)
+        # Partial files left behind by earlier downloads do not hold this one up
+        in_progress = any(name.endswith(IN_PROGRESS_SUFFIXES) and _modified_since(os.path.join(download_dir, name), started_after)
+                          for name in names)
+        candidates = [os.path.join(download_dir, name) for name in names if name.endswith(".xlsx")]
+        candidates = [path for path in candidates if os.path.getmtime(path) >= started_after]
+        
+        if candidates and not in_progress:
+            newest = max(candidates, key=os.path.getmtime)
+            current = (newest, os.path.getsize(newest))
+            if current[1] > 0 and current == last_seen:
+                stable += 1
+                if stable >= stable_polls:
+                    return newest
+            else:
+                stable = 0
+            last_seen = current
+        
+        time.sleep(poll_interval)
+    
+    raise TimeoutError(f"No finished download in {download_dir} after {timeout} seconds")
+
+# Whether a file was modified at or after a time (False if it is already gone)
+def _modified_since(path, started_after):
+    try:
+        return os.path.getmtime(path) >= started_after
+    except OSError:
+        return False
+
+# Clean a cell value from the export (the site pads some names with non-breaking spaces)
+def clean_cell(value):
+    if isinstance(value, str):
+        return value.replace("\xa0", " ").strip()
+    return value
+
+# Yield the rows of an export one at a time; read-only mode keeps memory flat
+def iter_raw_materials(xlsx_path):
+    workbook = load_workbook(xlsx_path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        keys = [str(h).strip().lower() if h is not None else f"column_{i}" for i, h in enumerate(header)]
+        
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            yield {key: clean_cell(value) for key, value in zip(keys, row)}
+    finally:
+        workbook.close()
+
+# Write records to the JSON Lines store, replacing it atomically; returns how many were written
+def write_store(records, store_path=RAW_MATERIALS_STORE):
+    temp_path = f"{store_path}.tmp"
+    count = 0
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                count += 1
+    except BaseException:
+        # The old store stays as it was
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, store_path)
+    return count
+
+# Stream an export into the JSON Lines store, replacing it atomically
+def ingest_raw_materials(xlsx_path, store_path=RAW_MATERIALS_STORE):
+    count = write_store(iter_raw_materials(xlsx_path), store_path)
+    print(f"Ingested {count} raw materials from {xlsx_path} into {store_path}")
+    return count
+
+# Rows of the raw materials table, keyed by the lower-cased column headers like the export
+def extract_raw_material_rows(table_soup, page_number):
+    header = [cell.get_text(strip=True) for cell in table_soup.select(f"{RAW_MATERIALS_TABLE} .el-table__header th")]
+    keys = [h.lower() if h else f"column_{i}" for i, h in enumerate(header)]
+    records = []
+    for row in table_soup.select(f"{RAW_MATERIALS_TABLE} .el-table__body tr"):
+        values = [clean_cell(cell.get_text(" ", strip=True)) for cell in row.find_all("td")]
+        if any(values):
+            records.append(dict(zip(keys, values)))
+    return records
+
+# The same headless browser the product and brand scrapers use
+def setup_list_driver():
+    driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=chrome_options())
+    driver.set_page_load_timeout(30)
+    return driver
+
+# Raw materials read from the table on the site through the shared list engine (common/engine.py)
+RAW_MATERIALS_SPEC = EntitySpec(
+    "raw_materials", "raw_material",
+    list_selector=f"{RAW_MATERIALS_TABLE} .el-table__body tr",
+    extract=extract_raw_material_rows,
+    next_selector=RAW_MATERIALS_NEXT_PAGE,
+)
+LIST_ENGINE = ListDialogScraper(RAW_MATERIALS_SPEC, {"PAGE_URL_TEMPLATE": RAW_MATERIALS_URL}, new_driver=setup_list_driver)
+
+# Store every page of the raw materials table (no export download needed); the store is only
+# replaced once the last page has been read
+def scrape_raw_materials_list(store_path=RAW_MATERIALS_STORE):
+    count = write_store(LIST_ENGINE.read_paged_list(), store_path)
+    print(f"Stored {count} raw materials from the table on the site in {store_path}")
+    return count
+
+# headless=True runs without a window and returns the downloaded file as soon as it is complete;
+# the default keeps the visible, wait-for-Enter behaviour used for debugging
+def export_natrue_data(headless=False, download_dir=None, timeout=120):
     # Setup Chrome options
     chrome_options = Options()
-    # Keep the browser visible to debug (comment this out to run headless)
-    # chrome_options.add_argument("--headless")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
     
-    # Set download directory to current working directory
-    download_dir = os.path.abspath(os.getcwd())
+    # Set download directory (current working directory by default)
+    download_dir = os.path.abspath(download_dir or os.getcwd())
     prefs = {
         "download.default_directory": download_dir,
         "download.prompt_for_download": False,
@@ -27,17 +165,22 @@ def export_natrue_data():
     
     # Initialize the webdriver with proper service
     try:
-        # This will automatically download the correct ChromeDriver version
-        service = Service(ChromeDriverManager().install())
+        # Downloads the matching ChromeDriver on first use, then reuses the cached one
+        service = Service(resolve_chromedriver())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         
+        if headless:
+            # Headless Chrome ignores the download prefs unless told explicitly
+            driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+        
         # Go directly to page 1
-        url = "https://natrue.org/our-standard/natrue-certified-world/?database[tab]=raw-materials&prod[pageIndex]=1&prod[search]=&brands[pageNumber]=1&brands[filters][letter]="
+        url = RAW_MATERIALS_URL
         print(f"Navigating to: {url}")
         driver.get(url)
         
-        # Wait for page to load completely
-        time.sleep(5)
+        # Wait for page to load completely (headless relies on the button wait below)
+        if not headless:
+            time.sleep(5)
         
         # Using the exact CSS selector you provided
         print("Looking for export button using exact CSS selector...")
@@ -49,6 +192,7 @@ def export_natrue_data():
         )
         
         print("Export button found, clicking...")
+        started_at = time.time() - 1
         
         # Try different methods to click the button
         try:
@@ -71,6 +215,13 @@ def export_natrue_data():
         
         # Wait for download to complete
         print("Waiting for download to complete...")
+        if headless:
+            downloaded = wait_for_download(download_dir, started_at, timeout=timeout)
+            export_path = os.path.join(download_dir, f"raw_materials_{date.today().isoformat()}.xlsx")
+            os.replace(downloaded, export_path)
+            print(f"Download complete: {export_path}")
+            return export_path
+        
         time.sleep(15)
         
         print(f"Download should be complete. Check your downloads folder or {download_dir}")
@@ -80,9 +231,39 @@ def export_natrue_data():
     
     finally:
         # Keep the browser open for debugging
-        input("Press Enter to close the browser...")
+        if not headless:
+            input("Press Enter to close the browser...")
         if 'driver' in locals():
             driver.quit()
 
+# Add the export options shared with the unified CLI (common/cli.py)
+def add_run_arguments(parser):
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a browser window, then ingest the export into the store")
+    parser.add_argument("--ingest", metavar="XLSX", help="only ingest an existing export into the store")
+    parser.add_argument("--from-list", action="store_true",
+                        help="read the table shown on the site into the store instead of downloading the export")
+    parser.add_argument("--store", default=RAW_MATERIALS_STORE, help="JSON Lines store to write")
+
+# Export (interactively or headless) and/or ingest, as selected by the options
+def run(args):
+    if args.ingest:
+        ingest_raw_materials(args.ingest, args.store)
+    elif args.from_list:
+        scrape_raw_materials_list(args.store)
+    elif args.headless:
+        export_path = export_natrue_data(headless=True)
+        if not export_path:
+            # Exit non-zero so schedulers notice that nothing was ingested
+            raise SystemExit("Raw materials export failed; the store was not changed")
+        ingest_raw_materials(export_path, args.store)
+    else:
+        export_natrue_data()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the NATRUE raw materials list")
+    add_run_arguments(parser)
+    run(parser.parse_args(argv))
+
 if __name__ == "__main__":
-    export_natrue_data()
\ No newline at end of file
+    main()
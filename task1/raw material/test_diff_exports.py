@@ -0,0 +1,69 @@
+import json
+import pytest
+from openpyxl import Workbook
+from diff_exports import diff_exports, write_delta, latest_exports, material_key
+
+HEADER = ["Name", "Manufacturer", "Composition", "INCI", "Status", "Expiration"]
+
+def make_export(path, rows):
+    """Write a small export in the site's column layout."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+@pytest.fixture
+def exports(tmp_path):
+    old = make_export(tmp_path / "raw_materials_2025-03-08.xlsx", [
+        ["Rosehip Oil", "IXOM", "100% natural", "Rosa Canina", "approved", "30/06/2026"],
+        ["Stearic Acid", "IXOM", "100% Derived-natural", "Stearic Acid", "approved", "30/06/2026"],
+        ["Emulsiphos", "Symrise AG", "100% Derived-natural", "Potassium Cetyl Phosphate", "approved", "14/12/2026"],
+    ])
+    new = make_export(tmp_path / "raw_materials_2025-04-08.xlsx", [
+        ["Rosehip  Oil", "ixom", "100% natural", "Rosa Canina", "approved", "30/06/2026"],
+        ["Stearic Acid", "IXOM", "100% Derived-natural", "Stearic Acid", "expired", "30/06/2026"],
+        ["Jojoba Oil", "DKSH GmbH", "100% natural", "Simmondsia Chinensis Seed Oil", "approved", "01/01/2027"],
+    ])
+    return old, new
+
+def test_material_key_normalizes_case_and_spaces():
+    """Whitespace and case do not change the key."""
+    assert material_key({"name": " Rosehip  Oil", "manufacturer": "IXOM"}) == material_key({"name": "rosehip oil", "manufacturer": "ixom"})
+
+def test_diff_exports(exports):
+    """Additions, removals and field-level modifications are reported."""
+    entries = list(diff_exports(*exports))
+    by_op = {}
+    for entry in entries:
+        by_op.setdefault(entry["op"], []).append(entry)
+
+    assert [e["row"]["name"] for e in by_op["added"]] == ["Jojoba Oil"]
+    assert [e["row"]["name"] for e in by_op["removed"]] == ["Emulsiphos"]
+    assert len(by_op["modified"]) == 2
+    stearic = [e for e in by_op["modified"] if e["key"].startswith("stearic")][0]
+    assert stearic["changes"] == {"status": ["approved", "expired"]}
+
+def test_duplicate_keys_pair_in_order(tmp_path):
+    """Repeated materials in one export are matched by occurrence."""
+    row = ["Aloe", "X", "100% natural", "Aloe Barbadensis", "approved", "01/01/2026"]
+    old = make_export(tmp_path / "old.xlsx", [row, row])
+    new = make_export(tmp_path / "new.xlsx", [row])
+    entries = list(diff_exports(old, new))
+    assert [(e["op"], e["key"]) for e in entries] == [("removed", "aloe|x#2")]
+
+def test_write_delta(exports, tmp_path):
+    """The delta file holds one JSON entry per change."""
+    delta_path = tmp_path / "delta.jsonl"
+    counts = write_delta(*exports, str(delta_path))
+    assert counts == {"added": 1, "removed": 1, "modified": 2}
+    lines = delta_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 4
+    assert all("op" in json.loads(line) for line in lines)
+
+def test_latest_exports(exports, tmp_path):
+    """The two newest dated exports are picked, oldest first."""
+    make_export(tmp_path / "raw_materials_2025-02-01.xlsx", [])
+    assert latest_exports(str(tmp_path)) == list(exports)
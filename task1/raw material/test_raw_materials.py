@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import raw_materials
+import os
 
 @pytest.fixture
 def mock_driver():
@@ -45,3 +46,103 @@ def test_browser_closes_on_exit(mock_driver):
             raw_materials.export_natrue_data()
     
     mock_driver.quit.assert_called_once()
+
+def test_wait_for_download_ignores_partial_files(tmp_path):
+    """A download is reported only once no .crdownload remains and the size is stable."""
+    partial = tmp_path / "export.xlsx.crdownload"
+    partial.write_bytes(b"abc")
+    finished = tmp_path / "export.xlsx"
+    sleeps = []
+
+    def fake_sleep(_):
+        sleeps.append(1)
+        if len(sleeps) == 2:
+            partial.unlink()
+            finished.write_bytes(b"abcdef")
+
+    with patch("raw_materials.time.sleep", side_effect=fake_sleep):
+        path = raw_materials.wait_for_download(str(tmp_path), started_after=0, timeout=5, poll_interval=0)
+
+    assert path == str(finished)
+    assert len(sleeps) >= 4
+
+def test_wait_for_download_times_out(tmp_path):
+    """Without a finished file the wait gives up after the timeout."""
+    (tmp_path / "export.xlsx.crdownload").write_bytes(b"abc")
+    with pytest.raises(TimeoutError):
+        raw_materials.wait_for_download(str(tmp_path), started_after=0, timeout=0.05, poll_interval=0.01)
+
+def test_stale_partial_files_do_not_block_a_new_download(tmp_path):
+    """A .crdownload or store .tmp left by an earlier crash is ignored; only this download counts."""
+    for name in ("old.xlsx.crdownload", "raw_materials.jsonl.tmp"):
+        (tmp_path / name).write_bytes(b"stale")
+        os.utime(tmp_path / name, (1000, 1000))
+    (tmp_path / "export.xlsx").write_bytes(b"abcdef")
+    with patch("raw_materials.time.sleep", return_value=None):
+        path = raw_materials.wait_for_download(str(tmp_path), started_after=2000, timeout=5, poll_interval=0)
+    assert path == str(tmp_path / "export.xlsx")
+
+def test_failed_headless_export_exits_non_zero(tmp_path):
+    """When the headless export yields no file the run fails and the store is not touched."""
+    parser = raw_materials.argparse.ArgumentParser()
+    raw_materials.add_run_arguments(parser)
+    args = parser.parse_args(["--headless", "--store", str(tmp_path / "raw_materials.jsonl")])
+    with patch("raw_materials.export_natrue_data", return_value=None):
+        with pytest.raises(SystemExit) as exit_info:
+            raw_materials.run(args)
+    assert exit_info.value.code != 0
+    assert not (tmp_path / "raw_materials.jsonl").exists()
+
+def test_ingest_raw_materials_streams_rows(tmp_path):
+    """Rows are read lazily, cleaned and written as JSON Lines."""
+    from openpyxl import Workbook
+    import json
+
+    xlsx_path = tmp_path / "raw_materials_2025-03-08.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Name", "Manufacturer", "Composition", "INCI", "Status", "Expiration"])
+    sheet.append(["\xa0Rosehip Oil ", "IXOM", "100% natural", "Rosa Canina", "approved", "30/06/2026"])
+    sheet.append([None, None, None, None, None, None])
+    sheet.append(["Stearic Acid", "IXOM", "100% Derived-natural", "Stearic Acid", "approved", "30/06/2026"])
+    workbook.save(xlsx_path)
+
+    rows = raw_materials.iter_raw_materials(str(xlsx_path))
+    assert next(rows)["name"] == "Rosehip Oil"
+    rows.close()
+
+    store_path = tmp_path / "raw_materials.jsonl"
+    assert raw_materials.ingest_raw_materials(str(xlsx_path), str(store_path)) == 2
+    records = [json.loads(line) for line in store_path.read_text(encoding="utf-8").splitlines()]
+    assert [r["inci"] for r in records] == ["Rosa Canina", "Stearic Acid"]
+
+def test_headless_export_returns_without_input(mock_driver, tmp_path):
+    """Headless mode never prompts and returns the dated export path."""
+    downloaded = tmp_path / "export.xlsx"
+    downloaded.write_bytes(b"data")
+
+    with patch("raw_materials.resolve_chromedriver"), \
+         patch("raw_materials.WebDriverWait"), \
+         patch("raw_materials.wait_for_download", return_value=str(downloaded)), \
+         patch("builtins.input") as mock_input:
+        path = raw_materials.export_natrue_data(headless=True, download_dir=str(tmp_path))
+
+    mock_input.assert_not_called()
+    mock_driver.execute_cdp_cmd.assert_called_once()
+    mock_driver.quit.assert_called_once()
+    assert os.path.basename(path).startswith("raw_materials_")
+    assert os.path.exists(path)
+
+def test_raw_material_rows_are_read_from_the_table():
+    """The list spec keys table rows by the lower-cased headers, like the export."""
+    from bs4 import BeautifulSoup
+    html = (
+        '<div id="pane-raw-materials"><div class="el-table">'
+        '<div class="el-table__header"><table><tr><th>Name</th><th>INCI</th><th></th></tr></table></div>'
+        '<div class="el-table__body"><table>'
+        '<tr><td>\xa0Rosehip Oil </td><td>Rosa Canina</td><td>x</td></tr>'
+        '<tr><td></td><td></td><td></td></tr>'
+        '</table></div></div></div>'
+    )
+    rows = raw_materials.extract_raw_material_rows(BeautifulSoup(html, "html.parser"), 1)
+    assert rows == [{"name": "Rosehip Oil", "inci": "Rosa Canina", "column_2": "x"}]